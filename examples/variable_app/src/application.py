@@ -2,7 +2,6 @@ import time
 import asyncio
 from application_framework.service.service import Service
 from examples.single_app.config import AppConfig
-from application_framework.messaging.message import Message
 
 
 class Application(Service):
@@ -27,13 +26,9 @@ class Application(Service):
                     # )
                 except Exception as e:
                     self.crashed = True
-                    self.channels.service_to_supervisor.send(
-                        Message(sender=self.service_id, content="crashed")
-                    )
+                    self.channels.service_to_supervisor.send(self.crashed_message)
         print(f"[Application] Application was instructed to stop")
-        self.channels.service_to_supervisor.send(
-            Message(sender=self.service_id, content="stopped")
-        )
+        self.channels.service_to_supervisor.send(self.stopped_message)
 
     async def run_async(self):
         self.crashed = False
@@ -51,12 +46,6 @@ class Application(Service):
                     # )
                 except Exception as e:
                     self.crashed = True
-                    await self.channels.service_to_supervisor.send_async(
-                        Message(sender=self.service_id, content="crashed"),
-                        self.loop,
-                    )
+                    await self.channels.service_to_supervisor.send_async(self.crashed_message, self.loop)
         print(f"[Application] Application was instructed to stop")
-        await self.channels.service_to_supervisor.send_async(
-            Message(sender=self.service_id, content="stopped"),
-            self.loop,
-        )
+        await self.channels.service_to_supervisor.send_async(self.stopped_message, self.loop)
@@ -33,6 +33,9 @@ setup(
     install_requires=[
 
     ],
+    extras_require={
+        'zmq': ['pyzmq'],
+    },
     tests_require=[
         'pytest',
     ],
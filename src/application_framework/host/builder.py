@@ -1,28 +1,79 @@
 import asyncio
 
+from application_framework.host.event_loop_factory import EventLoopFactory
 from application_framework.host.host import Host
+from application_framework.messaging.transport import Transport
+from application_framework.supervisor.supervision_group import SupervisionGroup
+from application_framework.supervisor.supervision_strategy import SupervisionStrategy
 
 
 class HostBuilder:
     def __init__(self):
-        self.loop = self.get_or_create_loop()
+        self.loop = None
+        self.event_loop_factory = None
         self.service_configs = []
         self.listening_port = None
+        self.transport = Transport.DEFAULT
+        self.max_in_flight_calls = 64
+        self.freeze_gc = False
+        self.channel_executor_workers = None
+        self.start_event_bus_proxy = False
+        self.supervision_groups = []
 
     def add_application(self, service_config):
         self.service_configs.append(service_config)
         return self
 
+    def add_supervision_group(self, name, members, strategy=SupervisionStrategy.ONE_FOR_ONE, max_restarts=None,
+                              restart_period=60):
+        self.supervision_groups.append(SupervisionGroup(name, members, strategy, max_restarts, restart_period))
+        return self
+
     def set_listening_port(self, listening_port):
         self.listening_port = listening_port
         return self
 
+    def set_transport(self, transport):
+        self.transport = transport
+        return self
+
+    def set_max_in_flight_calls(self, max_in_flight_calls):
+        self.max_in_flight_calls = max_in_flight_calls
+        return self
+
+    def set_loop_factory(self, loop_factory=None, slow_callback_duration=None, default_executor_workers=None):
+        self.event_loop_factory = EventLoopFactory(loop_factory, slow_callback_duration, default_executor_workers)
+        return self
+
+    def set_freeze_gc(self, freeze_gc=True):
+        self.freeze_gc = freeze_gc
+        return self
+
+    def set_channel_executor_workers(self, channel_executor_workers):
+        self.channel_executor_workers = channel_executor_workers
+        return self
+
+    def set_start_event_bus_proxy(self, start_event_bus_proxy=True):
+        self.start_event_bus_proxy = start_event_bus_proxy
+        return self
+
     def build(self):
-        host = Host(self.loop)
+        self.loop = self.create_loop()
+        host = Host(self.loop, self.transport, self.max_in_flight_calls, self.freeze_gc, self.event_loop_factory,
+                    self.channel_executor_workers, self.start_event_bus_proxy)
         for service_config in self.service_configs:
             host.add_service_config(service_config)
+        for supervision_group in self.supervision_groups:
+            host.add_supervision_group(supervision_group)
         return host
 
+    def create_loop(self):
+        if self.event_loop_factory is None:
+            return self.get_or_create_loop()
+        loop = self.event_loop_factory.create_loop()
+        asyncio.set_event_loop(loop)
+        return loop
+
     def get_or_create_loop(self):
         try:
             loop = asyncio.get_event_loop()
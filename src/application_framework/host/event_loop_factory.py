@@ -0,0 +1,43 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EventLoopFactory:
+    """Creates the event loop of the host and those of the services it runs
+    in threads and processes, so they all get the same loop implementation
+    and tuning.
+
+    The implementation is given by a callable that returns a new loop, by
+    "uvloop", or by "auto" for uvloop where it is installed and the asyncio
+    loop elsewhere. The factory is pickled for process services, so a
+    callable must be importable by its name.
+    """
+    UVLOOP = "uvloop"
+    AUTO = "auto"
+
+    def __init__(self, loop_factory=None, slow_callback_duration=None, default_executor_workers=None):
+        self.loop_factory = loop_factory
+        self.slow_callback_duration = slow_callback_duration
+        self.default_executor_workers = default_executor_workers
+
+    def create_loop(self):
+        loop = self.get_loop_factory()()
+        if self.slow_callback_duration is not None:
+            # Slow callbacks are only logged in debug mode
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.slow_callback_duration
+        if self.default_executor_workers is not None:
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=self.default_executor_workers))
+        return loop
+
+    def get_loop_factory(self):
+        if self.loop_factory in [self.UVLOOP, self.AUTO]:
+            try:
+                import uvloop
+                return uvloop.new_event_loop
+            except ImportError:
+                if self.loop_factory == self.UVLOOP:
+                    raise RuntimeError("The uvloop event loop requires the uvloop package")
+                return asyncio.new_event_loop
+        return self.loop_factory or asyncio.new_event_loop
@@ -1,41 +1,158 @@
 import asyncio
+import gc
+import itertools
 import os
+import shutil
 import signal
+import tempfile
+import uuid
 
 from asyncio import CancelledError
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from multiprocessing import Manager
-from dependency_injection.container import DependencyContainer
+from concurrent.futures.process import BrokenProcessPool
 
-from application_framework.messaging.adapters.manager_queue import ManagerQueue
+from application_framework.messaging.adapters.bounded_queue import BoundedQueue
+from application_framework.messaging.adapters.coalescing_queue import CoalescingQueue
+from application_framework.messaging.adapters.priority_lane_queue import PriorityLaneQueue
+from application_framework.messaging.adapter_registry import AdapterRegistry
+from application_framework.messaging.channel_executor import ChannelExecutor
 from application_framework.messaging.channels import Channels
-from application_framework.messaging.message import Message
-from application_framework.messaging.adapters.zero_mq_queue import ZeroMQQueue
+from application_framework.messaging.event_bus import EventBus
+from application_framework.host.lifecycle_manager import LifecycleManager
+from application_framework.host.event_loop_factory import EventLoopFactory
+from application_framework.host.interpreter_runner import InterpreterRunner
+from application_framework.host.memory_usage import MemoryUsage
+from application_framework.host.prefork_pool import PreforkPool
+from application_framework.messaging.message import Message, MessageKind, SUPERVISOR_STOP_MESSAGE
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from application_framework.messaging.rpc import RpcClient
+from application_framework.messaging.transport import Transport
 from application_framework.service.cancellation_token_source import \
     CancellationTokenSource
 from application_framework.supervisor.supervisor import Supervisor
 from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service_runner import ServiceRunner
 
 
 class Host:
-    def __init__(self, loop):
+    # The target that addresses the host itself in calls
+    RPC_ADDRESS = "host"
+
+    def __init__(self, loop, transport=Transport.DEFAULT, max_in_flight_calls=64, freeze_gc=False,
+                 event_loop_factory=None, channel_executor_workers=None, start_event_bus_proxy=False):
         super().__init__()
         self.loop = loop
+        self.event_loop_factory = event_loop_factory or EventLoopFactory()
+        self.transport = transport
+        self.freeze_gc = freeze_gc
+        self.channel_executor_workers = channel_executor_workers
+        self.start_event_bus_proxy = start_event_bus_proxy
+        self.rpc_client = RpcClient(max_in_flight_calls)
+        self.event_bus = EventBus()
+        self.ipc_directory = None
         self.host_cancellation_token_source = CancellationTokenSource(True)
         self.thread_pool_executor = None
-        self.process_pool_executor = None
-        self.supervisor_tasks = []
-        self.service_tasks = []
+        # One pool per process service, so killing the worker of one
+        # service does not break the pool of another
+        self.process_pool_executors = {}
+        self.prefork_pool = None
+        self.supervisors = {}
+        self.supervisor_tasks = {}
+        self.service_tasks = {}
+        self.service_threads = {}
+        self.lifecycle_manager = LifecycleManager(self)
+        self.supervisor_listener_tasks = []
         self.channels = {}
-        self.manager = self.start_manager()
+        self.service_ids_by_name = {}
+        self.work_queues = {}
+        self.replica_cycles = {}
+        self.supervision_groups = {}
+        # The group of each service id and group name
+        self.supervision_group_of = {}
+        self.restarting_service_ids = set()
+        self.supervisor_message_handlers = {
+            MessageKind.REQUEST: self._on_request,
+            MessageKind.RESPONSE: self._on_response,
+            MessageKind.ERROR: self._on_response,
+            MessageKind.FORWARD_EVENTS: self._on_forward_events,
+        }
+        # Started when a channel first needs it
+        self.manager = None
         self.service_configs = []
         self.setup_signal_handlers()
 
     def start_manager(self):
-        return Manager()
+        return AdapterRegistry.get(AdapterRegistry.MANAGER).start_manager()
+
+    def get_manager(self):
+        if self.manager is None:
+            self.manager = self.start_manager()
+        return self.manager
 
     def add_service_config(self, service_config):
-        self.service_configs.append(service_config)
+        if service_config.execution_mode.is_separate_interpreter and not InterpreterRunner.is_supported():
+            raise RuntimeError("Running services in subinterpreters requires Python 3.13 or later")
+        if service_config.scheduling_policy is not None:
+            self.validate_scheduling_policy(service_config)
+        # Fails the build rather than the start on unsupported settings
+        self.select_adapter(service_config)
+        if service_config.replicas is None:
+            self.service_configs.append(service_config)
+            return
+        replicas = service_config.create_replicas()
+        group = replicas[0].replica_group
+        self.replica_cycles[group] = itertools.cycle([replica.service_id for replica in replicas])
+        self.service_configs.extend(replicas)
+
+    def add_supervision_group(self, group):
+        """Adds a supervision group. Its members are services added before
+        and groups added before it, given by name."""
+        if group.name in self.supervision_groups or any(c.name == group.name for c in self.service_configs):
+            raise ValueError(f"Supervision group '{group.name}' is named like another group or service")
+        for name in group.member_names:
+            if name in self.supervision_groups:
+                members = [self.supervision_groups[name]]
+                keys = [name]
+            else:
+                members = keys = [c.service_id for c in self.service_configs if name in (c.name, c.replica_group)]
+            if not members:
+                raise ValueError(f"Supervision group '{group.name}' has unknown member '{name}'")
+            for key in keys:
+                if key in self.supervision_group_of:
+                    raise ValueError(f"Member '{name}' of supervision group '{group.name}' is already a member "
+                                     f"of supervision group '{self.supervision_group_of[key].name}'")
+                self.supervision_group_of[key] = group
+            for member in members:
+                group.add_member(member)
+        self.supervision_groups[group.name] = group
+
+    def validate_scheduling_policy(self, service_config):
+        policy = service_config.scheduling_policy
+        name = service_config.name or service_config.service_id
+        if service_config.execution_mode == ExecutionMode.MAIN_EVENT_LOOP_ASYNC:
+            raise ValueError(f"Service '{name}' runs on the host's event loop and cannot have a scheduling policy")
+        if service_config.execution_mode.is_separate_interpreter and policy.io_class is not None:
+            # It is set through ctypes, which subinterpreters cannot load
+            raise ValueError(f"Service '{name}' runs in a subinterpreter and cannot have an I/O priority")
+        policy.check_supported()
+        if self.runs_on_thread_pool(service_config.execution_mode) and not policy.can_restore_nice():
+            # The pool thread would keep the nice level for the next service
+            # it runs. A process service has a pool worker of its own.
+            raise ValueError(f"Service '{name}' runs on a pool thread, which could not get its nice level back "
+                             f"without CAP_SYS_NICE or a higher RLIMIT_NICE")
+        if policy.cpu_affinity is not None and not policy.cpu_affinity <= os.sched_getaffinity(0):
+            raise ValueError(f"Service '{name}' is pinned to CPUs the host cannot run on")
+        # Checked before replicas are created, so replicas share their CPUs
+        for other in self.service_configs:
+            if other.scheduling_policy is None or not policy.overlaps(other.scheduling_policy):
+                continue
+            other_name = other.replica_group or other.name or other.service_id
+            if policy.exclusive_cpus:
+                raise ValueError(f"Service '{name}' needs its CPUs to itself, but service '{other_name}' "
+                                 f"is pinned to some of them")
+            if other.scheduling_policy.exclusive_cpus:
+                raise ValueError(f"Service '{name}' is pinned to CPUs that service '{other_name}' "
+                                 f"needs to itself")
 
     def setup_signal_handlers(self):
         self.loop.add_signal_handler(signal.SIGTERM, self.handle_signal, signal.SIGTERM)
@@ -54,18 +171,58 @@ class Host:
             1 for sc in self.service_configs
             if sc.execution_mode in [ExecutionMode.SEPARATE_THREAD,
                                      ExecutionMode.SEPARATE_THREAD_ASYNC]
+            or sc.execution_mode.is_separate_interpreter
         ])
-        process_count = sum([
-            1 for sc in self.service_configs
+        process_configs = [
+            sc for sc in self.service_configs
             if sc.execution_mode in [ExecutionMode.SEPARATE_PROCESS,
                                      ExecutionMode.SEPARATE_PROCESS_ASYNC]
-        ])
+        ]
+        preforked_configs = [sc for sc in self.service_configs if sc.execution_mode.is_preforked]
         if thread_count:
             self.thread_pool_executor = ThreadPoolExecutor(max_workers=thread_count)
-        if process_count:
-            self.process_pool_executor = ProcessPoolExecutor(max_workers=process_count)
+        if process_configs:
+            for config in process_configs:
+                self.process_pool_executors[config.service_id] = self.create_process_pool_executor()
+            if self.freeze_gc:
+                # Moves everything allocated so far out of the collector's
+                # reach, so the workers keep sharing those pages
+                gc.freeze()
+            if preforked_configs or self.freeze_gc or thread_count:
+                # Forks the workers now, before the prefork pool or thread
+                # services start threads that a fork could catch holding an
+                # import lock, or while a subinterpreter runs
+                AdapterRegistry.get(AdapterRegistry.SHARED_MEMORY).start_resource_tracker()
+                for executor in self.process_pool_executors.values():
+                    executor.submit(os.getpid)
+        if preforked_configs:
+            self.prefork_pool = PreforkPool(preforked_configs, self.freeze_gc)
+            self.prefork_pool.start()
+
+    @staticmethod
+    def create_process_pool_executor():
+        return ProcessPoolExecutor(max_workers=1, initializer=ServiceRunner.reset_signal_handling)
+
+    def get_channel_executor_workers(self):
+        """Returns the thread limit of the channel executors: the one set on
+        the host, or else the size of the loops' default executors plus a
+        thread for each receive that a supervisor keeps waiting on a Manager
+        queue, as such a receive holds its thread until a message arrives.
+        With priority lanes, a supervisor waits on both of its lanes."""
+        if self.channel_executor_workers is not None:
+            return self.channel_executor_workers
+        waiting_receives = sum(2 if config.priority_lanes else 1 for config in self.service_configs
+                               if self.select_adapter(config) == AdapterRegistry.MANAGER)
+        return (self.event_loop_factory.default_executor_workers or ChannelExecutor.DEFAULT_MAX_WORKERS) \
+            + waiting_receives
 
     def start(self):
+        # Before the pools fork, so their workers get the same limit
+        ChannelExecutor.set_default_max_workers(self.get_channel_executor_workers())
+        self.create_work_queues()
+        if any(self.select_adapter(config) == AdapterRegistry.MANAGER for config in self.service_configs):
+            # Forks the Manager process before any of the host's threads run
+            self.get_manager()
         self.create_pools()
 
         try:
@@ -77,9 +234,13 @@ class Host:
             print(f"Exception in main loop: {e}")
         finally:
             print("Main loop was finished.")
+            self.cleanup_channels()
+            self.cleanup_event_bus()
             self.cleanup_loop()
+            self.cleanup_ipc_directory()
             self.cleanup_manager()
             self.cleanup_executors()
+        self.raise_if_threads_unended()
 
     def stop(self):
         self.loop.create_task(self.stop_async())
@@ -88,45 +249,179 @@ class Host:
         self.host_cancellation_token_source.token.cancel()
 
     async def run_async(self):
-        for config in self.service_configs:
-
-            # Create communication channels
-            channels = self.create_channels()
-            self.channels[config.service_id] = channels
-
-            # Schedule supervisor
-            self.schedule_supervisor(config.service_id, channels, config.restart_strategy)
-
-            # Schedule service
-            if config.execution_mode == ExecutionMode.MAIN_EVENT_LOOP_ASYNC:
-                self.schedule_service_task_async(config, channels)
-            elif config.execution_mode == ExecutionMode.SEPARATE_THREAD:
-                self.schedule_service_task_thread(config, channels)
-            elif config.execution_mode == ExecutionMode.SEPARATE_THREAD_ASYNC:
-                self.schedule_service_task_async_thread(config, channels)
-            elif config.execution_mode == ExecutionMode.SEPARATE_PROCESS:
-                self.schedule_service_task_process(config, channels)
-            elif config.execution_mode == ExecutionMode.SEPARATE_PROCESS_ASYNC:
-                self.schedule_service_task_async_process(config, channels)
-            else:
-                raise ValueError("Invalid execution mode specified")
-
+        self.start_event_bus()
+        self.lifecycle_manager.start(self.service_configs)
         await self.host_cancellation_token_source.token.wait_cancellation_async()
         await self.cleanup_tasks()
 
-    async def cleanup_tasks(self):
-        for channel in self.channels.values():
-            await channel.host_to_supervisor.send_async(
-                Message(sender="host", content=f"stop"),
-                self.loop,
-            )
+    def launch_service(self, config):
+        """Creates the channels and supervisor of a service and schedules it."""
+        # Create communication channels
+        channels = self.create_channels(config)
+        self.channels[config.service_id] = channels
+        if config.name:
+            self.service_ids_by_name[config.name] = config.service_id
+        self.supervisor_listener_tasks.append(
+            self.loop.create_task(self.run_supervisor_listener_async(channels)))
+
+        # Schedule supervisor
+        self.schedule_supervisor(config.service_id, channels, config.restart_strategy, config.stop_timeout,
+                                 lambda: self.restart_service_async(config),
+                                 lambda: self.escalate_service_async(config))
+
+        # Schedule service
+        self.schedule_service(config, channels)
+
+    def schedule_service(self, config, channels):
+        """Schedules a service with the function for its execution mode."""
+        if config.execution_mode == ExecutionMode.MAIN_EVENT_LOOP_ASYNC:
+            self.schedule_service_task_async(config, channels)
+        elif config.execution_mode == ExecutionMode.SEPARATE_THREAD:
+            self.schedule_service_task_thread(config, channels)
+        elif config.execution_mode == ExecutionMode.SEPARATE_THREAD_ASYNC:
+            self.schedule_service_task_async_thread(config, channels)
+        elif config.execution_mode == ExecutionMode.SEPARATE_PROCESS:
+            self.schedule_service_task_process(config, channels)
+        elif config.execution_mode == ExecutionMode.SEPARATE_PROCESS_ASYNC:
+            self.schedule_service_task_async_process(config, channels)
+        elif config.execution_mode == ExecutionMode.PREFORKED_PROCESS:
+            self.schedule_service_task_preforked_process(config, channels)
+        elif config.execution_mode == ExecutionMode.PREFORKED_PROCESS_ASYNC:
+            self.schedule_service_task_async_preforked_process(config, channels)
+        elif config.execution_mode.is_separate_interpreter:
+            self.schedule_service_task_interpreter(config, channels)
+        else:
+            raise ValueError("Invalid execution mode specified")
+        task = self.service_tasks[config.service_id]
+        task.add_done_callback(lambda t: self.on_service_task_done(config.service_id, t))
+
+    def on_service_task_done(self, service_id, task):
+        # A service that raised has reported the crash itself, but one whose
+        # process was killed could not
+        if task is not self.service_tasks.get(service_id) or service_id in self.restarting_service_ids \
+                or task.cancelled() or task.exception() is None:
+            return
+        self.supervisors[service_id].on_service_failed(task.exception())
+
+    async def restart_service_async(self, config):
+        """Restarts a crashed service, along with the members of its
+        supervision group that the group's strategy restarts with it."""
+        if config.service_id in self.restarting_service_ids:
+            # Already being restarted with another member of its group
+            return
+        group = self.supervision_group_of.get(config.service_id)
+        if group is None:
+            await self.restart_services_async([config.service_id])
+        else:
+            await self.restart_group_member_async(group, config.service_id)
+
+    async def escalate_service_async(self, config):
+        """Called when a service crashed too often to be restarted by its
+        supervisor."""
+        group = self.supervision_group_of.get(config.service_id)
+        if group is None:
+            self.stop_on_escalation(f"Service {config.name or config.service_id}")
+        else:
+            await self.restart_group_member_async(group, config.service_id, is_escalation=True)
+
+    async def restart_group_member_async(self, group, member, is_escalation=False):
+        if not group.restart_intensity.record(self.loop.time()):
+            print(f"[Host] Supervision group '{group.name}' crashed again after {group.restart_intensity}, escalating")
+            if group.parent is None:
+                self.stop_on_escalation(f"Supervision group '{group.name}'")
+            else:
+                await self.restart_group_member_async(group.parent, group, is_escalation=True)
+            return
+        members = group.members_to_restart(member)
+        service_ids = group.get_service_ids(members)
+        if is_escalation:
+            # The escalated member starts over, as do the groups restarted with it
+            group.reset(members)
+            for service_id in group.get_service_ids([member]):
+                self.supervisors[service_id].restart_intensity.reset()
+        if len(service_ids) > 1:
+            print(f"[Host] Supervision group '{group.name}' restarts {len(service_ids)} service(s)")
+        await self.restart_services_async(service_ids)
+
+    def stop_on_escalation(self, crashed):
+        print(f"[Host] {crashed} kept crashing and has no supervision group to escalate to, stopping host")
+        self.stop()
+
+    async def restart_services_async(self, service_ids):
+        """Ends the services in reverse order, then schedules them again in
+        order, each on new channels to and from its supervisor."""
+        # Members still waiting for their dependencies are left to launch
+        configs = [config for service_id in service_ids for config in self.service_configs
+                   if config.service_id == service_id and service_id in self.supervisors]
+        self.restarting_service_ids.update(service_ids)
+        try:
+            for config in reversed(configs):
+                await self.stop_service_for_restart_async(config)
+            for config in configs:
+                await self.reschedule_service_async(config)
+        finally:
+            self.restarting_service_ids.difference_update(service_ids)
+
+    async def reschedule_service_async(self, config):
+        """Schedules a service again, on new channels to and from its
+        supervisor."""
+        old_channels = self.channels[config.service_id]
+        # Not reused, as a killed service may have left a message half written
+        supervisor_to_service, service_to_supervisor = self.create_service_queues(config)
+        channels = Channels(
+            old_channels.host_to_supervisor, old_channels.supervisor_to_host,
+            supervisor_to_service, service_to_supervisor,
+            self.event_bus, self.work_queues
+        )
+        self.channels[config.service_id] = channels
+        await self.supervisors[config.service_id].set_channels_async(channels)
+        for queue in [old_channels.supervisor_to_service, old_channels.service_to_supervisor]:
+            try:
+                queue.close()
+            except Exception as e:
+                print(f"Error during channel cleanup: {e}")
+        try:
+            self.schedule_service(config, channels)
+        except BrokenProcessPool:
+            self.replace_broken_pool(config)
+            self.schedule_service(config, channels)
+
+    async def stop_service_for_restart_async(self, config):
+        """Ends a service that is still running, such as one that reported a
+        crash itself and kept going, or a member of its supervision group."""
+        task = self.service_tasks[config.service_id]
+        if task.done():
+            return
+        await self.channels[config.service_id].supervisor_to_service.send_async(SUPERVISOR_STOP_MESSAGE, self.loop)
+        await asyncio.wait([task], timeout=config.stop_timeout)
+        if not task.done():
+            try:
+                self.lifecycle_manager.force_stop(config)
+            except Exception as e:
+                print(f"[Host] Could not end service {config.name or config.service_id}: {e}")
+            await asyncio.wait([task], timeout=LifecycleManager.FORCED_STOP_GRACE)
+        if not task.done():
+            print(f"[Host] Service {config.name or config.service_id} could not be ended, restarting it anyway")
+
+    def replace_broken_pool(self, config):
+        """Replaces the process pool of a service that a killed worker broke.
+        Each process service has a pool of its own, so no other service is
+        affected."""
+        print(f"[Host] Replacing the process pool of service {config.name or config.service_id}")
+        if config.execution_mode.is_preforked:
+            self.prefork_pool.restart(config.service_id)
+        else:
+            self.process_pool_executors[config.service_id].shutdown(wait=False)
+            self.process_pool_executors[config.service_id] = self.create_process_pool_executor()
 
-        results = await asyncio.gather(
-            *(self.supervisor_tasks + self.service_tasks),
-            return_exceptions=True)
+    async def cleanup_tasks(self):
+        results = await self.lifecycle_manager.stop_async()
 
         print("[Host] All tasks have finished.")
 
+        for task in self.supervisor_listener_tasks:
+            task.cancel()
+
         for result in results:
             if isinstance(result, CancelledError):
                 print("Task was cancelled.")
@@ -135,12 +430,149 @@ class Host:
 
         self.loop.stop()
 
+    async def call_async(self, target, method, payload=None, timeout=None):
+        """Calls a method registered by the target service, given by id or
+        name, and returns its result. Raises RpcError if the call failed and
+        asyncio.TimeoutError if no response arrived within timeout seconds."""
+        channels = self.find_channels(target)
+        if channels is None:
+            raise ValueError(f"Unknown service: {target}")
+        return await self.rpc_client.call_async(
+            channels.host_to_supervisor, self.loop, self.RPC_ADDRESS, target, method, payload, timeout)
+
+    def publish(self, topic, payload=None):
+        """Publishes an event to the subscribers of topic in all services."""
+        self.event_bus.publish(topic, payload, self.RPC_ADDRESS)
+
+    def subscribe(self, topic, handler):
+        """Calls handler with each event message published to topic, on the
+        host loop."""
+        self.event_bus.subscribe(topic, handler, self.loop)
+
+    def start_event_bus(self):
+        """Enables forwarding events between processes if any service runs
+        in a separate process. The proxy starts when the bus is first used,
+        or right away if the host is set to."""
+        if not any(sc.execution_mode.is_separate_process for sc in self.service_configs):
+            return
+        self.event_bus.enable_forwarding(self.get_ipc_directory())
+        if self.start_event_bus_proxy:
+            self.event_bus.start_proxy()
+
+    async def submit_work_async(self, name, payload=None):
+        """Puts an item on the work queue of a replicated service, for one of
+        its replicas to take."""
+        work_queue = self.work_queues.get(name)
+        if work_queue is None:
+            raise ValueError(f"Unknown replicated service: {name}")
+        await work_queue.send_async(Message(sender=self.RPC_ADDRESS, content=payload, target=name), self.loop)
+
+    def print_memory_report(self):
+        """Prints how much of the memory of each process service is shared
+        and how much is private to it."""
+        for config in self.service_configs:
+            supervisor = self.supervisors.get(config.service_id)
+            if not config.execution_mode.is_separate_process or supervisor is None or supervisor.service_pid is None:
+                continue
+            usage = MemoryUsage.read(supervisor.service_pid)
+            if usage is None:
+                print("[Host] Memory usage is not available on this system")
+                return
+            print(f"[Host] Memory of {config.name or config.service_id}: {usage}")
+
+    def print_channel_executor_report(self):
+        """Prints how many threads the host's channel executor runs for
+        blocking channel calls, and how many of them are busy."""
+        usage = ChannelExecutor.get_instance().usage()
+        if usage.calls:
+            print(f"[Host] Channel executor: {usage}")
+
+    def find_channels(self, target):
+        """Returns the channels of a service given by id or name. A replicated
+        service's name gives its replicas in turn."""
+        channels = self.channels.get(target)
+        if channels is None and target in self.replica_cycles:
+            channels = self.channels.get(next(self.replica_cycles[target]))
+        if channels is None:
+            channels = self.channels.get(self.service_ids_by_name.get(target))
+        return channels
+
+    async def run_supervisor_listener_async(self, channels):
+        """Receives the calls and responses of a supervisor's service and
+        routes them by target."""
+        while True:
+            try:
+                message = await channels.supervisor_to_host.receive_async(self.loop)
+                if message is None:
+                    continue
+                handler = self.supervisor_message_handlers.get(message.kind)
+                if handler is None:
+                    print(f"[Host] Unsupported message received, dropping: {message}")
+                else:
+                    await handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A call that cannot be routed must not end the routing of
+                # the others
+                print(f"[Host] Failed to handle message from supervisor: {e!r}")
+
+    async def _on_request(self, message):
+        if message.target == self.RPC_ADDRESS:
+            await self._reply_error(message, "The host has no RPC methods")
+            return
+        channels = self.find_channels(message.target)
+        if channels is None:
+            await self._reply_error(message, f"Unknown service: {message.target}")
+        else:
+            await channels.host_to_supervisor.send_async(message, self.loop)
+
+    async def _on_response(self, message):
+        if message.target == self.RPC_ADDRESS:
+            self.rpc_client.resolve(message)
+            return
+        channels = self.find_channels(message.target)
+        if channels is None:
+            print(f"[Host] Response for unknown service, dropping: {message}")
+        else:
+            await channels.host_to_supervisor.send_async(message, self.loop)
+
+    async def _on_forward_events(self, message):
+        self.event_bus.start_proxy()
+
+    async def _reply_error(self, request, error):
+        channels = self.find_channels(request.sender)
+        if channels is not None:
+            await channels.host_to_supervisor.send_async(
+                RpcClient.create_error(request, self.RPC_ADDRESS, error), self.loop)
+
     def cleanup_loop(self):
         if not self.loop.is_closed():
             self.loop.run_until_complete(self.loop.shutdown_asyncgens())
             self.loop.close()
 
+    def cleanup_channels(self):
+        for channels in self.channels.values():
+            for queue in [channels.host_to_supervisor, channels.supervisor_to_host,
+                          channels.supervisor_to_service, channels.service_to_supervisor]:
+                try:
+                    queue.close()
+                except Exception as e:
+                    print(f"Error during channel cleanup: {e}")
+
+    def cleanup_event_bus(self):
+        try:
+            self.event_bus.close()
+        except Exception as e:
+            print(f"Error during event bus cleanup: {e}")
+
+    def cleanup_ipc_directory(self):
+        if self.ipc_directory:
+            shutil.rmtree(self.ipc_directory, ignore_errors=True)
+
     def cleanup_manager(self):
+        if self.manager is None:
+            return
         try:
             self.manager.shutdown()
             print("Manager and all related processes have been properly shut down.")
@@ -148,98 +580,233 @@ class Host:
             print(f"Error during manager shutdown: {e}")
 
     def cleanup_executors(self):
+        # A pool running a service that could not be ended would be waited
+        # for forever
+        unended_configs = self.get_unended_service_configs()
+        unended_service_ids = {config.service_id for config in unended_configs}
         if self.thread_pool_executor:
-            self.thread_pool_executor.shutdown(wait=True)
-        if self.process_pool_executor:
-            self.process_pool_executor.shutdown(wait=True)
-
-    def create_queue(self):
-        queue = self.manager.Queue()
-        return ManagerQueue(queue)
-        # return ZeroMQQueue(self.loop, "tcp://127.0.0.1:5555")
-
-    def create_channels(self):
-        host_to_supervisor = self.create_queue()
-        supervisor_to_host = self.create_queue()
-        supervisor_to_service = self.create_queue()
-        service_to_supervisor = self.create_queue()
+            self.thread_pool_executor.shutdown(
+                wait=not any(self.runs_on_thread_pool(config.execution_mode) for config in unended_configs))
+        executors = dict(self.process_pool_executors)
+        if self.prefork_pool:
+            executors.update(self.prefork_pool.executors)
+        for service_id, executor in executors.items():
+            is_unended = service_id in unended_service_ids
+            if is_unended:
+                self.kill_pool_workers(executor)
+            executor.shutdown(wait=not is_unended)
+        self.print_channel_executor_report()
+        # Its threads may still be blocked on channels nobody sends on. The
+        # next host in this process gets a new executor.
+        ChannelExecutor.get_instance().shutdown(wait=False)
+
+    def raise_if_threads_unended(self):
+        """Raises a RuntimeError if a service thread could not be ended. The
+        interpreter would wait for such a thread forever when exiting, so the
+        caller should end the process with ``os._exit()``."""
+        configs = [config for config in self.get_unended_service_configs()
+                   if self.runs_on_thread_pool(config.execution_mode)]
+        if not configs:
+            return
+        names = ", ".join(config.name or str(config.service_id) for config in configs)
+        raise RuntimeError(f"The threads of services {names} could not be ended")
+
+    def get_unended_service_configs(self):
+        """Returns the configs of the services still running after the host
+        gave up waiting for them."""
+        return [config for config in self.service_configs
+                if config.service_id in self.service_tasks and not self.service_tasks[config.service_id].done()]
+
+    @staticmethod
+    def runs_on_thread_pool(execution_mode):
+        return execution_mode in [ExecutionMode.SEPARATE_THREAD, ExecutionMode.SEPARATE_THREAD_ASYNC] \
+            or execution_mode.is_separate_interpreter
+
+    def get_pool_executor(self, config):
+        """Returns the process pool that a process service runs on."""
+        if config.execution_mode.is_preforked:
+            return self.prefork_pool.executors[config.service_id]
+        return self.process_pool_executors[config.service_id]
+
+    @staticmethod
+    def kill_pool_workers(executor):
+        """Kills the worker processes of a process pool."""
+        # The pool has no public way to end its workers
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            try:
+                process.kill()
+            except Exception as e:
+                print(f"[Host] Could not kill worker process {process.pid}: {e}")
+
+    def create_queue(self, codec=None):
+        return AdapterRegistry.get(AdapterRegistry.MANAGER).create(self.get_manager(), codec)
+
+    def create_work_queues(self):
+        """Creates the queue that the replicas of each replicated service
+        compete for the items of."""
+        # Only a Manager queue reaches services in other processes
+        is_shared_with_processes = any(config.execution_mode.is_separate_process for config in self.service_configs)
+        for config in self.service_configs:
+            if config.replica_group is None or config.replica_group in self.work_queues:
+                continue
+            if is_shared_with_processes:
+                self.work_queues[config.replica_group] = self.create_queue(config.codec)
+            else:
+                self.work_queues[config.replica_group] = self.create_thread_queue(config.codec)
+
+    def get_ipc_directory(self):
+        if not self.ipc_directory:
+            self.ipc_directory = tempfile.mkdtemp(prefix="application_framework_")
+        return self.ipc_directory
+
+    def create_zero_mq_queue(self, execution_mode, codec=None):
+        if execution_mode.is_separate_process:
+            address = f"ipc://{os.path.join(self.get_ipc_directory(), uuid.uuid4().hex)}"
+        else:
+            address = f"inproc://{uuid.uuid4().hex}"
+        return AdapterRegistry.get(AdapterRegistry.ZERO_MQ)(address, codec)
+
+    def create_shared_memory_queue(self, codec=None):
+        return AdapterRegistry.get(AdapterRegistry.SHARED_MEMORY)(codec=codec)
+
+    def create_socket_pair_queues(self, codec=None):
+        return AdapterRegistry.get(AdapterRegistry.SOCKET_PAIR).create_pair(codec)
+
+    def create_thread_queue(self, codec=None):
+        return AdapterRegistry.get(AdapterRegistry.THREAD)(codec)
+
+    def create_in_loop_queue(self, codec=None):
+        return AdapterRegistry.get(AdapterRegistry.IN_LOOP)(codec)
+
+    def create_channels(self, service_config):
+        # The host and the supervisors always share the host loop
+        host_to_supervisor = self.create_in_loop_queue()
+        supervisor_to_host = self.create_in_loop_queue()
+        supervisor_to_service, service_to_supervisor = self.create_service_queues(service_config)
         return Channels(
             host_to_supervisor, supervisor_to_host,
-            supervisor_to_service, service_to_supervisor
+            supervisor_to_service, service_to_supervisor,
+            self.event_bus, self.work_queues
         )
 
+    def create_service_queues(self, service_config):
+        """Creates the queues to and from a service, with the bounding,
+        coalescing and priority lanes the service is configured with."""
+        if service_config.execution_mode.is_separate_interpreter:
+            if service_config.overflow_policy or service_config.coalescing_window or service_config.priority_lanes:
+                raise ValueError("Overflow policies, coalescing and priority lanes are not supported "
+                                 "for services in subinterpreters")
+            # Only a file descriptor can be handed to an interpreter
+            return self.create_socket_pair_queues(service_config.codec)
+        to_service, to_supervisor = self.create_transport_queues(service_config)
+        control_to_service = control_to_supervisor = None
+        if service_config.priority_lanes:
+            control_to_service, control_to_supervisor = self.create_transport_queues(service_config)
+        return (self.wrap_service_queue(service_config, to_service, control_to_service),
+                self.wrap_service_queue(service_config, to_supervisor, control_to_supervisor))
+
+    def wrap_service_queue(self, service_config, queue, control_queue):
+        if service_config.overflow_policy:
+            queue = BoundedQueue(queue, service_config.overflow_policy)
+        if service_config.coalescing_window:
+            queue = CoalescingQueue(queue, service_config.coalescing_window)
+        if control_queue is not None:
+            queue = PriorityLaneQueue(control_queue, queue, service_config.max_control_burst)
+        return queue
+
+    def select_adapter(self, service_config):
+        """Returns the name of the queue adapter that the channels between a
+        service and its supervisor use, given its execution mode and the
+        host's transport."""
+        execution_mode = service_config.execution_mode
+        overflow_policy = service_config.overflow_policy
+
+        if execution_mode == ExecutionMode.MAIN_EVENT_LOOP_ASYNC:
+            return AdapterRegistry.IN_LOOP
+        elif execution_mode.is_separate_interpreter:
+            return AdapterRegistry.SOCKET_PAIR
+        elif self.transport == Transport.SOCKET_PAIR:
+            if overflow_policy:
+                raise ValueError("Overflow policies are not supported on the socket pair transport")
+            return AdapterRegistry.SOCKET_PAIR
+        elif self.transport == Transport.ZERO_MQ:
+            if overflow_policy:
+                raise ValueError("Overflow policies are not supported on the ZeroMQ transport")
+            return AdapterRegistry.ZERO_MQ
+        elif execution_mode in [ExecutionMode.SEPARATE_THREAD, ExecutionMode.SEPARATE_THREAD_ASYNC]:
+            # The service shares the host's process, so its messages need
+            # not pass through the Manager process
+            return AdapterRegistry.THREAD
+        elif execution_mode.is_separate_process \
+                and AdapterRegistry.get(AdapterRegistry.SHARED_MEMORY).is_supported() \
+                and not (overflow_policy and overflow_policy.policy == OverflowPolicy.DROP_OLDEST):
+            # Dropping the oldest messages needs a queue the sender can also
+            # receive from, which the single-consumer ring is not
+            return AdapterRegistry.SHARED_MEMORY
+        else:
+            return AdapterRegistry.MANAGER
+
+    def create_transport_queues(self, service_config):
+        """Returns the transport queues to and from a service."""
+        adapter = self.select_adapter(service_config)
+        if adapter == AdapterRegistry.SOCKET_PAIR:
+            # Both directions share one duplex pair
+            return self.create_socket_pair_queues(service_config.codec)
+        return self.create_transport_queue(service_config, adapter), self.create_transport_queue(service_config, adapter)
+
+    def create_transport_queue(self, service_config, adapter):
+        codec = service_config.codec
+        if adapter == AdapterRegistry.IN_LOOP:
+            return self.create_in_loop_queue(codec)
+        elif adapter == AdapterRegistry.ZERO_MQ:
+            return self.create_zero_mq_queue(service_config.execution_mode, codec)
+        elif adapter == AdapterRegistry.THREAD:
+            return self.create_thread_queue(codec)
+        elif adapter == AdapterRegistry.SHARED_MEMORY:
+            return self.create_shared_memory_queue(codec)
+        else:
+            return self.create_queue(codec)
+
     # Schedule Tasks
 
-    def schedule_supervisor(self, service_id, channels, restart_strategy):
+    def schedule_supervisor(self, service_id, channels, restart_strategy, stop_timeout=None, restart_callback=None,
+                            escalation_callback=None):
         cancellation_token_source = CancellationTokenSource(True)
         cancellation_token = cancellation_token_source.token
-        supervisor = Supervisor(self.loop, service_id, channels, restart_strategy)
+        supervisor = Supervisor(self.loop, service_id, channels, restart_strategy, stop_timeout, restart_callback,
+                                escalation_callback)
         task = self.loop.create_task(supervisor.start_async(cancellation_token))
-        self.supervisor_tasks.append(task)
+        self.supervisors[service_id] = supervisor
+        self.supervisor_tasks[service_id] = task
 
     def schedule_service_task_async(self, service_config, channels):
-        task = self.loop.create_task(Host.start_service_async(service_config, channels, self.loop))
-        self.service_tasks.append(task)
+        task = self.loop.create_task(ServiceRunner.start_service_async(service_config, channels, self.loop))
+        self.service_tasks[service_config.service_id] = task
 
     def schedule_service_task_thread(self, service_config, channels):
-        task = self.loop.run_in_executor(self.thread_pool_executor, Host.start_service, service_config, channels)
-        self.service_tasks.append(task)
+        task = self.loop.run_in_executor(self.thread_pool_executor, ServiceRunner.start_service, service_config, channels.for_service(), self.service_threads)
+        self.service_tasks[service_config.service_id] = task
 
     def schedule_service_task_async_thread(self, service_config, channels):
-        task = self.loop.run_in_executor(self.thread_pool_executor, Host.run_service_async_thread, service_config, channels)
-        self.service_tasks.append(task)
+        task = self.loop.run_in_executor(self.thread_pool_executor, ServiceRunner.run_service_async_thread, service_config, channels.for_service(), self.service_threads, self.event_loop_factory)
+        self.service_tasks[service_config.service_id] = task
 
     def schedule_service_task_process(self, service_config, channels):
-        task = self.loop.run_in_executor(self.process_pool_executor, Host.start_service, service_config, channels)
-        self.service_tasks.append(task)
+        task = self.loop.run_in_executor(self.process_pool_executors[service_config.service_id], ServiceRunner.start_service_process, service_config, channels.for_service())
+        self.service_tasks[service_config.service_id] = task
 
     def schedule_service_task_async_process(self, service_config, channels):
-        task = self.loop.run_in_executor(self.process_pool_executor, Host.run_service_async_process, service_config, channels)
-        self.service_tasks.append(task)
+        task = self.loop.run_in_executor(self.process_pool_executors[service_config.service_id], ServiceRunner.run_service_async_process, service_config, channels.for_service(), self.event_loop_factory)
+        self.service_tasks[service_config.service_id] = task
 
-    @staticmethod
-    def start_service(service_config, channels):
-        try:
-            cancellation_token_source = CancellationTokenSource(False)
-            cancellation_token = cancellation_token_source.token
-            container = DependencyContainer.get_instance(name=service_config.service_id)
-            container.deserialize_state(service_config.serialized_state)
-            service_instance = container.resolve(service_config.service_class)
-            service_instance.set_service_id(service_config.service_id)
-            service_instance.set_channels(channels)
-            service_instance.start(cancellation_token)
-        except Exception as e:
-            print(f"Error in start_service: {e}")
+    def schedule_service_task_preforked_process(self, service_config, channels):
+        task = self.loop.run_in_executor(self.prefork_pool.executors[service_config.service_id], ServiceRunner.start_service_process, service_config, channels.for_service())
+        self.service_tasks[service_config.service_id] = task
 
-    @staticmethod
-    async def start_service_async(service_config, channels, loop):
-        try:
-            cancellation_token_source = CancellationTokenSource(True)
-            cancellation_token = cancellation_token_source.token
-            container = DependencyContainer.get_instance(name=service_config.service_id)
-            container.deserialize_state(service_config.serialized_state)
-            service_instance = container.resolve(service_config.service_class)
-            service_instance.set_loop(loop)
-            service_instance.set_service_id(service_config.service_id)
-            service_instance.set_channels(channels)
-            await service_instance.start_async(cancellation_token)
-        except Exception as e:
-            print(f"Error in start_service_async: {e}")
+    def schedule_service_task_async_preforked_process(self, service_config, channels):
+        task = self.loop.run_in_executor(self.prefork_pool.executors[service_config.service_id], ServiceRunner.run_service_async_process, service_config, channels.for_service(), self.event_loop_factory)
+        self.service_tasks[service_config.service_id] = task
 
-    @staticmethod
-    def run_service_async_thread(service_config, channels):
-        try:
-            thread_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(thread_loop)
-            thread_loop.run_until_complete(Host.start_service_async(service_config, channels, thread_loop))
-        except Exception as e:
-            print(f"Error in run_service_async_thread: {e}")
-
-    @staticmethod
-    def run_service_async_process(service_config, channels):
-        try:
-            process_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(process_loop)
-            process_loop.run_until_complete(Host.start_service_async(service_config, channels, process_loop))
-        except Exception as e:
-            print(f"Error in run_service_async_process: {e}")
+    def schedule_service_task_interpreter(self, service_config, channels):
+        task = self.loop.run_in_executor(self.thread_pool_executor, InterpreterRunner.run_service, service_config, channels.for_service())
+        self.service_tasks[service_config.service_id] = task
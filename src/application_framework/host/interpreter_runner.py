@@ -0,0 +1,72 @@
+import pickle
+import sys
+
+from application_framework.messaging.adapters.socket_pair_queue import SocketPairQueue
+from application_framework.messaging.channels import Channels
+from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service_runner import ServiceRunner
+
+try:
+    # Before 3.12 subinterpreters share the host's GIL, and on 3.12 the
+    # process can abort at exit once a service ran in one
+    if sys.version_info >= (3, 13):
+        import _interpreters as interpreters
+    else:
+        interpreters = None
+except ImportError:
+    interpreters = None
+
+
+class InterpreterRunner:
+    """Runs services in subinterpreters, each with its own GIL.
+
+    An interpreter shares the host's process but none of its objects. The
+    service's config crosses into it pickled, and its channels as the file
+    descriptor of the service's end of a socket pair, which the interpreter
+    opens a socket on. The interpreter runs on the host thread that called
+    run_service(), and that thread holds the interpreter's GIL rather than
+    the host's while the service runs.
+    """
+    SCRIPT = (
+        "import sys\n"
+        "sys.path[:] = sys_path.split('\\0')\n"
+        "from application_framework.host.interpreter_runner import InterpreterRunner\n"
+        "InterpreterRunner.run_in_interpreter(serialized_config, service_fileno)\n"
+    )
+
+    @staticmethod
+    def is_supported():
+        return interpreters is not None
+
+    @staticmethod
+    def run_service(service_config, channels):
+        """Runs the service in a new interpreter until it finishes."""
+        interpreter_id = interpreters.create()
+        try:
+            error = interpreters.run_string(interpreter_id, InterpreterRunner.SCRIPT, {
+                "sys_path": "\0".join(sys.path),
+                "serialized_config": pickle.dumps(service_config),
+                "service_fileno": channels.supervisor_to_service.receive_socket.fileno(),
+            })
+            # An uncaught exception is returned rather than raised
+            if error is not None:
+                print(f"Error in run_service: {error}")
+        except Exception as e:
+            print(f"Error in run_service: {e}")
+        finally:
+            interpreters.destroy(interpreter_id)
+
+    @staticmethod
+    def run_in_interpreter(serialized_config, service_fileno):
+        service_config = pickle.loads(serialized_config)
+        # Each interpreter has its own collector
+        ServiceRunner.configure_gc(service_config)
+        to_service, to_supervisor = SocketPairQueue.attach_service_side(service_fileno, service_config.codec)
+        channels = Channels(None, None, to_service, to_supervisor)
+        if service_config.execution_mode == ExecutionMode.SEPARATE_INTERPRETER_ASYNC:
+            ServiceRunner.run_service_async_thread(service_config, channels)
+        else:
+            try:
+                ServiceRunner.start_service(service_config, channels)
+            finally:
+                to_service.close()
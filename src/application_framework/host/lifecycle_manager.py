@@ -0,0 +1,196 @@
+import asyncio
+import ctypes
+import os
+import signal
+
+from application_framework.messaging.message import HOST_STOP_MESSAGE
+from application_framework.service.execution_mode import ExecutionMode
+
+
+class LifecycleManager:
+    """Starts and stops the services of a host concurrently.
+
+    A service is started once the services it depends on have reported that
+    they started, and is stopped once the services depending on it have
+    stopped. Each service gets its stop timeout to stop gracefully. Services
+    still running after that are ended forcibly: async services have their
+    tasks cancelled, sync thread services get SystemExit raised in their
+    thread and process services have their process killed, or the worker of
+    their pool if they never reported their process. Threads blocked
+    outside Python code cannot be ended. The host does not wait for such
+    services when it shuts down its pools, and raises from ``start()`` once
+    it has cleaned up if a thread is left running.
+    """
+    # Seconds to wait for forcibly ended services to finish
+    FORCED_STOP_GRACE = 1.0
+
+    def __init__(self, host):
+        self.host = host
+        self.loop = host.loop
+        self.service_configs = {}
+        self.started_events = {}
+        self.start_task = None
+        self.timings = {}
+
+    def start(self, service_configs):
+        """Starts the services in the background and returns immediately."""
+        self.service_configs = {config.service_id: config for config in service_configs}
+        self.validate_dependencies()
+        self.started_events = {service_id: asyncio.Event() for service_id in self.service_configs}
+        self.timings = {service_id: {} for service_id in self.service_configs}
+        self.start_task = self.loop.create_task(self.start_async())
+
+    async def start_async(self):
+        started_at = self.loop.time()
+        try:
+            await asyncio.gather(*(self._start_service_async(config) for config in self.service_configs.values()))
+        except Exception as e:
+            print(f"[LifecycleManager] Failed to start services, stopping host: {e}")
+            self.host.stop()
+            return
+        self.print_report("Started", "started", self.loop.time() - started_at)
+        self.host.print_memory_report()
+        self.host.print_channel_executor_report()
+
+    async def stop_async(self):
+        """Stops the services and returns the results of the supervisor and
+        service tasks that finished."""
+        if self.start_task is not None and not self.start_task.done():
+            self.start_task.cancel()
+        stopped_at = self.loop.time()
+        launched = [config for config in self.service_configs.values() if config.service_id in self.host.supervisors]
+        stop_tasks = {}
+        for config in launched:
+            stop_tasks[config.service_id] = self.loop.create_task(self._stop_service_async(config, stop_tasks))
+        if stop_tasks:
+            await asyncio.wait(list(stop_tasks.values()))
+        await self._force_stop_async([config for config in launched if not self._is_finished(config.service_id)])
+        self.print_report("Stopped", "stopped", self.loop.time() - stopped_at)
+        # The tasks of services that could not be ended would never finish
+        finished_tasks = [task for task in self._tasks_of(launched) if task.done()]
+        return await asyncio.gather(*finished_tasks, return_exceptions=True)
+
+    def validate_dependencies(self):
+        for config in self.service_configs.values():
+            for name in config.dependencies:
+                if not any(self._is_named(c, name) for c in self.service_configs.values()):
+                    raise ValueError(f"Service '{config.name}' depends on unknown service '{name}'")
+        # Depth-first search for cycles
+        visiting, visited = set(), set()
+
+        def visit(config):
+            if config.service_id in visiting:
+                raise ValueError(f"Dependency cycle through service '{config.name}'")
+            if config.service_id in visited:
+                return
+            visiting.add(config.service_id)
+            for dependency in self.dependencies_of(config):
+                visit(dependency)
+            visiting.remove(config.service_id)
+            visited.add(config.service_id)
+
+        for config in self.service_configs.values():
+            visit(config)
+
+    def dependencies_of(self, config):
+        return [c for c in self.service_configs.values() if any(self._is_named(c, name) for name in config.dependencies)]
+
+    def dependents_of(self, config):
+        return [c for c in self.service_configs.values() if any(self._is_named(config, name) for name in c.dependencies)]
+
+    @staticmethod
+    def _is_named(config, name):
+        # Depending on a replicated service means depending on all replicas
+        return name is not None and name in (config.name, config.replica_group)
+
+    def print_report(self, action, key, total):
+        print(f"[LifecycleManager] {action} {len(self.service_configs)} service(s) in {total:.3f}s")
+        for service_id, config in self.service_configs.items():
+            timing = self.timings[service_id]
+            if key not in timing:
+                outcome = "not " + key
+            elif timing.get("forced"):
+                outcome = f"forcibly {key} after {timing[key]:.3f}s"
+            else:
+                outcome = f"{key} in {timing[key]:.3f}s"
+            print(f"[LifecycleManager]   {config.name or service_id}: {outcome}")
+
+    async def _start_service_async(self, config):
+        for dependency in self.dependencies_of(config):
+            await self.started_events[dependency.service_id].wait()
+        launched_at = self.loop.time()
+        self.host.launch_service(config)
+        await self.host.supervisors[config.service_id].started_event.wait()
+        self.timings[config.service_id]["started"] = self.loop.time() - launched_at
+        self.started_events[config.service_id].set()
+
+    async def _stop_service_async(self, config, stop_tasks):
+        dependents = [stop_tasks[c.service_id] for c in self.dependents_of(config) if c.service_id in stop_tasks]
+        if dependents:
+            await asyncio.wait(dependents)
+        stop_requested_at = self.loop.time()
+        await self.host.channels[config.service_id].host_to_supervisor.send_async(HOST_STOP_MESSAGE, self.loop)
+        await asyncio.wait(self._tasks_of([config]), timeout=config.stop_timeout)
+        if self._is_finished(config.service_id):
+            self.timings[config.service_id]["stopped"] = self.loop.time() - stop_requested_at
+        else:
+            print(f"[LifecycleManager] Service {config.name or config.service_id} did not stop "
+                  f"within {config.stop_timeout} seconds")
+            self.timings[config.service_id]["stop_requested_at"] = stop_requested_at
+
+    async def _force_stop_async(self, configs):
+        for config in configs:
+            self.timings[config.service_id]["forced"] = True
+            try:
+                self.force_stop(config)
+            except Exception as e:
+                print(f"[LifecycleManager] Could not end service {config.name or config.service_id}: {e}")
+            # The supervisor may still be waiting for the service to report
+            self.host.supervisor_tasks[config.service_id].cancel()
+        if configs:
+            await asyncio.wait(self._tasks_of(configs), timeout=self.FORCED_STOP_GRACE)
+        for config in configs:
+            timing = self.timings[config.service_id]
+            if self._is_finished(config.service_id):
+                timing["stopped"] = self.loop.time() - timing["stop_requested_at"]
+            else:
+                print(f"[LifecycleManager] Service {config.name or config.service_id} could not be ended")
+
+    def force_stop(self, config):
+        """Ends a service that will not stop, as far as its execution mode allows."""
+        execution_mode = config.execution_mode
+        if execution_mode == ExecutionMode.MAIN_EVENT_LOOP_ASYNC:
+            self.host.service_tasks[config.service_id].cancel()
+        elif execution_mode == ExecutionMode.SEPARATE_THREAD_ASYNC:
+            _, loop = self.host.service_threads[config.service_id]
+            loop.call_soon_threadsafe(self._cancel_all_tasks, loop)
+        elif execution_mode == ExecutionMode.SEPARATE_THREAD:
+            thread_id, _ = self.host.service_threads[config.service_id]
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(SystemExit))
+        elif execution_mode.is_separate_interpreter:
+            raise RuntimeError("services in subinterpreters cannot be ended forcibly")
+        else:
+            pid = self.host.supervisors[config.service_id].service_pid
+            if pid is None:
+                # The pool runs only this service
+                print(f"[LifecycleManager] Service {config.name or config.service_id} has not reported its "
+                      f"process, killing the worker of its pool")
+                self.host.kill_pool_workers(self.host.get_pool_executor(config))
+                return
+            # A hung service may ignore or block SIGTERM
+            os.kill(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _cancel_all_tasks(loop):
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+
+    def _tasks_of(self, configs):
+        tasks = []
+        for config in configs:
+            tasks.append(self.host.supervisor_tasks[config.service_id])
+            tasks.append(self.host.service_tasks[config.service_id])
+        return tasks
+
+    def _is_finished(self, service_id):
+        return self.host.service_tasks[service_id].done() and self.host.supervisor_tasks[service_id].done()
@@ -0,0 +1,40 @@
+from typing import NamedTuple
+
+
+class MemoryUsage(NamedTuple):
+    """Memory of a process in bytes, as read from ``/proc/<pid>/smaps_rollup``.
+
+    Shared memory is mapped by other processes too, such as pages a forked
+    worker still shares with the host. Private memory belongs to the process
+    alone. Pss charges each shared page to its processes proportionally.
+    """
+    rss: int
+    pss: int
+    shared: int
+    private: int
+
+    @classmethod
+    def read(cls, pid):
+        """Returns the memory usage of a process, or None where smaps_rollup
+        is not available (before Linux 4.14 and on other systems)."""
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        sizes = {}
+        for line in lines:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == "kB":
+                sizes[fields[0].rstrip(":")] = int(fields[1]) * 1024
+        return cls(
+            rss=sizes.get("Rss", 0),
+            pss=sizes.get("Pss", 0),
+            shared=sizes.get("Shared_Clean", 0) + sizes.get("Shared_Dirty", 0),
+            private=sizes.get("Private_Clean", 0) + sizes.get("Private_Dirty", 0),
+        )
+
+    def __str__(self):
+        mib = 1024 * 1024
+        return f"rss {self.rss / mib:.1f} MiB, pss {self.pss / mib:.1f} MiB, " \
+               f"shared {self.shared / mib:.1f} MiB, private {self.private / mib:.1f} MiB"
@@ -0,0 +1,63 @@
+import gc
+import multiprocessing
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from application_framework.service.service_runner import ServiceRunner
+
+
+class PreforkPool:
+    """Process pool of the preforked execution modes.
+
+    The workers are forked from a forkserver that imported the framework and
+    the modules of the applications once, so a worker starts without booting
+    an interpreter or importing anything. Each service gets a worker of its
+    own, forked when the host starts, which deserializes the dependency
+    container of the service right away. Launching or restarting a service on the pool
+    then only resolves its class and runs it in a warm worker.
+    """
+    def __init__(self, service_configs, freeze_gc=False):
+        self.context = multiprocessing.get_context("forkserver")
+        self.context.set_forkserver_preload(self.get_preload_modules(service_configs))
+        self.freeze_gc = freeze_gc
+        self.serialized_states = {config.service_id: config.serialized_state for config in service_configs}
+        # One single worker pool per service, so killing the worker of one
+        # service does not break the pool of another
+        self.executors = {service_id: self.create_executor(service_id) for service_id in self.serialized_states}
+
+    def create_executor(self, service_id):
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self.context,
+            initializer=PreforkPool.prepare_worker,
+            initargs=(service_id, self.serialized_states[service_id], self.freeze_gc)
+        )
+
+    @staticmethod
+    def get_preload_modules(service_configs):
+        # A service class defined in the main script is preloaded by
+        # importing the script, which therefore needs a __main__ guard
+        modules = {"application_framework.host.host"}
+        modules.update(config.service_class.__module__ for config in service_configs)
+        return sorted(modules)
+
+    @staticmethod
+    def prepare_worker(service_id, serialized_state, freeze_gc):
+        ServiceRunner.reset_signal_handling()
+        if freeze_gc:
+            # Keeps the collector off the pages shared with the forkserver
+            gc.freeze()
+        ServiceRunner.prepare_container(service_id, serialized_state)
+
+    def start(self):
+        """Forks the workers now rather than when the first service launches."""
+        for executor in self.executors.values():
+            executor.submit(os.getpid)
+
+    def restart(self, service_id):
+        """Replaces the executor of a service that a killed worker broke with
+        one whose worker is forked from the forkserver again."""
+        self.executors[service_id].shutdown(wait=False)
+        self.executors[service_id] = self.create_executor(service_id)
+        self.executors[service_id].submit(os.getpid)
@@ -0,0 +1,37 @@
+import importlib
+
+
+class AdapterRegistry:
+    """The queue adapters the host can create channels with, imported when
+    first used.
+
+    Most hosts only need a few of them, and the ZeroMQ adapter requires the
+    optional pyzmq package, so none is imported up front. Further adapters
+    can be added with register().
+    """
+    IN_LOOP = 'InLoop'
+    THREAD = 'Thread'
+    MANAGER = 'Manager'
+    SHARED_MEMORY = 'SharedMemory'
+    SOCKET_PAIR = 'SocketPair'
+    ZERO_MQ = 'ZeroMQ'
+
+    adapter_paths = {
+        IN_LOOP: ("application_framework.messaging.adapters.asyncio_queue", "AsyncioQueue"),
+        THREAD: ("application_framework.messaging.adapters.thread_queue", "ThreadQueue"),
+        MANAGER: ("application_framework.messaging.adapters.manager_queue", "ManagerQueue"),
+        SHARED_MEMORY: ("application_framework.messaging.adapters.shared_memory_queue", "SharedMemoryQueue"),
+        SOCKET_PAIR: ("application_framework.messaging.adapters.socket_pair_queue", "SocketPairQueue"),
+        ZERO_MQ: ("application_framework.messaging.adapters.zero_mq_queue", "ZeroMQQueue"),
+    }
+
+    @classmethod
+    def register(cls, name, module_name, class_name):
+        cls.adapter_paths[name] = (module_name, class_name)
+
+    @classmethod
+    def get(cls, name):
+        """Returns the adapter class registered under name, importing its
+        module if this is the first use."""
+        module_name, class_name = cls.adapter_paths[name]
+        return getattr(importlib.import_module(module_name), class_name)
@@ -0,0 +1,71 @@
+import asyncio
+
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class AsyncioQueue(MessageQueue):
+    """In-loop queue for actors that share the same event loop.
+
+    Messages are handed over as objects, without pickling or executor hops.
+    The sync methods never block since they would block the shared loop.
+    Messages are only encoded when a codec is given.
+    """
+    is_in_loop = True
+
+    def __init__(self, codec=None):
+        self.queue = asyncio.Queue()
+        self.codec = codec
+
+    async def send_async(self, message, loop):
+        self.queue.put_nowait(self._encode(message))
+
+    async def receive_async(self, loop):
+        return self._decode(await self.queue.get())
+
+    def send(self, message):
+        self.queue.put_nowait(self._encode(message))
+
+    def receive(self):
+        try:
+            return self._decode(self.queue.get_nowait())
+        except asyncio.QueueEmpty:
+            return None
+
+    async def send_many_async(self, messages, loop):
+        self.send_many(messages)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        if self.queue.empty():
+            try:
+                first = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            return [self._decode(first)] + self.receive_many(max_items - 1)
+        return self.receive_many(max_items)
+
+    def send_many(self, messages):
+        for message in messages:
+            self.queue.put_nowait(self._encode(message))
+
+    def receive_many(self, max_items, timeout=0):
+        # Never waits, since waiting would block the shared loop
+        messages = []
+        while len(messages) < max_items and not self.queue.empty():
+            messages.append(self._decode(self.queue.get_nowait()))
+        return messages
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def discard(self, count):
+        discarded = 0
+        while discarded < count and not self.queue.empty():
+            self.queue.get_nowait()
+            discarded += 1
+        return discarded
+
+    def _encode(self, message):
+        return self.codec.encode_frames(message) if self.codec else message
+
+    def _decode(self, data):
+        return self.codec.decode_frames(data) if self.codec else data
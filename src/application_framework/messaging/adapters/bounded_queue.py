@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+from queue import Full
+
+from application_framework.messaging.message_queue import MessageQueue
+from application_framework.messaging.overflow_policy import OverflowPolicy
+
+
+class BoundedQueue(MessageQueue):
+    """Wraps a queue and bounds its depth according to an overflow policy.
+
+    With the block policy, senders wait once the depth reaches the high
+    watermark until it has drained to the low watermark. The other policies
+    drop the newest messages, discard the oldest ones or raise ``queue.Full``
+    once the depth reaches the capacity.
+
+    Each channel has a single producer, so the depth can only have grown by
+    what this side sent since it was last queried. The wrapped queue is
+    therefore only asked for its depth once that headroom is used up.
+
+    A blocked sender checks the depth again after a sleep that doubles up
+    to a few milliseconds, since asking a queue in another process for its
+    depth costs a round trip on both sides.
+
+    Control messages bypass the policy, so a full channel can still be
+    stopped. Receives pass straight through.
+    """
+    BLOCKED_SEND_MIN_SLEEP = 0.0002
+    BLOCKED_SEND_MAX_SLEEP = 0.005
+
+    def __init__(self, queue, overflow_policy):
+        self.queue = queue
+        self.overflow_policy = overflow_policy
+        self.headroom = 0
+        self.is_blocked = False
+        self.dropped_count = 0
+
+    async def send_async(self, message, loop):
+        await self.send_many_async([message], loop)
+
+    async def receive_async(self, loop):
+        return await self.queue.receive_async(loop)
+
+    def send(self, message):
+        self.send_many([message])
+
+    def receive(self):
+        return self.queue.receive()
+
+    async def send_many_async(self, messages, loop):
+        if len(messages) > self.headroom:
+            control_messages, messages = self._split_control_messages(messages)
+            if control_messages:
+                await self.queue.send_many_async(control_messages, loop)
+        admitted = self._admit(messages)
+        sleep = self.BLOCKED_SEND_MIN_SLEEP
+        while admitted is None:
+            await asyncio.sleep(sleep)
+            sleep = min(2 * sleep, self.BLOCKED_SEND_MAX_SLEEP)
+            admitted = self._admit(messages)
+        if admitted:
+            await self.queue.send_many_async(admitted, loop)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        return await self.queue.receive_many_async(loop, max_items, timeout)
+
+    def send_many(self, messages):
+        if len(messages) > self.headroom:
+            control_messages, messages = self._split_control_messages(messages)
+            if control_messages:
+                self.queue.send_many(control_messages)
+        admitted = self._admit(messages)
+        sleep = self.BLOCKED_SEND_MIN_SLEEP
+        while admitted is None:
+            if self.queue.is_in_loop:
+                # Waiting would block the loop that drains the queue
+                raise Full("Channel is full")
+            time.sleep(sleep)
+            sleep = min(2 * sleep, self.BLOCKED_SEND_MAX_SLEEP)
+            admitted = self._admit(messages)
+        if admitted:
+            self.queue.send_many(admitted)
+
+    def receive_many(self, max_items, timeout=0):
+        return self.queue.receive_many(max_items, timeout)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def close(self):
+        self.queue.close()
+
+    def _split_control_messages(self, messages):
+        control_messages = [message for message in messages if message.is_control]
+        if not control_messages:
+            return control_messages, messages
+        return control_messages, [message for message in messages if not message.is_control]
+
+    def _admit(self, messages):
+        """Returns the messages that may be sent now, or None if the sender
+        has to wait for the queue to drain."""
+        count = len(messages)
+        if count <= self.headroom:
+            self.headroom -= count
+            return messages
+        policy = self.overflow_policy
+        depth = self.queue.qsize()
+        if policy.policy == OverflowPolicy.BLOCK:
+            if depth >= policy.high_watermark:
+                self.is_blocked = True
+            elif depth <= policy.low_watermark:
+                self.is_blocked = False
+            if self.is_blocked:
+                return None
+            # A batch may overshoot the high watermark rather than never fit
+            self.headroom = max(0, policy.high_watermark - depth - count)
+            return messages
+        free = policy.capacity - depth
+        if count <= free:
+            self.headroom = free - count
+            return messages
+        self.headroom = 0
+        if policy.policy == OverflowPolicy.FAIL_FAST:
+            raise Full(f"Channel is full ({depth} of {policy.capacity} messages queued)")
+        if policy.policy == OverflowPolicy.DROP_NEWEST:
+            admitted = messages[:max(0, free)]
+            dropped = count - len(admitted)
+        elif policy.policy == OverflowPolicy.DROP_OLDEST:
+            admitted = messages[-policy.capacity:]
+            discarded = self.queue.discard(min(depth, len(admitted) - max(0, free)))
+            dropped = count - len(admitted) + discarded
+        else:
+            raise ValueError(f"Invalid overflow policy: {policy.policy}")
+        self.dropped_count += dropped
+        print(f"[BoundedQueue] Channel is full, dropped {dropped} message(s)")
+        return admitted
@@ -0,0 +1,89 @@
+import asyncio
+
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class CoalescingQueue(MessageQueue):
+    """Wraps a queue and coalesces the messages sent with send_async() within
+    a short window into a single send_many_async() call on the wrapped queue.
+
+    Control messages flush the buffer at once, so stop and crash
+    notifications are not held back. Sync sends first flush what is still
+    buffered, so they never overtake earlier async sends. Receives pass
+    straight through.
+    """
+    def __init__(self, queue, window=0.001, max_batch_size=1024):
+        self.queue = queue
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.buffer = []
+        self.flush_handle = None
+        self.flush_lock = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["buffer"] = []
+        state["flush_handle"] = None
+        state["flush_lock"] = None
+        return state
+
+    async def send_async(self, message, loop):
+        self.buffer.append(message)
+        if message.is_control or len(self.buffer) >= self.max_batch_size:
+            await self.flush_async(loop)
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(
+                self.window, lambda: loop.create_task(self.flush_async(loop)))
+
+    async def flush_async(self, loop):
+        """Sends the buffered messages now."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.flush_lock is None:
+            self.flush_lock = asyncio.Lock()
+        # The lock keeps concurrent flushes from reordering batches
+        async with self.flush_lock:
+            messages, self.buffer = self.buffer, []
+            if messages:
+                await self.queue.send_many_async(messages, loop)
+
+    async def receive_async(self, loop):
+        return await self.queue.receive_async(loop)
+
+    def send(self, message):
+        self.send_many([message])
+
+    def receive(self):
+        return self.queue.receive()
+
+    async def send_many_async(self, messages, loop):
+        self.buffer.extend(messages)
+        await self.flush_async(loop)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        return await self.queue.receive_many_async(loop, max_items, timeout)
+
+    def send_many(self, messages):
+        self.flush()
+        self.queue.send_many(messages)
+
+    def receive_many(self, max_items, timeout=0):
+        return self.queue.receive_many(max_items, timeout)
+
+    def qsize(self):
+        return self.queue.qsize() + len(self.buffer)
+
+    def flush(self):
+        """Sends the buffered messages now, without the sender's loop."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        messages, self.buffer = self.buffer, []
+        if messages:
+            self.queue.send_many(messages)
+
+    def close(self):
+        # Messages still in the window would otherwise be lost
+        self.flush()
+        self.queue.close()
@@ -1,15 +1,68 @@
+import asyncio
+import threading
 import traceback
 
+from collections import deque
+from multiprocessing.managers import SyncManager
+from queue import Empty
+
+from application_framework.messaging.channel_executor import ChannelExecutor
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
 from application_framework.messaging.message_queue import MessageQueue
 
 
+class MessageCount:
+    """Number of messages on a Manager queue. It lives in the Manager process,
+    so every process using the queue updates it in one atomic call."""
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def add(self, count):
+        with self.lock:
+            self.value += count
+            return self.value
+
+    def get(self):
+        return self.value
+
+
+class QueueManager(SyncManager):
+    pass
+
+
+QueueManager.register("MessageCount", MessageCount)
+
+
 class ManagerQueue(MessageQueue):
-    def __init__(self, queue):
+    """Queue backed by a ``multiprocessing.Manager`` queue proxy.
+
+    Every item put on the proxy is a tuple of encoded messages, so a batch
+    costs a single proxy round trip. Items received beyond what the caller
+    asked for are kept in a local buffer. The depth is the number of
+    messages, kept in a MessageCount beside the queue if one is given, and
+    otherwise the number of items on the proxy.
+    """
+    def __init__(self, queue, codec=None, message_count=None):
         self.queue = queue
+        self.codec = codec or PickleCodec()
+        self.message_count = message_count
+        self.pending = deque()
+
+    @staticmethod
+    def start_manager():
+        """Starts a Manager process that can also create MessageCounts."""
+        manager = QueueManager()
+        manager.start()
+        return manager
+
+    @staticmethod
+    def create(manager, codec=None):
+        return ManagerQueue(manager.Queue(), codec, manager.MessageCount())
 
     async def send_async(self, message, loop):
         try:
-            await loop.run_in_executor(None, self.queue.put, message)
+            await loop.run_in_executor(ChannelExecutor.get_instance(), self._put, (self.codec.encode(message),))
             print(f"[ManagerQueue] Async message sent: {message}")
         except BrokenPipeError:
             print(f"[ManagerQueue] Broken pipe error while sending message asynchronously: {message}")
@@ -19,9 +72,14 @@ class ManagerQueue(MessageQueue):
 
     async def receive_async(self, loop):
         try:
-            message = await loop.run_in_executor(None, self.queue.get, 1)
+            if not self.pending:
+                self.pending.extend(await loop.run_in_executor(ChannelExecutor.get_instance(), self._get))
+            message = self.codec.decode(self.pending.popleft())
             print(f"[ManagerQueue] Async message received: {message}")
             return message
+        except asyncio.CancelledError:
+            # An Exception before Python 3.8, and the receive must end
+            raise
         except EOFError:
             print(f"[ManagerQueue] EOFError while receiving message asynchronously.")
         except Exception as e:
@@ -31,18 +89,110 @@ class ManagerQueue(MessageQueue):
 
     def send(self, message):
         try:
-            self.queue.put(message)
+            self._put((self.codec.encode(message),))
             print(f"[ManagerQueue] Message sent: {message}")
         except Exception as e:
             print(f"[ManagerQueue] Error sending message: {e}")
 
     def receive(self):
         try:
-            if not self.queue.empty():
-                message = self.queue.get(timeout=1)
+            if not self.pending and not self.queue.empty():
+                self.pending.extend(self._get(True, 1))
+            if self.pending:
+                message = self.codec.decode(self.pending.popleft())
                 print(f"[ManagerQueue] Message received: {message}")
                 return message
         except Exception as e:
             print(f"[ManagerQueue] Error receiving message: {e}")
             print(traceback.format_exc())
         return None
+
+    async def send_many_async(self, messages, loop):
+        try:
+            await loop.run_in_executor(ChannelExecutor.get_instance(), self._put, self._encode_batch(messages))
+        except Exception as e:
+            print(f"[ManagerQueue] Error sending messages asynchronously: {e}")
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        try:
+            if not self.pending:
+                await loop.run_in_executor(ChannelExecutor.get_instance(), self._fill_pending, max_items, timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[ManagerQueue] Error receiving messages asynchronously: {e}")
+        return self._take_pending(max_items)
+
+    def send_many(self, messages):
+        try:
+            self._put(self._encode_batch(messages))
+        except Exception as e:
+            print(f"[ManagerQueue] Error sending messages: {e}")
+
+    def receive_many(self, max_items, timeout=0):
+        try:
+            if not self.pending:
+                self._fill_pending(max_items, timeout)
+        except Exception as e:
+            print(f"[ManagerQueue] Error receiving messages: {e}")
+        return self._take_pending(max_items)
+
+    def qsize(self):
+        if self.message_count is None:
+            return self.queue.qsize()
+        return max(0, self.message_count.get())
+
+    def discard(self, count):
+        """Discards the oldest messages. A batch that holds more messages than
+        are to be discarded is split, and its rest is put back together with
+        everything queued after it, so that the order is kept. Only the single
+        producer of a channel may call this."""
+        discarded = 0
+        kept = []
+        try:
+            while discarded < count:
+                batch = self._get(False)
+                taken = min(len(batch), count - discarded)
+                discarded += taken
+                kept.extend(batch[taken:])
+            if kept:
+                while True:
+                    kept.extend(self._get(False))
+        except Empty:
+            pass
+        if kept:
+            self._put(tuple(kept))
+        return discarded
+
+    def _put(self, batch):
+        # Counted first, so the depth is never below what is queued
+        if self.message_count is not None:
+            self.message_count.add(len(batch))
+        self.queue.put(batch)
+
+    def _get(self, block=True, timeout=None):
+        batch = self.queue.get(block, timeout)
+        if self.message_count is not None:
+            self.message_count.add(-len(batch))
+        return batch
+
+    def _encode_batch(self, messages):
+        return tuple(self.codec.encode(message) for message in messages)
+
+    def _fill_pending(self, max_items, timeout):
+        """Blocks for the first batch, then drains what is already queued."""
+        try:
+            if timeout is None:
+                self.pending.extend(self._get())
+            elif timeout > 0:
+                self.pending.extend(self._get(True, timeout))
+            else:
+                self.pending.extend(self._get(False))
+            while len(self.pending) < max_items:
+                self.pending.extend(self._get(False))
+        except Empty:
+            pass
+
+    def _take_pending(self, max_items):
+        count = min(max_items, len(self.pending))
+        return [self.codec.decode(self.pending.popleft()) for _ in range(count)]
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class PriorityLaneQueue(MessageQueue):
+    """Sends control messages and data messages on separate lanes, so control
+    messages are not queued behind a data backlog.
+
+    Receivers take control messages first. To keep the data lane from
+    starving, a waiting data message is delivered after at most
+    ``max_control_burst`` consecutive control messages.
+
+    The async receivers keep one pending receive per lane between calls, so
+    a message already taken off a lane is never overtaken by a later one.
+    A sync batch receive cannot wait on both lanes at once, so it waits on
+    the data lane in slices of ``CONTROL_POLL_INTERVAL`` seconds and polls
+    the control lane in between.
+    """
+    CONTROL_POLL_INTERVAL = 0.01
+
+    def __init__(self, control_queue, data_queue, max_control_burst=16):
+        self.control_queue = control_queue
+        self.data_queue = data_queue
+        self.max_control_burst = max_control_burst
+        self.control_burst = 0
+        self.control_task = None
+        self.data_task = None
+        self.receive_loop = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["control_task"] = None
+        state["data_task"] = None
+        state["receive_loop"] = None
+        return state
+
+    @property
+    def is_in_loop(self):
+        return self.data_queue.is_in_loop
+
+    async def send_async(self, message, loop):
+        if message.is_control:
+            await self.control_queue.send_async(message, loop)
+        else:
+            await self.data_queue.send_async(message, loop)
+
+    async def receive_async(self, loop):
+        while True:
+            message = self._take_completed()
+            if message is not None:
+                return message
+            self.receive_loop = loop
+            if self.control_task is None:
+                self.control_task = loop.create_task(self.control_queue.receive_async(loop))
+            if self.data_task is None:
+                self.data_task = loop.create_task(self.data_queue.receive_async(loop))
+            await asyncio.wait([self.control_task, self.data_task], return_when=asyncio.FIRST_COMPLETED)
+
+    def send(self, message):
+        if message.is_control:
+            self.control_queue.send(message)
+        else:
+            self.data_queue.send(message)
+
+    def receive(self):
+        if self.control_burst >= self.max_control_burst:
+            message = self.data_queue.receive()
+            if message is not None:
+                self.control_burst = 0
+                return message
+        message = self.control_queue.receive()
+        if message is not None:
+            self.control_burst += 1
+            return message
+        self.control_burst = 0
+        return self.data_queue.receive()
+
+    async def send_many_async(self, messages, loop):
+        control_messages, data_messages = self._split(messages)
+        if control_messages:
+            await self.control_queue.send_many_async(control_messages, loop)
+        if data_messages:
+            await self.data_queue.send_many_async(data_messages, loop)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        try:
+            first = await asyncio.wait_for(self.receive_async(loop), timeout)
+        except asyncio.TimeoutError:
+            return []
+        messages = [first]
+        # Only lanes without a pending receive can be read without reordering
+        if self.control_task is None and self.control_burst < self.max_control_burst:
+            control_messages = await self.control_queue.receive_many_async(
+                loop, min(max_items - 1, self.max_control_burst - self.control_burst), 0)
+            self.control_burst += len(control_messages)
+            messages += control_messages
+        if self.data_task is None and len(messages) < max_items:
+            data_messages = await self.data_queue.receive_many_async(loop, max_items - len(messages), 0)
+            if data_messages:
+                self.control_burst = 0
+            messages += data_messages
+        return messages
+
+    def send_many(self, messages):
+        control_messages, data_messages = self._split(messages)
+        if control_messages:
+            self.control_queue.send_many(control_messages)
+        if data_messages:
+            self.data_queue.send_many(data_messages)
+
+    def receive_many(self, max_items, timeout=0):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            interval = self.CONTROL_POLL_INTERVAL if remaining is None else min(remaining, self.CONTROL_POLL_INTERVAL)
+            messages = self._receive_many_within(max_items, interval)
+            if messages or remaining == 0:
+                return messages
+
+    async def flush_async(self, loop):
+        await self.control_queue.flush_async(loop)
+        await self.data_queue.flush_async(loop)
+
+    def qsize(self):
+        return self.control_queue.qsize() + self.data_queue.qsize()
+
+    def close(self):
+        if self.receive_loop is not None and not self.receive_loop.is_closed():
+            for task in [self.control_task, self.data_task]:
+                if task is not None:
+                    task.cancel()
+        self.control_queue.close()
+        self.data_queue.close()
+
+    def _receive_many_within(self, max_items, timeout):
+        """Takes the messages available on either lane, waiting up to
+        timeout seconds on the data lane if the control lane is empty."""
+        messages = []
+        data_timeout = 0
+        if self.control_burst < self.max_control_burst:
+            messages = self.control_queue.receive_many(min(max_items, self.max_control_burst - self.control_burst))
+            self.control_burst += len(messages)
+            if not messages:
+                data_timeout = timeout
+        if len(messages) < max_items:
+            self.control_burst = 0
+            messages += self.data_queue.receive_many(max_items - len(messages), data_timeout)
+        if not messages:
+            messages = self.control_queue.receive_many(max_items)
+        return messages
+
+    def _take_completed(self):
+        """Returns the message of a completed lane receive, preferring the
+        control lane unless its burst limit is reached."""
+        control_done = self.control_task is not None and self.control_task.done()
+        data_done = self.data_task is not None and self.data_task.done()
+        if control_done and not (data_done and self.control_burst >= self.max_control_burst):
+            task, self.control_task = self.control_task, None
+            self.control_burst += 1
+            return task.result()
+        if data_done:
+            task, self.data_task = self.data_task, None
+            self.control_burst = 0
+            return task.result()
+        return None
+
+    def _split(self, messages):
+        control_messages = [message for message in messages if message.is_control]
+        if not control_messages:
+            return control_messages, messages
+        return control_messages, [message for message in messages if not message.is_control]
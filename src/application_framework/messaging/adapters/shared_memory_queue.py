@@ -0,0 +1,260 @@
+import asyncio
+import os
+import select
+import struct
+import threading
+import time
+
+from multiprocessing import Pipe
+
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message_queue import MessageQueue
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # Python < 3.8
+    resource_tracker = shared_memory = None
+
+
+class SharedMemoryQueue(MessageQueue):
+    """Single-producer/single-consumer ring buffer in shared memory.
+
+    The producer only writes the write index and the consumer only writes the
+    read index, so the two sides need no lock between them. Threads of the
+    producing process may send concurrently, as a lock serializes their
+    writes, but only one process may send. Both indexes grow monotonically and
+    are mapped onto the ring modulo its capacity. Each published record is
+    followed by a wakeup byte on a pipe, which lets an async consumer wait on
+    the pipe with the event loop instead of polling the ring.
+
+    A record holds the frames of one encoded message. Attachment frames are
+    copied straight from the sender's buffers into the ring, without being
+    serialized into the message body first.
+    """
+    # Slots in the header viewed as 64-bit words, with the producer and
+    # consumer slots on separate cache lines. Indexes and counts are stored
+    # through that view so each update is one 8-byte write; struct.pack_into
+    # zero-fills its target first, which the other side could observe.
+    WRITE_INDEX_SLOT = 0
+    WRITE_COUNT_SLOT = 1
+    READ_INDEX_SLOT = 8
+    READ_COUNT_SLOT = 9
+    HEADER_SIZE = 128
+    FULL_RING_SLEEP = 0.0005
+
+    length_struct = struct.Struct("I")
+    frame_count_struct = struct.Struct("=H")
+    single_frame_header_struct = struct.Struct("=HI")
+
+    def __init__(self, capacity=1024 * 1024, codec=None):
+        if not SharedMemoryQueue.is_supported():
+            raise RuntimeError("SharedMemoryQueue requires Python 3.8 or later")
+        self.capacity = capacity
+        self.codec = codec or PickleCodec()
+        self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER_SIZE + capacity)
+        self.indexes = self.shm.buf[:self.HEADER_SIZE].cast("Q")
+        self.indexes[self.WRITE_INDEX_SLOT] = 0
+        self.indexes[self.WRITE_COUNT_SLOT] = 0
+        self.indexes[self.READ_INDEX_SLOT] = 0
+        self.indexes[self.READ_COUNT_SLOT] = 0
+        self.wakeup_reader, self.wakeup_writer = Pipe(duplex=False)
+        os.set_blocking(self.wakeup_reader.fileno(), False)
+        os.set_blocking(self.wakeup_writer.fileno(), False)
+        self.producer_lock = threading.Lock()
+        self.is_owner = True
+
+    @staticmethod
+    def is_supported():
+        return shared_memory is not None
+
+    @staticmethod
+    def start_resource_tracker():
+        """Starts the tracker that unlinks leaked segments, if it is not
+        running. Call this before forking workers: a worker forked without it
+        starts its own, which unlinks the segments the worker attached to
+        when it exits."""
+        if resource_tracker is not None:
+            resource_tracker.ensure_running()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["is_owner"] = False
+        del state["indexes"]
+        del state["producer_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.indexes = self.shm.buf[:self.HEADER_SIZE].cast("Q")
+        self.producer_lock = threading.Lock()
+
+    async def send_async(self, message, loop):
+        await self.send_many_async([message], loop)
+
+    async def receive_async(self, loop):
+        return (await self.receive_many_async(loop, 1))[0]
+
+    def send(self, message):
+        self.send_many([message])
+
+    def receive(self):
+        messages = self._read_records(1)
+        return messages[0] if messages else None
+
+    async def send_many_async(self, messages, loop):
+        records = [self._encode_record(message) for message in messages]
+        while records:
+            records = records[self._write_records(records):]
+            if records:
+                await asyncio.sleep(self.FULL_RING_SLEEP)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            messages = self._read_records(max_items)
+            if messages:
+                return messages
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._wait_for_wakeup(loop), remaining)
+            except asyncio.TimeoutError:
+                return []
+
+    def send_many(self, messages):
+        records = [self._encode_record(message) for message in messages]
+        while records:
+            records = records[self._write_records(records):]
+            if records:
+                time.sleep(self.FULL_RING_SLEEP)
+
+    def receive_many(self, max_items, timeout=0):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            messages = self._read_records(max_items)
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if messages or (remaining is not None and remaining <= 0):
+                return messages
+            fd = self.wakeup_reader.fileno()
+            if select.select([fd], [], [], remaining)[0]:
+                self._drain_wakeups()
+
+    def __del__(self):
+        # The index view must go before the segment, which refuses to close
+        # while views of it exist
+        if hasattr(self, "indexes"):
+            self.indexes.release()
+
+    def qsize(self):
+        return self.indexes[self.WRITE_COUNT_SLOT] - self.indexes[self.READ_COUNT_SLOT]
+
+    def close(self):
+        self.indexes.release()
+        self.shm.close()
+        if self.is_owner:
+            self.shm.unlink()
+
+    def _write_records(self, records):
+        """Writes as many records as fit and publishes them with a single
+        index update and wakeup. Returns the number of records written."""
+        with self.producer_lock:
+            return self._write_records_locked(records)
+
+    def _write_records_locked(self, records):
+        write_index = self.indexes[self.WRITE_INDEX_SLOT]
+        free = self.capacity - (write_index - self.indexes[self.READ_INDEX_SLOT])
+        count = 0
+        for parts in records:
+            length = sum(part.nbytes for part in parts)
+            record_size = self.length_struct.size + length
+            if record_size > self.capacity:
+                raise ValueError(f"Message of {length} bytes does not fit in a ring of {self.capacity} bytes")
+            if record_size > free:
+                break
+            self._copy_in(write_index, self.length_struct.pack(length))
+            offset = write_index + self.length_struct.size
+            for part in parts:
+                self._copy_in(offset, part)
+                offset += part.nbytes
+            write_index += record_size
+            free -= record_size
+            count += 1
+        if count:
+            self.indexes[self.WRITE_COUNT_SLOT] += count
+            self.indexes[self.WRITE_INDEX_SLOT] = write_index
+            self._wakeup()
+        return count
+
+    def _read_records(self, max_items):
+        read_index = self.indexes[self.READ_INDEX_SLOT]
+        write_index = self.indexes[self.WRITE_INDEX_SLOT]
+        records = []
+        while read_index != write_index and len(records) < max_items:
+            length, = self.length_struct.unpack(self._copy_out(read_index, self.length_struct.size))
+            records.append(self._copy_out(read_index + self.length_struct.size, length))
+            read_index += self.length_struct.size + length
+        if records:
+            self.indexes[self.READ_COUNT_SLOT] += len(records)
+            self.indexes[self.READ_INDEX_SLOT] = read_index
+        return [self._decode_record(data) for data in records]
+
+    def _encode_record(self, message):
+        frames = [memoryview(frame).cast("B") for frame in self.codec.encode_frames(message)]
+        if len(frames) == 1:
+            header = self.single_frame_header_struct.pack(1, frames[0].nbytes)
+        else:
+            header = self.frame_count_struct.pack(len(frames)) + \
+                struct.pack(f"={len(frames)}I", *(frame.nbytes for frame in frames))
+        return [memoryview(header)] + frames
+
+    def _decode_record(self, data):
+        data = memoryview(data)
+        frame_count, = self.frame_count_struct.unpack_from(data)
+        offset = self.frame_count_struct.size
+        lengths = struct.unpack_from(f"={frame_count}I", data, offset)
+        offset += self.length_struct.size * frame_count
+        frames = []
+        for length in lengths:
+            frames.append(data[offset:offset + length])
+            offset += length
+        return self.codec.decode_frames(frames)
+
+    def _copy_in(self, index, data):
+        data = memoryview(data)
+        start = self.HEADER_SIZE + index % self.capacity
+        first = min(len(data), self.HEADER_SIZE + self.capacity - start)
+        self.shm.buf[start:start + first] = data[:first]
+        if first < len(data):
+            rest = len(data) - first
+            self.shm.buf[self.HEADER_SIZE:self.HEADER_SIZE + rest] = data[first:]
+
+    def _copy_out(self, index, length):
+        start = self.HEADER_SIZE + index % self.capacity
+        first = min(length, self.HEADER_SIZE + self.capacity - start)
+        data = bytes(self.shm.buf[start:start + first])
+        if first < length:
+            data += bytes(self.shm.buf[self.HEADER_SIZE:self.HEADER_SIZE + length - first])
+        return data
+
+    def _wakeup(self):
+        try:
+            os.write(self.wakeup_writer.fileno(), b"\0")
+        except BlockingIOError:
+            pass  # The pipe is full, so the consumer already has wakeups pending
+
+    async def _wait_for_wakeup(self, loop):
+        fd = self.wakeup_reader.fileno()
+        readable = loop.create_future()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        self._drain_wakeups()
+
+    def _drain_wakeups(self):
+        try:
+            os.read(self.wakeup_reader.fileno(), 65536)
+        except BlockingIOError:
+            pass
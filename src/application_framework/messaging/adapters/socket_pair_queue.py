@@ -0,0 +1,212 @@
+import asyncio
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class SocketPairQueue(MessageQueue):
+    """One direction of a duplex ``socket.socketpair()`` between a supervisor
+    and its service. create_pair() returns both directions over a single
+    pair, so a service costs two file descriptors instead of two Manager
+    queue proxies.
+
+    Each record is length-prefixed and holds the frames of one encoded
+    message. Async senders and receivers wait on the event loop with
+    ``sock_sendall()`` and ``sock_recv()``, without an executor thread.
+
+    The supervisor's socket stays in the host process. It is left out when
+    the queue is pickled for a worker process.
+    """
+    RECEIVE_SIZE = 65536
+
+    length_struct = struct.Struct("!I")
+    frame_count_struct = struct.Struct("!H")
+
+    def __init__(self, send_socket, receive_socket, codec=None, host_socket=None):
+        self.send_socket = send_socket
+        self.receive_socket = receive_socket
+        self.codec = codec or PickleCodec()
+        self.host_socket = host_socket
+        self.buffer = bytearray()
+        self.is_peer_closed = False
+        self.send_lock = threading.Lock()
+        self.async_send_lock = None
+
+    @classmethod
+    def create_pair(cls, codec=None):
+        """Returns the queue to the service and the queue to the supervisor."""
+        supervisor_socket, service_socket = socket.socketpair()
+        for sock in [supervisor_socket, service_socket]:
+            sock.setblocking(False)
+        return (cls(supervisor_socket, service_socket, codec, supervisor_socket),
+                cls(service_socket, supervisor_socket, codec, supervisor_socket))
+
+    @classmethod
+    def attach_service_side(cls, fileno, codec=None):
+        """Returns the queue to the service and the queue to the supervisor
+        over a duplicate of the service's socket, given by file descriptor.
+        This is how a service gets its queues where they cannot be pickled
+        to, such as in a subinterpreter."""
+        service_socket = socket.socket(fileno=os.dup(fileno))
+        service_socket.setblocking(False)
+        return cls(None, service_socket, codec), cls(service_socket, None, codec)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["send_socket", "receive_socket"]:
+            if state[name] is self.host_socket:
+                state[name] = None
+        state["host_socket"] = None
+        state["send_lock"] = None
+        state["async_send_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.send_lock = threading.Lock()
+        for sock in [self.send_socket, self.receive_socket]:
+            if sock is not None:
+                sock.setblocking(False)
+
+    async def send_async(self, message, loop):
+        await self.send_many_async([message], loop)
+
+    async def receive_async(self, loop):
+        return (await self.receive_many_async(loop, 1))[0]
+
+    def send(self, message):
+        self.send_many([message])
+
+    def receive(self):
+        messages = self.receive_many(1)
+        return messages[0] if messages else None
+
+    async def send_many_async(self, messages, loop):
+        data = self._encode_records(messages)
+        if self.async_send_lock is None:
+            self.async_send_lock = asyncio.Lock()
+        # A partial write must finish before another send starts
+        async with self.async_send_lock:
+            try:
+                await loop.sock_sendall(self.send_socket, data)
+            except OSError as e:
+                print(f"[SocketPairQueue] Error sending messages asynchronously, dropping {len(messages)}: {e}")
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        try:
+            return await asyncio.wait_for(self._receive_many_async(loop, max_items), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+    def send_many(self, messages):
+        data = memoryview(self._encode_records(messages))
+        with self.send_lock:
+            try:
+                while data:
+                    try:
+                        data = data[self.send_socket.send(data):]
+                    except BlockingIOError:
+                        select.select([], [self.send_socket], [])
+            except (OSError, ValueError) as e:
+                print(f"[SocketPairQueue] Error sending messages, dropping {len(messages)}: {e}")
+
+    def receive_many(self, max_items, timeout=0):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            messages = self._take_records(max_items)
+            if messages:
+                return messages
+            if not self.is_peer_closed:
+                try:
+                    self._append(self.receive_socket.recv(self.RECEIVE_SIZE))
+                    continue
+                except BlockingIOError:
+                    pass
+                except (OSError, ValueError) as e:
+                    self._on_peer_closed(e)
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            if self.is_peer_closed:
+                # Waits out the timeout, as the async receive does
+                threading.Event().wait(remaining)
+                return []
+            try:
+                select.select([self.receive_socket], [], [], remaining)
+            except (OSError, ValueError) as e:
+                self._on_peer_closed(e)
+
+    def close(self):
+        # Closing the receiving end lets each side release its own socket
+        if self.receive_socket is not None:
+            self.receive_socket.close()
+
+    async def _receive_many_async(self, loop, max_items):
+        while True:
+            messages = self._take_records(max_items)
+            if messages:
+                return messages
+            if self.is_peer_closed:
+                # Like the other queues, a channel nobody sends on again
+                # just never delivers
+                await loop.create_future()
+            try:
+                self._append(await loop.sock_recv(self.receive_socket, self.RECEIVE_SIZE))
+            except OSError as e:
+                self._on_peer_closed(e)
+
+    def _append(self, data):
+        if data:
+            self.buffer += data
+        else:
+            self._on_peer_closed("end of stream")
+
+    def _on_peer_closed(self, reason):
+        if not self.is_peer_closed:
+            print(f"[SocketPairQueue] Channel was closed: {reason}")
+        self.is_peer_closed = True
+
+    def _encode_records(self, messages):
+        parts = []
+        for message in messages:
+            frames = [memoryview(frame).cast("B") for frame in self.codec.encode_frames(message)]
+            header = self.frame_count_struct.pack(len(frames)) + \
+                struct.pack(f"!{len(frames)}I", *(frame.nbytes for frame in frames))
+            parts.append(self.length_struct.pack(len(header) + sum(frame.nbytes for frame in frames)))
+            parts.append(header)
+            parts.extend(frames)
+        return b"".join(parts)
+
+    def _take_records(self, max_items):
+        """Decodes up to max_items complete records from the receive buffer."""
+        messages = []
+        offset = 0
+        while len(messages) < max_items and len(self.buffer) - offset >= self.length_struct.size:
+            length, = self.length_struct.unpack_from(self.buffer, offset)
+            start = offset + self.length_struct.size
+            if len(self.buffer) < start + length:
+                break
+            # Copied out, as decoded messages may keep views of their frames
+            messages.append(self._decode_record(bytes(self.buffer[start:start + length])))
+            offset = start + length
+        if offset:
+            del self.buffer[:offset]
+        return messages
+
+    def _decode_record(self, data):
+        data = memoryview(data)
+        frame_count, = self.frame_count_struct.unpack_from(data)
+        offset = self.frame_count_struct.size
+        lengths = struct.unpack_from(f"!{frame_count}I", data, offset)
+        offset += self.length_struct.size * frame_count
+        frames = []
+        for length in lengths:
+            frames.append(data[offset:offset + length])
+            offset += length
+        return self.codec.decode_frames(frames)
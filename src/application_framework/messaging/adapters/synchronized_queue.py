@@ -0,0 +1,60 @@
+import threading
+
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class SynchronizedQueue(MessageQueue):
+    """Wraps a queue and serializes the sync sends of several threads.
+
+    The channels expect a single producer: the shared memory ring updates its
+    indexes without a lock, and a bounded queue counts on its own sends to
+    track the depth. A sync service sends from both the thread that runs it
+    and the thread that serves its requests, so its channel to the
+    supervisor is wrapped in this queue. Receives pass straight through.
+    """
+    def __init__(self, queue):
+        self.queue = queue
+        self.send_lock = threading.Lock()
+
+    @property
+    def is_in_loop(self):
+        return self.queue.is_in_loop
+
+    async def send_async(self, message, loop):
+        await self.queue.send_async(message, loop)
+
+    async def receive_async(self, loop):
+        return await self.queue.receive_async(loop)
+
+    def send(self, message):
+        with self.send_lock:
+            self.queue.send(message)
+
+    def receive(self):
+        return self.queue.receive()
+
+    async def send_many_async(self, messages, loop):
+        await self.queue.send_many_async(messages, loop)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        return await self.queue.receive_many_async(loop, max_items, timeout)
+
+    def send_many(self, messages):
+        with self.send_lock:
+            self.queue.send_many(messages)
+
+    def receive_many(self, max_items, timeout=0):
+        return self.queue.receive_many(max_items, timeout)
+
+    async def flush_async(self, loop):
+        await self.queue.flush_async(loop)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def discard(self, count):
+        return self.queue.discard(count)
+
+    def close(self):
+        with self.send_lock:
+            self.queue.close()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+from collections import deque
+
+from application_framework.messaging.message_queue import MessageQueue
+
+
+class ThreadQueue(MessageQueue):
+    """In-process queue between threads, such as a supervisor on the host
+    loop and a service in one of the host's threads.
+
+    Messages are handed over as objects, like on the in-loop queue, and are
+    only encoded when a codec is given. Sync receivers wait on a condition.
+    Async receivers wait on a future of their own loop, which senders
+    resolve with ``call_soon_threadsafe()``.
+    """
+    def __init__(self, codec=None):
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.codec = codec
+
+    async def send_async(self, message, loop):
+        self.send_many([message])
+
+    async def receive_async(self, loop):
+        return (await self.receive_many_async(loop, 1))[0]
+
+    def send(self, message):
+        self.send_many([message])
+
+    def receive(self):
+        messages = self.receive_many(1)
+        return messages[0] if messages else None
+
+    async def send_many_async(self, messages, loop):
+        self.send_many(messages)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self.condition:
+                messages = self._take(max_items)
+                if messages:
+                    return messages
+                waiter = (loop, loop.create_future())
+                self.waiters.append(waiter)
+            remaining = None if deadline is None else deadline - loop.time()
+            try:
+                if remaining is not None and remaining <= 0:
+                    return []
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                with self.condition:
+                    if waiter in self.waiters:
+                        self.waiters.remove(waiter)
+
+    def send_many(self, messages):
+        with self.condition:
+            self.items.extend(self._encode(message) for message in messages)
+            # Work queues have several receivers
+            self.condition.notify(len(messages))
+            waiters, self.waiters = self.waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._wake, future)
+            except RuntimeError:
+                # The receiver's loop is closed, so nobody is waiting anymore
+                pass
+
+    def receive_many(self, max_items, timeout=0):
+        with self.condition:
+            if not self.items and timeout != 0:
+                self.condition.wait_for(lambda: self.items, timeout)
+            return self._take(max_items)
+
+    def qsize(self):
+        return len(self.items)
+
+    def discard(self, count):
+        with self.condition:
+            discarded = min(count, len(self.items))
+            for _ in range(discarded):
+                self.items.popleft()
+        return discarded
+
+    @staticmethod
+    def _wake(future):
+        if not future.done():
+            future.set_result(None)
+
+    def _take(self, max_items):
+        count = min(max_items, len(self.items))
+        return [self._decode(self.items.popleft()) for _ in range(count)]
+
+    def _encode(self, message):
+        return self.codec.encode_frames(message) if self.codec else message
+
+    def _decode(self, data):
+        return self.codec.decode_frames(data) if self.codec else data
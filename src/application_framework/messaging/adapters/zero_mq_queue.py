@@ -1,26 +1,163 @@
+import struct
+import threading
+
+from collections import deque
+
 import zmq
 import zmq.asyncio
 
-from application_framework.messaging.message import Message
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
 from application_framework.messaging.message_queue import MessageQueue
 
 
 class ZeroMQQueue(MessageQueue):
-    def __init__(self, address):
-        self.context = zmq.asyncio.Context()
-        self.socket = self.context.socket(zmq.PAIR)
-        self.socket.bind(address)
+    """PUSH/PULL queue over a ZeroMQ endpoint.
+
+    The receiving side binds and the sending side connects. Sockets are not
+    picklable and not thread-safe, so they are created lazily by whichever
+    process or thread uses each side of the queue. The async methods await
+    ``zmq.asyncio`` sockets directly.
+
+    A batch of messages travels as one multipart ZeroMQ message. Each encoded
+    message contributes a frame count followed by its frames, so attachments
+    are sent and received as separate frames without being copied into the
+    message body.
+    """
+    frame_count_struct = struct.Struct("!H")
+
+    def __init__(self, address, codec=None):
+        self.address = address
+        self.codec = codec or PickleCodec()
+        self.local = threading.local()
+        self.pending = deque()
+        # The sockets of all threads, so that close() can close them all
+        self.sockets = []
+        self.async_sockets = []
+        self.sockets_lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"address": self.address, "codec": self.codec}
+
+    def __setstate__(self, state):
+        self.__init__(state["address"], state["codec"])
 
     async def send_async(self, message, loop):
-        await loop.run_in_executor(None, self.socket.send_json, message.__dict__)
+        await self.send_many_async([message], loop)
 
     async def receive_async(self, loop):
-        message_dict = await loop.run_in_executor(None, self.socket.recv_json)
-        return Message(**message_dict)
+        if not self.pending:
+            socket = self._get_socket(zmq.PULL, is_async=True)
+            self._unpack(await socket.recv_multipart(copy=False))
+        return self.codec.decode_frames(self.pending.popleft())
 
     def send(self, message):
-        self.socket.send_json(message.__dict__)
+        self.send_many([message])
 
     def receive(self):
-        message_dict = self.socket.recv_json()
-        return Message(**message_dict)
+        messages = self.receive_many(1)
+        return messages[0] if messages else None
+
+    async def send_many_async(self, messages, loop):
+        socket = self._get_socket(zmq.PUSH, is_async=True)
+        await socket.send_multipart(self._pack(messages), copy=False)
+
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        if not self.pending:
+            socket = self._get_socket(zmq.PULL, is_async=True)
+            if await socket.poll(None if timeout is None else int(timeout * 1000)):
+                await self._drain_async(socket, max_items)
+        return self._take_pending(max_items)
+
+    def send_many(self, messages):
+        socket = self._get_socket(zmq.PUSH)
+        socket.send_multipart(self._pack(messages), copy=False)
+
+    def receive_many(self, max_items, timeout=0):
+        if not self.pending:
+            socket = self._get_socket(zmq.PULL)
+            if socket.poll(None if timeout is None else int(timeout * 1000)):
+                self._drain(socket, max_items)
+        return self._take_pending(max_items)
+
+    def close(self):
+        """Closes the sockets that any thread of this process opened. Call it
+        once the threads are done with the queue, as the sockets are not
+        thread-safe."""
+        with self.sockets_lock:
+            sockets, self.sockets = self.sockets, []
+            async_sockets, self.async_sockets = self.async_sockets, []
+            # Threads that use the queue again open new sockets
+            self.local = threading.local()
+        # An async socket must be closed itself to unregister it from its
+        # event loop, which would otherwise keep watching the descriptor
+        # after a new socket reused it. That also closes the shadowed socket.
+        for socket in async_sockets:
+            try:
+                socket.close(linger=0)
+            except Exception as e:
+                print(f"[ZeroMQQueue] Could not close socket: {e}")
+        for socket in sockets:
+            if not socket.closed:
+                socket.close(linger=0)
+
+    def _drain(self, socket, max_items):
+        try:
+            while len(self.pending) < max_items:
+                self._unpack(socket.recv_multipart(zmq.NOBLOCK, copy=False))
+        except zmq.Again:
+            pass
+
+    async def _drain_async(self, socket, max_items):
+        try:
+            while len(self.pending) < max_items:
+                self._unpack(await socket.recv_multipart(zmq.NOBLOCK, copy=False))
+        except zmq.Again:
+            pass
+
+    def _take_pending(self, max_items):
+        count = min(max_items, len(self.pending))
+        return [self.codec.decode_frames(self.pending.popleft()) for _ in range(count)]
+
+    def _pack(self, messages):
+        parts = []
+        for message in messages:
+            frames = self.codec.encode_frames(message)
+            parts.append(self.frame_count_struct.pack(len(frames)))
+            parts.extend(frames)
+        return parts
+
+    def _unpack(self, parts):
+        """Splits received ZeroMQ frames into per-message frame lists."""
+        index = 0
+        while index < len(parts):
+            frame_count, = self.frame_count_struct.unpack(parts[index].buffer)
+            frames = parts[index + 1:index + 1 + frame_count]
+            self.pending.append([frame.buffer for frame in frames])
+            index += 1 + frame_count
+
+    def _get_socket(self, socket_type, is_async=False):
+        if not hasattr(self.local, "sockets"):
+            self.local.sockets = {}
+            self.local.async_sockets = {}
+        socket = self.local.sockets.get(socket_type)
+        if socket is None:
+            socket = self.local.sockets[socket_type] = self._open(socket_type)
+            with self.sockets_lock:
+                self.sockets.append(socket)
+        if not is_async:
+            return socket
+        # The async socket shadows the sync one, so both styles share a binding
+        async_socket = self.local.async_sockets.get(socket_type)
+        if async_socket is None:
+            async_socket = self.local.async_sockets[socket_type] = zmq.asyncio.Socket.from_socket(socket)
+            with self.sockets_lock:
+                self.async_sockets.append(async_socket)
+        return async_socket
+
+    def _open(self, socket_type):
+        socket = zmq.Context.instance().socket(socket_type)
+        if socket_type == zmq.PULL:
+            socket.bind(self.address)
+        else:
+            socket.connect(self.address)
+        return socket
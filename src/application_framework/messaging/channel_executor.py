@@ -0,0 +1,127 @@
+import os
+import threading
+
+from concurrent.futures import Executor, Future
+from queue import Empty, SimpleQueue
+from typing import NamedTuple
+
+
+class ChannelExecutorUsage(NamedTuple):
+    """Threads of a channel executor, and how many were busy running calls."""
+    threads: int
+    busy: int
+    peak_busy: int
+    pending: int
+    calls: int
+
+
+class ChannelExecutor(Executor):
+    """Runs the blocking calls of channels, such as a receive waiting on a
+    Manager queue, apart from the event loop's default executor.
+
+    A blocked receive holds its thread until a message arrives, so a pool of
+    fixed size fills up with waiting receives and the calls queued behind
+    them stall. This executor starts another thread whenever no thread is
+    idle, up to max_workers, and ends threads that have been idle for
+    IDLE_TIMEOUT seconds. Without max_workers, it starts as many threads as
+    a ThreadPoolExecutor would, like the default executors of event loops.
+
+    There is one instance per process, shared by the event loops in it. An
+    instance that was shut down is replaced on the next get_instance(), so
+    another host can run in the same process.
+    """
+    IDLE_TIMEOUT = 60
+    # The default of ThreadPoolExecutor
+    DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+    instance = None
+    instance_lock = threading.Lock()
+    # For the instances created from now on, here and in forked processes
+    default_max_workers = None
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self.pid = os.getpid()
+        self.work_items = SimpleQueue()
+        self.lock = threading.Lock()
+        self.threads = set()
+        self.busy_count = 0
+        self.peak_busy_count = 0
+        self.pending_count = 0
+        self.call_count = 0
+        self.is_shutdown = False
+
+    @classmethod
+    def get_instance(cls):
+        """Returns the executor of the calling process."""
+        with cls.instance_lock:
+            # An instance inherited through fork has no threads in this process
+            if cls.instance is None or cls.instance.pid != os.getpid() or cls.instance.is_shutdown:
+                cls.instance = cls(cls.default_max_workers)
+            return cls.instance
+
+    @classmethod
+    def set_default_max_workers(cls, max_workers):
+        """Limits the threads of the executor of this process, and of the
+        processes forked from it from now on. None sets DEFAULT_MAX_WORKERS."""
+        with cls.instance_lock:
+            cls.default_max_workers = max_workers
+            if cls.instance is not None and cls.instance.pid == os.getpid():
+                with cls.instance.lock:
+                    cls.instance.max_workers = max_workers or cls.DEFAULT_MAX_WORKERS
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self.lock:
+            if self.is_shutdown:
+                raise RuntimeError("Cannot schedule new calls after shutdown")
+            self.pending_count += 1
+            self.call_count += 1
+            self.work_items.put((future, fn, args, kwargs))
+            idle_count = len(self.threads) - self.busy_count - self.pending_count
+            if idle_count < 0 and len(self.threads) < self.max_workers:
+                thread = threading.Thread(target=self._run_worker, daemon=True)
+                self.threads.add(thread)
+                thread.start()
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self.lock:
+            self.is_shutdown = True
+            threads = list(self.threads)
+        for _ in threads:
+            self.work_items.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def usage(self):
+        with self.lock:
+            return ChannelExecutorUsage(len(self.threads), self.busy_count, self.peak_busy_count,
+                                        self.pending_count, self.call_count)
+
+    def _run_worker(self):
+        while True:
+            try:
+                work_item = self.work_items.get(timeout=self.IDLE_TIMEOUT)
+            except Empty:
+                with self.lock:
+                    # Only a thread beyond those the pending calls need may end
+                    if len(self.threads) - self.busy_count - self.pending_count > 0:
+                        self.threads.discard(threading.current_thread())
+                        return
+                continue
+            if work_item is None:
+                return
+            future, fn, args, kwargs = work_item
+            with self.lock:
+                self.pending_count -= 1
+                self.busy_count += 1
+                self.peak_busy_count = max(self.peak_busy_count, self.busy_count)
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            with self.lock:
+                self.busy_count -= 1
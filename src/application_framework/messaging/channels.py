@@ -1,6 +1,13 @@
 class Channels:
-    def __init__(self, host_to_supervisor, supervisor_to_host, supervisor_to_service, service_to_supervisor):
+    def __init__(self, host_to_supervisor, supervisor_to_host, supervisor_to_service, service_to_supervisor, event_bus=None, work_queues=None):
         self.host_to_supervisor = host_to_supervisor
         self.supervisor_to_host = supervisor_to_host
         self.supervisor_to_service = supervisor_to_service
         self.service_to_supervisor = service_to_supervisor
+        self.event_bus = event_bus
+        self.work_queues = work_queues
+
+    def for_service(self):
+        """Returns the channels a service needs, leaving out the host's in-loop queues."""
+        return Channels(None, None, self.supervisor_to_service, self.service_to_supervisor,
+                        self.event_bus, self.work_queues)
@@ -0,0 +1,39 @@
+import uuid
+
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.messaging.message_codec import MessageCodec
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MsgPackCodec(MessageCodec):
+    """Encodes messages as msgpack arrays. Requires the ``msgpack`` package."""
+    UUID_EXT_TYPE = 1
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("MsgPackCodec requires the msgpack package")
+
+    def encode(self, message):
+        return msgpack.packb([message.sender, message.content, list(message.attachments), int(message.kind),
+                              message.correlation_id, message.subject, message.target],
+                             default=self._default)
+
+    def decode(self, data):
+        sender, content, attachments, kind, correlation_id, subject, target = \
+            msgpack.unpackb(data, ext_hook=self._ext_hook)
+        return Message(sender=sender, content=content, attachments=tuple(attachments), kind=MessageKind(kind),
+                       correlation_id=correlation_id, subject=subject, target=target)
+
+    def _default(self, value):
+        if isinstance(value, uuid.UUID):
+            return msgpack.ExtType(self.UUID_EXT_TYPE, value.bytes)
+        raise TypeError(f"Cannot encode {type(value).__name__} with msgpack")
+
+    def _ext_hook(self, code, data):
+        if code == self.UUID_EXT_TYPE:
+            return uuid.UUID(bytes=data)
+        return msgpack.ExtType(code, data)
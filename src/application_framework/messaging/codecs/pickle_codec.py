@@ -0,0 +1,43 @@
+import pickle
+
+from application_framework.messaging.message_codec import MessageCodec
+
+try:
+    from pickle import PickleBuffer
+except ImportError:  # Python < 3.8
+    PickleBuffer = None
+
+
+class PickleCodec(MessageCodec):
+    """Pickles messages. With protocol 5, attachments and any other
+    ``PickleBuffer`` in the message are carried as out-of-band frames."""
+    def __init__(self, protocol=min(5, pickle.HIGHEST_PROTOCOL)):
+        self.protocol = protocol
+
+    def encode(self, message):
+        return pickle.dumps(self._wrap_attachments(message), protocol=self.protocol)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+    def encode_frames(self, message):
+        if self.protocol < 5:
+            return super().encode_frames(message)
+        buffers = []
+        body = pickle.dumps(self._wrap_attachments(message), protocol=self.protocol,
+                            buffer_callback=buffers.append)
+        return [body] + [buffer.raw() for buffer in buffers]
+
+    def decode_frames(self, frames):
+        if self.protocol < 5:
+            return super().decode_frames(frames)
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+    def _wrap_attachments(self, message):
+        if not message.attachments:
+            return message
+        if PickleBuffer is not None and self.protocol >= 5:
+            attachments = tuple(PickleBuffer(attachment) for attachment in message.attachments)
+        else:
+            attachments = tuple(bytes(attachment) for attachment in message.attachments)
+        return message._replace(attachments=attachments)
@@ -0,0 +1,110 @@
+import pickle
+import struct
+import uuid
+
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.messaging.message_codec import MessageCodec
+
+
+class StructCodec(MessageCodec):
+    """Encodes messages with a fixed binary header, holding the message kind,
+    correlation id, content type and field lengths, followed by the fields
+    and length-prefixed attachments.
+
+    String content is encoded as UTF-8 and bytes are passed through. Other
+    content, such as the results of RPC calls, is pickled. Subjects must be
+    strings, and senders and targets strings or UUIDs.
+    """
+    ADDRESS_STR = 0
+    ADDRESS_UUID = 1
+    ADDRESS_NONE = 2
+    CONTENT_STR = 0
+    CONTENT_NONE = 1
+    CONTENT_BYTES = 2
+    CONTENT_PICKLE = 3
+    NO_CORRELATION_ID = -1
+    NO_SUBJECT = 0xFFFF
+
+    header_struct = struct.Struct("!BqBHBHHBIH")
+    length_struct = struct.Struct("!I")
+
+    def encode(self, message):
+        sender_type, sender = self._encode_address(message.sender)
+        target_type, target = self._encode_address(message.target)
+        subject = b"" if message.subject is None else message.subject.encode("utf-8")
+        content_type, content = self._encode_content(message.content)
+        correlation_id = self.NO_CORRELATION_ID if message.correlation_id is None else message.correlation_id
+        parts = [
+            self.header_struct.pack(
+                message.kind, correlation_id,
+                sender_type, len(sender),
+                target_type, len(target),
+                self.NO_SUBJECT if message.subject is None else len(subject),
+                content_type, len(content), len(message.attachments)),
+            sender,
+            target,
+            subject,
+            content,
+        ]
+        for attachment in message.attachments:
+            attachment = memoryview(attachment)
+            parts.append(self.length_struct.pack(attachment.nbytes))
+            parts.append(attachment)
+        return b"".join(parts)
+
+    def decode(self, data):
+        kind, correlation_id, sender_type, sender_length, target_type, target_length, subject_length, \
+            content_type, content_length, attachment_count = self.header_struct.unpack_from(data)
+        offset = self.header_struct.size
+        sender = self._decode_address(sender_type, data[offset:offset + sender_length])
+        offset += sender_length
+        target = self._decode_address(target_type, data[offset:offset + target_length])
+        offset += target_length
+        if subject_length == self.NO_SUBJECT:
+            subject = None
+        else:
+            subject = bytes(data[offset:offset + subject_length]).decode("utf-8")
+            offset += subject_length
+        content = self._decode_content(content_type, data[offset:offset + content_length])
+        offset += content_length
+        attachments = []
+        for _ in range(attachment_count):
+            length, = self.length_struct.unpack_from(data, offset)
+            offset += self.length_struct.size
+            attachments.append(bytes(data[offset:offset + length]))
+            offset += length
+        return Message(sender=sender, content=content, attachments=tuple(attachments), kind=MessageKind(kind),
+                       correlation_id=None if correlation_id == self.NO_CORRELATION_ID else correlation_id,
+                       subject=subject, target=target)
+
+    def _encode_address(self, address):
+        if address is None:
+            return self.ADDRESS_NONE, b""
+        if isinstance(address, uuid.UUID):
+            return self.ADDRESS_UUID, address.bytes
+        return self.ADDRESS_STR, address.encode("utf-8")
+
+    def _decode_address(self, address_type, data):
+        if address_type == self.ADDRESS_NONE:
+            return None
+        if address_type == self.ADDRESS_UUID:
+            return uuid.UUID(bytes=bytes(data))
+        return bytes(data).decode("utf-8")
+
+    def _encode_content(self, content):
+        if isinstance(content, str):
+            return self.CONTENT_STR, content.encode("utf-8")
+        if content is None:
+            return self.CONTENT_NONE, b""
+        if isinstance(content, bytes):
+            return self.CONTENT_BYTES, content
+        return self.CONTENT_PICKLE, pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _decode_content(self, content_type, data):
+        if content_type == self.CONTENT_STR:
+            return bytes(data).decode("utf-8")
+        if content_type == self.CONTENT_NONE:
+            return None
+        if content_type == self.CONTENT_BYTES:
+            return bytes(data)
+        return pickle.loads(data)
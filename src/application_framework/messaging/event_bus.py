@@ -0,0 +1,292 @@
+import inspect
+import os
+import struct
+import threading
+import uuid
+
+from collections import deque
+
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message import Message, MessageKind
+
+
+class EventBus:
+    """Publish/subscribe bus shared by the services of a host.
+
+    There is one bus instance per process. An event is handed directly to
+    the subscribers in the publishing process, without being encoded: async
+    subscribers get it on their own event loop, sync subscribers on the
+    publishing thread. When the host runs process services, the event is
+    also encoded once and published over ZeroMQ through a proxy in the host.
+    Each other process receives it once and fans it out to its local
+    subscribers on a receiver thread.
+
+    The host starts the proxy when the bus is first used in any process, so
+    hosts whose services never publish or subscribe do not run it. Like
+    ZeroMQ PUB/SUB, delivery across processes is best effort: events
+    published before a subscription reached the proxy are not delivered.
+    ZeroMQ is only imported by processes that take part in that.
+    """
+    instances = {}
+    pid_struct = struct.Struct("!Q")
+
+    def __init__(self, bus_id=None, publish_address=None, subscribe_address=None, codec=None):
+        self.bus_id = bus_id or uuid.uuid4().hex
+        self.publish_address = publish_address
+        self.subscribe_address = subscribe_address
+        self.codec = codec or PickleCodec()
+        self.pid = os.getpid()
+        self.pid_frame = self.pid_struct.pack(self.pid)
+        self.subscriptions = {}
+        self.subscriptions_lock = threading.Lock()
+        self.topic_changes = deque()
+        self.publisher = None
+        self.publisher_lock = threading.Lock()
+        self.is_closed = False
+        self.receiver_thread = None
+        # Wakes the receiver to apply topic changes or to stop
+        self.receiver_control = None
+        self.receiver_control_lock = threading.Lock()
+        # Only the host's instance owns the proxy, and starts it on first use
+        self.is_proxy_owner = False
+        self.proxy_thread = None
+        self.proxy_lock = threading.Lock()
+        self.proxy_control_address = None
+        self.proxy_error = None
+        EventBus.instances[self.bus_id] = self
+
+    @classmethod
+    def get_instance(cls, bus_id, publish_address, subscribe_address, codec):
+        """Returns the bus instance of the calling process."""
+        instance = cls.instances.get(bus_id)
+        # An instance inherited through fork belongs to the parent process
+        if instance is None or instance.pid != os.getpid():
+            instance = cls(bus_id, publish_address, subscribe_address, codec)
+        return instance
+
+    def __reduce__(self):
+        return EventBus.get_instance, (self.bus_id, self.publish_address, self.subscribe_address, self.codec)
+
+    def enable_forwarding(self, ipc_directory):
+        """Sets the addresses that events are forwarded between processes
+        over. Only the host's instance is enabled, before the services get
+        the bus, and it starts the proxy when the bus is first used."""
+        self.publish_address = f"ipc://{os.path.join(ipc_directory, f'{self.bus_id}_publish')}"
+        self.subscribe_address = f"ipc://{os.path.join(ipc_directory, f'{self.bus_id}_subscribe')}"
+        self.proxy_control_address = f"inproc://{self.bus_id}_control"
+        self.is_proxy_owner = True
+        # Topics subscribed before forwarding was enabled still need the
+        # receiver
+        if self.subscriptions:
+            with self.subscriptions_lock:
+                self.topic_changes.extend((True, topic) for topic in self.subscriptions)
+            self.start_proxy()
+            self._ensure_receiver()
+
+    def start_proxy(self):
+        """Starts the proxy that forwards events between processes, unless
+        it already runs."""
+        with self.proxy_lock:
+            if self.proxy_thread is not None:
+                return
+            # Imported here, so that a missing pyzmq raises to the caller
+            # rather than ending the proxy thread
+            import zmq  # noqa: F401
+            started = threading.Event()
+            self.proxy_error = None
+            self.proxy_thread = threading.Thread(target=self._run_proxy, args=(started,), daemon=True)
+            self.proxy_thread.start()
+            started.wait()
+            if self.proxy_error is not None:
+                # Lets a later use of the bus try again
+                self.proxy_thread.join()
+                self.proxy_thread = None
+                raise self.proxy_error
+        with self.publisher_lock:
+            self._get_publisher()
+
+    @property
+    def is_forwarding_enabled(self):
+        return self.publish_address is not None
+
+    def publish(self, topic, payload=None, sender=None):
+        message = Message(sender=sender, content=payload, kind=MessageKind.EVENT, subject=topic)
+        self._dispatch(message)
+        if self.publish_address:
+            self._ensure_forwarding()
+            frames = [self._topic_frame(topic), self.pid_frame] + self.codec.encode_frames(message)
+            with self.publisher_lock:
+                self._get_publisher().send_multipart(frames, copy=False)
+
+    def subscribe(self, topic, handler, loop=None):
+        """Calls handler with every event message published to topic. The
+        handler is called on loop if given, and may return an awaitable."""
+        with self.subscriptions_lock:
+            subscribers = self.subscriptions.get(topic, ())
+            self.subscriptions[topic] = subscribers + ((handler, loop),)
+            is_new_topic = not subscribers
+            if is_new_topic and self.subscribe_address:
+                self.topic_changes.append((True, topic))
+        if self.subscribe_address:
+            self._ensure_forwarding()
+            self._ensure_receiver()
+            if is_new_topic:
+                self._notify_receiver()
+
+    def unsubscribe(self, topic, handler):
+        with self.subscriptions_lock:
+            subscribers = tuple(s for s in self.subscriptions.get(topic, ()) if s[0] != handler)
+            is_removed_topic = False
+            if subscribers:
+                self.subscriptions[topic] = subscribers
+            elif self.subscriptions.pop(topic, None) and self.subscribe_address:
+                self.topic_changes.append((False, topic))
+                is_removed_topic = True
+        if is_removed_topic:
+            self._notify_receiver()
+
+    def close(self):
+        self.is_closed = True
+        with self.publisher_lock:
+            if self.publisher is not None:
+                self.publisher.close(linger=0)
+                self.publisher = None
+        if self.receiver_thread is not None:
+            self._notify_receiver()
+            self.receiver_thread.join()
+            with self.receiver_control_lock:
+                self.receiver_control.close(linger=0)
+                self.receiver_control = None
+        if self.proxy_thread is not None:
+            import zmq
+            control = zmq.Context.instance().socket(zmq.PAIR)
+            control.connect(self.proxy_control_address)
+            control.send(b"TERMINATE")
+            self.proxy_thread.join()
+            control.close(linger=0)
+
+    def _dispatch(self, message):
+        for handler, loop in self.subscriptions.get(message.subject, ()):
+            try:
+                if loop is None:
+                    handler(message)
+                else:
+                    loop.call_soon_threadsafe(self._invoke, handler, message, loop)
+            except RuntimeError as e:
+                # The subscriber's loop is closed, so the service has ended
+                print(f"[EventBus] Removing subscriber of '{message.subject}': {e}")
+                self.unsubscribe(message.subject, handler)
+            except Exception as e:
+                print(f"[EventBus] Error in subscriber of '{message.subject}': {e}")
+
+    def _invoke(self, handler, message, loop):
+        try:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                loop.create_task(result)
+        except Exception as e:
+            print(f"[EventBus] Error in subscriber of '{message.subject}': {e}")
+
+    def _topic_frame(self, topic):
+        # The terminator keeps ZeroMQ's prefix matching from matching longer topics
+        return topic.encode("utf-8") + b"\0"
+
+    def _ensure_forwarding(self):
+        if self.publisher is not None:
+            return
+        if self.is_proxy_owner:
+            self.start_proxy()
+        else:
+            # Connecting on first use rather than on the first publish gives
+            # the connection time to come up, as events published before it
+            # did are dropped
+            with self.publisher_lock:
+                self._get_publisher()
+
+    def _get_publisher(self):
+        # One socket per process, shared by its publishing threads under
+        # publisher_lock
+        if self.publisher is None:
+            import zmq
+            self.publisher = zmq.Context.instance().socket(zmq.PUB)
+            self.publisher.connect(self.publish_address)
+        return self.publisher
+
+    def _ensure_receiver(self):
+        with self.subscriptions_lock:
+            if self.receiver_thread is None:
+                self.receiver_thread = threading.Thread(target=self._run_receiver, daemon=True)
+                self.receiver_thread.start()
+
+    def _notify_receiver(self):
+        """Wakes the receiver thread, if it runs, to apply the topic changes
+        and to check whether the bus was closed."""
+        if self.receiver_thread is None:
+            return
+        import zmq
+        with self.receiver_control_lock:
+            if self.receiver_control is None:
+                # Connecting before the receiver has bound is fine in-process
+                self.receiver_control = zmq.Context.instance().socket(zmq.PUSH)
+                self.receiver_control.connect(self._receiver_control_address())
+            self.receiver_control.send(b"")
+
+    def _receiver_control_address(self):
+        return f"inproc://{self.bus_id}_receiver_control"
+
+    def _run_receiver(self):
+        import zmq
+        context = zmq.Context.instance()
+        socket = context.socket(zmq.SUB)
+        socket.connect(self.subscribe_address)
+        control = context.socket(zmq.PULL)
+        control.bind(self._receiver_control_address())
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        poller.register(control, zmq.POLLIN)
+        try:
+            while not self.is_closed:
+                while self.topic_changes:
+                    is_subscribe, topic = self.topic_changes.popleft()
+                    socket.setsockopt(zmq.SUBSCRIBE if is_subscribe else zmq.UNSUBSCRIBE, self._topic_frame(topic))
+                # Sleeps until an event or a wakeup arrives
+                events = dict(poller.poll())
+                if control in events:
+                    control.recv()
+                if socket not in events:
+                    continue
+                frames = socket.recv_multipart(copy=False)
+                # Events from this process were already dispatched when published
+                if frames[1].bytes == self.pid_frame:
+                    continue
+                self._dispatch(self.codec.decode_frames([frame.buffer for frame in frames[2:]]))
+        except Exception as e:
+            print(f"[EventBus] Receiver stopped: {e}")
+        finally:
+            socket.close(linger=0)
+            control.close(linger=0)
+
+    def _run_proxy(self, started):
+        import zmq
+        context = zmq.Context.instance()
+        sockets = []
+        try:
+            for socket_type, address in [(zmq.XSUB, self.publish_address), (zmq.XPUB, self.subscribe_address),
+                                         (zmq.PAIR, self.proxy_control_address)]:
+                sockets.append(context.socket(socket_type))
+                sockets[-1].bind(address)
+        except Exception as e:
+            # Such as an address in use or an ipc path that is too long.
+            # start_proxy() raises it to its caller.
+            self.proxy_error = e
+            for socket in sockets:
+                socket.close(linger=0)
+            started.set()
+            return
+        started.set()
+        frontend, backend, control = sockets
+        try:
+            zmq.proxy_steerable(frontend, backend, None, control)
+        finally:
+            for socket in sockets:
+                socket.close(linger=0)
@@ -1,7 +1,59 @@
-from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, NamedTuple
 
 
-@dataclass
-class Message:
-    sender: str
-    content: str
+class MessageKind(IntEnum):
+    DATA = 0
+    START = 1
+    STOP = 2
+    STARTED = 3
+    STOPPED = 4
+    CRASHED = 5
+    REQUEST = 6
+    RESPONSE = 7
+    ERROR = 8
+    EVENT = 9
+    # Asks the host to start forwarding events between processes
+    FORWARD_EVENTS = 10
+
+
+CONTROL_KINDS = frozenset([
+    MessageKind.START,
+    MessageKind.STOP,
+    MessageKind.STARTED,
+    MessageKind.STOPPED,
+    MessageKind.CRASHED,
+    MessageKind.FORWARD_EVENTS,
+])
+
+
+class Message(NamedTuple):
+    """An immutable message. Being a named tuple it has no per-instance
+    ``__dict__``, and instances can safely be shared, such as the
+    preallocated control messages below. Use ``_replace()`` to derive a
+    modified copy.
+
+    Requests carry the called method in ``subject`` and the service they are
+    addressed to in ``target``. Responses carry the ``correlation_id`` of
+    their request. Events carry their topic in ``subject``."""
+    sender: Any
+    content: Any = ""
+    attachments: tuple = ()
+    kind: MessageKind = MessageKind.DATA
+    correlation_id: int = None
+    subject: str = None
+    target: Any = None
+
+    @property
+    def is_control(self):
+        return self.kind in CONTROL_KINDS
+
+    @classmethod
+    def control(cls, sender, kind):
+        """Creates a control message of the given kind."""
+        return cls(sender=sender, kind=kind)
+
+
+HOST_STOP_MESSAGE = Message.control("host", MessageKind.STOP)
+SUPERVISOR_START_MESSAGE = Message.control("supervisor", MessageKind.START)
+SUPERVISOR_STOP_MESSAGE = Message.control("supervisor", MessageKind.STOP)
@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+
+
+class MessageCodec(ABC):
+    @abstractmethod
+    def encode(self, message):
+        """Encodes a message, including its attachments, into bytes."""
+        pass
+
+    @abstractmethod
+    def decode(self, data):
+        """Decodes bytes produced by encode() back into a message."""
+        pass
+
+    def encode_frames(self, message):
+        """Encodes a message into a list of frames: the encoded body followed
+        by the attachment buffers, which are passed through without copying."""
+        if not message.attachments:
+            return [self.encode(message)]
+        body = self.encode(message._replace(attachments=()))
+        return [body] + [memoryview(attachment) for attachment in message.attachments]
+
+    def decode_frames(self, frames):
+        """Decodes frames produced by encode_frames() back into a message."""
+        message = self.decode(frames[0])
+        if len(frames) > 1:
+            message = message._replace(attachments=tuple(frames[1:]))
+        return message
@@ -4,6 +4,9 @@ from application_framework.messaging.message import Message
 
 
 class MessageQueue(ABC):
+    # Whether the queue is drained by the event loop of its sender
+    is_in_loop = False
+
     @abstractmethod
     async def send_async(self, message, loop):
         pass
@@ -19,3 +22,43 @@ class MessageQueue(ABC):
     @abstractmethod
     def receive(self):
         pass
+
+    @abstractmethod
+    async def send_many_async(self, messages, loop):
+        """Sends a batch of messages, paying the per-call transport cost once."""
+        pass
+
+    @abstractmethod
+    async def receive_many_async(self, loop, max_items, timeout=None):
+        """Waits up to timeout seconds (forever if None) for a message and
+        returns it together with the messages already available, at most
+        max_items in total. Returns an empty list on timeout."""
+        pass
+
+    @abstractmethod
+    def send_many(self, messages):
+        """Sends a batch of messages, paying the per-call transport cost once."""
+        pass
+
+    @abstractmethod
+    def receive_many(self, max_items, timeout=0):
+        """Waits up to timeout seconds (forever if None) for a message and
+        returns it together with the messages already available, at most
+        max_items in total. Returns an empty list on timeout."""
+        pass
+
+    async def flush_async(self, loop):
+        """Sends the messages the queue holds back, if any."""
+        pass
+
+    def qsize(self):
+        """Returns the number of queued messages."""
+        raise NotImplementedError(f"{type(self).__name__} does not report its depth")
+
+    def discard(self, count):
+        """Discards up to count of the oldest queued messages from the sending
+        side and returns the number discarded."""
+        raise NotImplementedError(f"{type(self).__name__} cannot discard messages")
+
+    def close(self):
+        pass
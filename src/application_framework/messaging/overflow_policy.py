@@ -0,0 +1,15 @@
+class OverflowPolicy:
+    BLOCK = 'Block'
+    DROP_OLDEST = 'DropOldest'
+    DROP_NEWEST = 'DropNewest'
+    FAIL_FAST = 'FailFast'
+
+    def __init__(self, policy=BLOCK, capacity=1024, high_watermark=None, low_watermark=None):
+        self.policy = policy
+        self.capacity = capacity
+        self.high_watermark = capacity if high_watermark is None else high_watermark
+        self.low_watermark = self.high_watermark // 2 if low_watermark is None else low_watermark
+        if capacity < 1:
+            raise ValueError("Channel capacity must be at least 1")
+        if not 0 <= self.low_watermark <= self.high_watermark <= capacity:
+            raise ValueError("Watermarks must satisfy 0 <= low_watermark <= high_watermark <= capacity")
@@ -0,0 +1,64 @@
+import asyncio
+import itertools
+
+from application_framework.messaging.message import Message, MessageKind
+
+
+class RpcError(Exception):
+    """Raised by call_async() when the called method failed or could not be
+    reached."""
+    pass
+
+
+class RpcClient:
+    """Sends requests and resolves their futures from the responses, which
+    the receive loop of the channel hands to resolve().
+
+    Requests are matched to responses by correlation id, so any number of
+    calls can be outstanding at once, up to max_in_flight. Further calls
+    wait for a slot.
+    """
+    def __init__(self, max_in_flight=64):
+        self.max_in_flight = max_in_flight
+        self.correlation_ids = itertools.count(1)
+        self.pending = {}
+        self.semaphore = None
+
+    async def call_async(self, queue, loop, sender, target, method, payload=None, timeout=None):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self.semaphore:
+            correlation_id = next(self.correlation_ids)
+            future = loop.create_future()
+            self.pending[correlation_id] = future
+            try:
+                await queue.send_async(Message(
+                    sender=sender,
+                    content=payload,
+                    kind=MessageKind.REQUEST,
+                    correlation_id=correlation_id,
+                    subject=method,
+                    target=target,
+                ), loop)
+                return await asyncio.wait_for(future, timeout)
+            finally:
+                del self.pending[correlation_id]
+
+    def resolve(self, message):
+        future = self.pending.get(message.correlation_id)
+        if future is None or future.done():
+            print(f"[RpcClient] Response to unknown or expired request, dropping: {message}")
+        elif message.kind == MessageKind.ERROR:
+            future.set_exception(RpcError(message.content))
+        else:
+            future.set_result(message.content)
+
+    @staticmethod
+    def create_response(request, sender, result):
+        return Message(sender=sender, content=result, kind=MessageKind.RESPONSE,
+                       correlation_id=request.correlation_id, subject=request.subject, target=request.sender)
+
+    @staticmethod
+    def create_error(request, sender, error):
+        return Message(sender=sender, content=error, kind=MessageKind.ERROR,
+                       correlation_id=request.correlation_id, subject=request.subject, target=request.sender)
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class Transport(Enum):
+    DEFAULT = 'default'
+    ZERO_MQ = 'zero_mq'
+    SOCKET_PAIR = 'socket_pair'
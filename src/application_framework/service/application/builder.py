@@ -1,7 +1,10 @@
+import os
 import uuid
 
 from dependency_injection.container import DependencyContainer
 
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from application_framework.service.scheduling_policy import SchedulingPolicy
 from application_framework.service.service_config import ServiceConfig
 from application_framework.supervisor.restart_strategy import RestartStrategy
 
@@ -15,6 +18,18 @@ class ApplicationBuilder:
         self.routes = []
         self.application_class = None
         self.restart_strategy = RestartStrategy()
+        self.codec = None
+        self.coalescing_window = None
+        self.overflow_policy = None
+        self.priority_lanes = False
+        self.max_control_burst = 16
+        self.max_in_flight_calls = 64
+        self.stop_timeout = 30
+        self.dependencies = []
+        self.replicas = None
+        self.gc_enabled = True
+        self.gc_thresholds = None
+        self.scheduling_policy = None
         self.container = DependencyContainer.get_instance(f"{self.service_id}_initial")
 
     def set_root_directory(self, root_directory):
@@ -35,11 +50,15 @@ class ApplicationBuilder:
 
     def set_application_class(self, application_class):
         self.application_class = application_class
-        self.container.register_singleton(self.application_class)
+        # Each run of the service, such as after a restart, gets a new
+        # instance, while the singletons it depends on are kept
+        self.container.register_transient(self.application_class)
         return self
 
-    def set_restart_strategy(self, strategy, fixed_backoff_time=5, max_backoff_time=60, max_jitter=5):
-        self.restart_strategy = RestartStrategy(strategy, fixed_backoff_time, max_backoff_time, max_jitter)
+    def set_restart_strategy(self, strategy, fixed_backoff_time=5, max_backoff_time=60, max_jitter=5, max_restarts=None,
+                             restart_period=60, stable_period=30):
+        self.restart_strategy = RestartStrategy(strategy, fixed_backoff_time, max_backoff_time, max_jitter,
+                                                max_restarts, restart_period, stable_period)
         return self
 
     def set_fixed_backoff_time(self, fixed_backoff_time):
@@ -54,6 +73,52 @@ class ApplicationBuilder:
         self.max_jitter = max_jitter
         return self
 
+    def set_codec(self, codec):
+        self.codec = codec
+        return self
+
+    def set_coalescing_window(self, coalescing_window):
+        self.coalescing_window = coalescing_window
+        return self
+
+    def set_overflow_policy(self, policy, capacity=1024, high_watermark=None, low_watermark=None):
+        self.overflow_policy = OverflowPolicy(policy, capacity, high_watermark, low_watermark)
+        return self
+
+    def set_priority_lanes(self, max_control_burst=16):
+        self.priority_lanes = True
+        self.max_control_burst = max_control_burst
+        return self
+
+    def set_max_in_flight_calls(self, max_in_flight_calls):
+        self.max_in_flight_calls = max_in_flight_calls
+        return self
+
+    def set_stop_timeout(self, stop_timeout):
+        self.stop_timeout = stop_timeout
+        return self
+
+    def add_dependency(self, name):
+        self.dependencies.append(name)
+        return self
+
+    def set_replicas(self, replicas):
+        if replicas == "auto":
+            replicas = os.cpu_count() or 1
+        if not isinstance(replicas, int) or replicas < 1:
+            raise ValueError("Replicas must be a positive integer or 'auto'")
+        self.replicas = replicas
+        return self
+
+    def set_gc(self, enabled=True, thresholds=None):
+        self.gc_enabled = enabled
+        self.gc_thresholds = thresholds
+        return self
+
+    def set_scheduling_policy(self, cpu_affinity=None, nice=None, io_class=None, io_level=4, exclusive_cpus=False):
+        self.scheduling_policy = SchedulingPolicy(cpu_affinity, nice, io_class, io_level, exclusive_cpus)
+        return self
+
     def register_instance(self, *args, **kwargs):
         self.container.register_instance(*args, **kwargs)
         return self
@@ -84,5 +149,17 @@ class ApplicationBuilder:
             name=self.name,
             service_id=self.service_id,
             routes=self.routes,
+            codec=self.codec,
+            coalescing_window=self.coalescing_window,
+            overflow_policy=self.overflow_policy,
+            priority_lanes=self.priority_lanes,
+            max_control_burst=self.max_control_burst,
+            max_in_flight_calls=self.max_in_flight_calls,
+            stop_timeout=self.stop_timeout,
+            dependencies=self.dependencies,
+            replicas=self.replicas,
+            gc_enabled=self.gc_enabled,
+            gc_thresholds=self.gc_thresholds,
+            scheduling_policy=self.scheduling_policy,
         )
         return service_config
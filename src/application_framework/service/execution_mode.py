@@ -7,3 +7,20 @@ class ExecutionMode(Enum):
     SEPARATE_THREAD_ASYNC = 'separate_thread_async'
     SEPARATE_PROCESS = 'separate_process'
     SEPARATE_PROCESS_ASYNC = 'separate_process_async'
+    PREFORKED_PROCESS = 'preforked_process'
+    PREFORKED_PROCESS_ASYNC = 'preforked_process_async'
+    SEPARATE_INTERPRETER = 'separate_interpreter'
+    SEPARATE_INTERPRETER_ASYNC = 'separate_interpreter_async'
+
+    @property
+    def is_separate_process(self):
+        return self in [ExecutionMode.SEPARATE_PROCESS, ExecutionMode.SEPARATE_PROCESS_ASYNC,
+                        ExecutionMode.PREFORKED_PROCESS, ExecutionMode.PREFORKED_PROCESS_ASYNC]
+
+    @property
+    def is_preforked(self):
+        return self in [ExecutionMode.PREFORKED_PROCESS, ExecutionMode.PREFORKED_PROCESS_ASYNC]
+
+    @property
+    def is_separate_interpreter(self):
+        return self in [ExecutionMode.SEPARATE_INTERPRETER, ExecutionMode.SEPARATE_INTERPRETER_ASYNC]
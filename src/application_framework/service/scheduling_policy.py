@@ -0,0 +1,126 @@
+import os
+import platform
+
+try:
+    import resource
+except ImportError:  # Not on Unix
+    resource = None
+
+
+class SchedulingPolicy:
+    """The CPUs a service may run on, its nice level and its I/O priority.
+
+    These are Linux settings of a thread. A service applies them to the
+    thread it starts on, and the threads it starts afterwards inherit them.
+    For a process service that is the whole process.
+    """
+    # No class of its own, so the I/O priority follows the nice level
+    IO_NONE = 'None'
+    IO_REALTIME = 'Realtime'
+    IO_BEST_EFFORT = 'BestEffort'
+    IO_IDLE = 'Idle'
+
+    io_class_numbers = {IO_NONE: 0, IO_REALTIME: 1, IO_BEST_EFFORT: 2, IO_IDLE: 3}
+    io_class_names = {number: name for name, number in io_class_numbers.items()}
+    # The os module has no ioprio_set() or ioprio_get(), and their syscall
+    # numbers differ per architecture
+    ioprio_syscalls = {"x86_64": (251, 252), "aarch64": (30, 31), "i686": (289, 290), "armv7l": (314, 315)}
+    IOPRIO_WHO_PROCESS = 1
+    IOPRIO_CLASS_SHIFT = 13
+    # Bit of CAP_SYS_NICE in the capability sets of /proc/<pid>/status
+    CAP_SYS_NICE = 23
+
+    def __init__(self, cpu_affinity=None, nice=None, io_class=None, io_level=4, exclusive_cpus=False):
+        self.cpu_affinity = None if cpu_affinity is None else frozenset(cpu_affinity)
+        self.nice = nice
+        self.io_class = io_class
+        self.io_level = io_level
+        self.exclusive_cpus = exclusive_cpus
+        if self.cpu_affinity is not None and not self.cpu_affinity:
+            raise ValueError("CPU affinity must name at least one CPU")
+        if nice is not None and not -20 <= nice <= 19:
+            raise ValueError("Nice level must be between -20 and 19")
+        if io_class is not None and io_class not in self.io_class_numbers:
+            raise ValueError(f"Unknown I/O class: {io_class}")
+        if not 0 <= io_level <= 7:
+            raise ValueError("I/O level must be between 0 and 7")
+
+    def check_supported(self):
+        """Raises RuntimeError if this system cannot apply the policy."""
+        if self.cpu_affinity is not None and not hasattr(os, "sched_setaffinity"):
+            raise RuntimeError("CPU affinity is not supported on this system")
+        if self.io_class is not None and (platform.system() != "Linux" or
+                                          platform.machine() not in self.ioprio_syscalls):
+            raise RuntimeError("I/O priority is not supported on this system")
+
+    def can_restore_nice(self):
+        """Returns whether a thread of this process that applied the policy
+        could set its nice level back to the current one. Lowering the nice
+        level requires CAP_SYS_NICE, or a soft RLIMIT_NICE that allows it."""
+        if self.nice is None:
+            return True
+        current_nice = os.getpriority(os.PRIO_PROCESS, 0)
+        if self.nice <= current_nice:
+            return True
+        # RLIMIT_NICE gives the lowest allowed nice level as 20 - limit
+        if hasattr(resource, "RLIMIT_NICE"):
+            limit = resource.getrlimit(resource.RLIMIT_NICE)[0]
+            if limit == resource.RLIM_INFINITY or 20 - limit <= current_nice:
+                return True
+        return self.has_capability(self.CAP_SYS_NICE)
+
+    @staticmethod
+    def has_capability(capability):
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("CapEff:"):
+                        return bool(int(line.split()[1], 16) >> capability & 1)
+        except OSError:
+            pass
+        return False
+
+    def overlaps(self, other):
+        return self.cpu_affinity is not None and other.cpu_affinity is not None and \
+            bool(self.cpu_affinity & other.cpu_affinity)
+
+    def apply(self):
+        """Applies the policy to the calling thread."""
+        if self.cpu_affinity is not None:
+            os.sched_setaffinity(0, self.cpu_affinity)
+        if self.io_class is not None:
+            self.set_io_priority(self.io_class_numbers[self.io_class], self.io_level)
+        # Last, as raising the priority back again may not be permitted
+        if self.nice is not None:
+            os.setpriority(os.PRIO_PROCESS, 0, self.nice)
+
+    def capture(self):
+        """Returns a policy that sets the calling thread back to its current
+        CPU affinity, nice level and I/O priority, as far as this policy
+        changes them."""
+        cpu_affinity = os.sched_getaffinity(0) if self.cpu_affinity is not None else None
+        nice = os.getpriority(os.PRIO_PROCESS, 0) if self.nice is not None else None
+        io_class, io_level = None, 0
+        if self.io_class is not None:
+            io_priority = self.get_io_priority()
+            io_class = self.io_class_names[io_priority >> self.IOPRIO_CLASS_SHIFT]
+            io_level = io_priority & ((1 << self.IOPRIO_CLASS_SHIFT) - 1)
+        return SchedulingPolicy(cpu_affinity, nice, io_class, io_level)
+
+    def set_io_priority(self, io_class_number, io_level):
+        self._ioprio_syscall(0, (io_class_number << self.IOPRIO_CLASS_SHIFT) | io_level)
+
+    def get_io_priority(self):
+        return self._ioprio_syscall(1)
+
+    def _ioprio_syscall(self, index, *args):
+        # Imported here, as most services never need it
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        syscall = self.ioprio_syscalls[platform.machine()][index]
+        result = libc.syscall(syscall, self.IOPRIO_WHO_PROCESS, 0, *args)
+        if result < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        return result
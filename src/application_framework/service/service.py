@@ -1,29 +1,69 @@
+import asyncio
+import inspect
+import os
 import threading
 import time
 
 from application_framework.actor.actor import ActorBase
+from application_framework.messaging.adapters.synchronized_queue import SynchronizedQueue
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.messaging.rpc import RpcClient
 
 
 class Service(ActorBase):
+    MAX_RECEIVE_BATCH = 64
+    # Seconds to wait after a failed receive before receiving again
+    RECEIVE_ERROR_DELAY = 0.1
+
     def __init__(self):
         super().__init__()
         self.loop = None
         self.cancellation_token = None
         self.service_id = None
+        self.replica_group = None
+        self.replica_index = None
         self.channels = None
         self.supervisor_listener_thread = None
         self.supervisor_listener_task = None
+        self.started_message = None
+        self.stopped_message = None
+        self.crashed_message = None
+        self.forward_events_message = None
+        self.is_forwarding_requested = False
+        self.rpc_client = RpcClient()
+        self.rpc_methods = {}
+        self.supervisor_message_handlers = {
+            MessageKind.STOP: self._on_supervisor_stop,
+            MessageKind.REQUEST: self._on_request,
+            MessageKind.RESPONSE: self._on_response,
+            MessageKind.ERROR: self._on_response,
+        }
 
     def start(self, cancellation_token):
         self.cancellation_token = cancellation_token
-        self.supervisor_listener_thread = threading.Thread(target=self.run_supervisor_listener, daemon=True)
+        # The listener thread replies to requests and asks for event
+        # forwarding on the channel that run() sends on
+        self.channels.service_to_supervisor = SynchronizedQueue(self.channels.service_to_supervisor)
+        # Not a daemon, as subinterpreters do not allow those. It ends with
+        # the service instead.
+        self.supervisor_listener_thread = threading.Thread(target=self.run_supervisor_listener)
         self.supervisor_listener_thread.start()
-        self.run()
+        try:
+            self.channels.service_to_supervisor.send(self.started_message)
+            self.run()
+        finally:
+            self.cancellation_token.cancel()
 
     async def start_async(self, cancellation_token):
         self.cancellation_token = cancellation_token
         self.supervisor_listener_task = self.loop.create_task(self.run_supervisor_listener_async())
-        await self.run_async()
+        try:
+            await self.channels.service_to_supervisor.send_async(self.started_message, self.loop)
+            await self.run_async()
+        finally:
+            self.cancellation_token.cancel()
+            # Would otherwise keep waiting on the channels of a crashed service
+            self.supervisor_listener_task.cancel()
 
     def run(self):
         """Run the service synchronously. Override this method in subclasses."""
@@ -43,31 +83,170 @@ class Service(ActorBase):
 
     def run_supervisor_listener(self):
         while not self.cancellation_token.is_cancellation_requested:
-            message = self.channels.supervisor_to_service.receive()
-            if message:
-                if message.content == "stop":
-                    print("[Service] Received 'stop' message")
-                    self.cancellation_token.cancel()
-                else:
-                    raise NotImplementedError(f"Received some unknown message: {message}")
-            time.sleep(0.5)
+            try:
+                # Handles everything that arrived, so pipelined requests are
+                # not served one per wait
+                messages = self.channels.supervisor_to_service.receive_many(self.MAX_RECEIVE_BATCH, 0.5)
+            except Exception as e:
+                print(f"[Service] Failed to receive message from supervisor: {e!r}")
+                # Keeps a channel that keeps failing from spinning the thread
+                time.sleep(self.RECEIVE_ERROR_DELAY)
+                continue
+            for message in messages:
+                self._handle_supervisor_message(message)
         print("[Service] Cancellation was requested!")
 
     async def run_supervisor_listener_async(self):
         while not self.cancellation_token.is_cancellation_requested:
-            message = await self.channels.supervisor_to_service.receive_async(self.loop)
-            if message.content == "stop":
-                print("[Service] Received 'stop' message")
-                self.cancellation_token.cancel()
-            else:
-                raise NotImplementedError(f"Received some unknown message: {message}")
+            try:
+                message = await self.channels.supervisor_to_service.receive_async(self.loop)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Service] Failed to receive message from supervisor: {e!r}")
+                await asyncio.sleep(self.RECEIVE_ERROR_DELAY)
+                continue
+            self._handle_supervisor_message(message)
         print("[Service] Cancellation was requested!")
 
+    def _handle_supervisor_message(self, message):
+        """Handles a message from the supervisor. Only cancellation ends the
+        listener, so a message that cannot be handled is dropped."""
+        if message is None:
+            # Some channels return None when a receive failed
+            return
+        handler = self.supervisor_message_handlers.get(message.kind)
+        try:
+            if handler is None:
+                print(f"[Service] Unsupported message received from supervisor, dropping: {message}")
+            else:
+                handler(message)
+        except Exception as e:
+            print(f"[Service] Failed to handle message from supervisor: {e!r}")
+
+    def _on_supervisor_stop(self, message):
+        print("[Service] Received 'stop' message")
+        self.cancellation_token.cancel()
+
+    def _on_request(self, message):
+        if self.loop is None:
+            self._serve_request(message)
+        else:
+            # Served in its own task so that requests are handled concurrently
+            self.loop.create_task(self._serve_request_async(message))
+
+    def _on_response(self, message):
+        self.rpc_client.resolve(message)
+
+    def _serve_request(self, message):
+        try:
+            result = self._get_rpc_method(message)(message.content)
+            if inspect.isawaitable(result):
+                raise TypeError(f"RPC method '{message.subject}' is async, but the service runs synchronously")
+            response = RpcClient.create_response(message, self.service_id, result)
+        except Exception as e:
+            response = RpcClient.create_error(message, self.service_id, str(e))
+        self.channels.service_to_supervisor.send(response)
+
+    async def _serve_request_async(self, message):
+        try:
+            result = self._get_rpc_method(message)(message.content)
+            if inspect.isawaitable(result):
+                result = await result
+            response = RpcClient.create_response(message, self.service_id, result)
+        except Exception as e:
+            response = RpcClient.create_error(message, self.service_id, str(e))
+        await self.channels.service_to_supervisor.send_async(response, self.loop)
+
+    def _get_rpc_method(self, message):
+        method = self.rpc_methods.get(message.subject)
+        if method is None:
+            raise ValueError(f"Unknown RPC method '{message.subject}'")
+        return method
+
+    def register_rpc_method(self, name, method):
+        """Registers a method that other services and the host can call with
+        call_async(). The method takes the payload and returns the result,
+        either directly or as an awaitable."""
+        self.rpc_methods[name] = method
+
+    async def call_async(self, target, method, payload=None, timeout=None):
+        """Calls a method registered by the target service, given by id or
+        name, and returns its result. Raises RpcError if the call failed and
+        asyncio.TimeoutError if no response arrived within timeout seconds."""
+        return await self.rpc_client.call_async(
+            self.channels.service_to_supervisor, self.loop, self.service_id, target, method, payload, timeout)
+
+    def publish(self, topic, payload=None):
+        """Publishes an event to the subscribers of topic in all services
+        and the host."""
+        self._request_forwarding()
+        self.channels.event_bus.publish(topic, payload, self.service_id)
+
+    def subscribe(self, topic, handler):
+        """Calls handler with each event message published to topic. Async
+        services get it called on their event loop. Sync services get it
+        called on the publishing thread or the bus thread, so the handler
+        must be thread-safe."""
+        self._request_forwarding()
+        self.channels.event_bus.subscribe(topic, handler, self.loop)
+
+    def unsubscribe(self, topic, handler):
+        self.channels.event_bus.unsubscribe(topic, handler)
+
+    def _request_forwarding(self):
+        """Asks the host to start the event bus proxy the first time the
+        service uses the bus outside the host process. Within it, the bus
+        starts the proxy itself."""
+        event_bus = self.channels.event_bus
+        if self.is_forwarding_requested or not event_bus.is_forwarding_enabled or event_bus.is_proxy_owner:
+            return
+        self.is_forwarding_requested = True
+        self.channels.service_to_supervisor.send(self.forward_events_message)
+
+    def submit_work(self, name, payload=None):
+        """Puts an item on the work queue of a replicated service, for one of
+        its replicas to take."""
+        self._get_work_queue(name).send(Message(sender=self.service_id, content=payload, target=name))
+
+    async def submit_work_async(self, name, payload=None):
+        await self._get_work_queue(name).send_async(
+            Message(sender=self.service_id, content=payload, target=name), self.loop)
+
+    def receive_work(self, timeout=None):
+        """Takes the next item from this replica's work queue, or returns None
+        if none arrived within timeout seconds. Waits for one if timeout is
+        None."""
+        messages = self._get_work_queue(self.replica_group).receive_many(1, timeout)
+        return messages[0] if messages else None
+
+    async def receive_work_async(self, timeout=None):
+        messages = await self._get_work_queue(self.replica_group).receive_many_async(self.loop, 1, timeout)
+        return messages[0] if messages else None
+
+    def _get_work_queue(self, name):
+        work_queue = self.channels.work_queues.get(name) if name and self.channels.work_queues else None
+        if work_queue is None:
+            raise ValueError(f"Unknown replicated service: {name}")
+        return work_queue
+
     def set_loop(self, loop):
         self.loop = loop
 
     def set_service_id(self, service_id):
         self.service_id = service_id
+        # Tells the host which process to end if the service will not stop
+        self.started_message = Message(sender=service_id, content=str(os.getpid()), kind=MessageKind.STARTED)
+        self.stopped_message = Message.control(service_id, MessageKind.STOPPED)
+        self.crashed_message = Message.control(service_id, MessageKind.CRASHED)
+        self.forward_events_message = Message.control(service_id, MessageKind.FORWARD_EVENTS)
+
+    def set_replica(self, replica_group, replica_index):
+        self.replica_group = replica_group
+        self.replica_index = replica_index
 
     def set_channels(self, channels):
         self.channels = channels
+
+    def set_max_in_flight_calls(self, max_in_flight_calls):
+        self.rpc_client = RpcClient(max_in_flight_calls)
@@ -1,5 +1,9 @@
+import copy
+import uuid
+
+
 class ServiceConfig:
-    def __init__(self, service_id, service_class, execution_mode, restart_strategy, serialized_state, root_directory, name, routes):
+    def __init__(self, service_id, service_class, execution_mode, restart_strategy, serialized_state, root_directory, name, routes, codec=None, coalescing_window=None, overflow_policy=None, priority_lanes=False, max_control_burst=16, max_in_flight_calls=64, stop_timeout=30, dependencies=None, replicas=None, replica_index=None, replica_group=None, gc_enabled=True, gc_thresholds=None, scheduling_policy=None):
         self.service_id = service_id
         self.service_class = service_class
         self.execution_mode = execution_mode
@@ -8,3 +12,32 @@ class ServiceConfig:
         self.root_directory = root_directory
         self.name = name
         self.routes = routes
+        self.codec = codec
+        self.coalescing_window = coalescing_window
+        self.overflow_policy = overflow_policy
+        self.priority_lanes = priority_lanes
+        self.max_control_burst = max_control_burst
+        self.max_in_flight_calls = max_in_flight_calls
+        self.stop_timeout = stop_timeout
+        self.dependencies = dependencies or []
+        self.replicas = replicas
+        self.replica_index = replica_index
+        self.replica_group = replica_group
+        self.gc_enabled = gc_enabled
+        self.gc_thresholds = gc_thresholds
+        self.scheduling_policy = scheduling_policy
+
+    def create_replicas(self):
+        """Returns a config per replica, each with its own service id and an
+        indexed name."""
+        group = self.name or str(self.service_id)
+        replicas = []
+        for index in range(self.replicas):
+            replica = copy.copy(self)
+            replica.service_id = uuid.uuid4()
+            replica.name = f"{group}-{index}"
+            replica.replicas = None
+            replica.replica_index = index
+            replica.replica_group = group
+            replicas.append(replica)
+        return replicas
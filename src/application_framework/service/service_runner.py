@@ -0,0 +1,207 @@
+import asyncio
+import gc
+import signal
+import threading
+
+from dependency_injection.container import DependencyContainer
+
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.service.cancellation_token_source import \
+    CancellationTokenSource
+
+
+class ServiceRunner:
+    """Creates a service from its config and runs it, in whichever thread,
+    process or interpreter the host has scheduled it on.
+
+    This module does not import the host, so that it can be imported where
+    the host's dependencies cannot, such as in a subinterpreter.
+    """
+    # Restored in pool workers reused by a service with default settings
+    DEFAULT_GC_THRESHOLDS = gc.get_threshold()
+    # Services whose dependency container this process has deserialized
+    warm_service_ids = set()
+
+    @staticmethod
+    def prepare_container(service_id, serialized_state):
+        """Returns the dependency container of a service, deserializing its
+        state only if this process has not done so yet."""
+        container = DependencyContainer.get_instance(name=service_id)
+        if service_id not in ServiceRunner.warm_service_ids:
+            container.deserialize_state(serialized_state)
+            ServiceRunner.warm_service_ids.add(service_id)
+        return container
+
+    @staticmethod
+    def create_service(service_config, channels, loop=None):
+        container = ServiceRunner.prepare_container(service_config.service_id, service_config.serialized_state)
+        service_instance = container.resolve(service_config.service_class)
+        if loop is not None:
+            service_instance.set_loop(loop)
+        service_instance.set_service_id(service_config.service_id)
+        service_instance.set_replica(service_config.replica_group, service_config.replica_index)
+        service_instance.set_channels(channels)
+        service_instance.set_max_in_flight_calls(service_config.max_in_flight_calls)
+        return service_instance
+
+    @staticmethod
+    def start_service(service_config, channels, service_threads=None):
+        previous_policy = None
+        try:
+            previous_policy = ServiceRunner.configure_scheduling(service_config)
+            if service_threads is not None:
+                # Lets the lifecycle manager end the thread if it will not stop
+                service_threads[service_config.service_id] = (threading.get_ident(), None)
+            cancellation_token_source = CancellationTokenSource(False)
+            cancellation_token = cancellation_token_source.token
+            service_instance = ServiceRunner.create_service(service_config, channels)
+            service_instance.start(cancellation_token)
+        except Exception as e:
+            print(f"Error in start_service: {e}")
+            ServiceRunner.report_crash(service_config, channels)
+        finally:
+            ServiceRunner.restore_scheduling(previous_policy)
+
+    @staticmethod
+    def report_crash(service_config, channels):
+        """Tells the supervisor that the service raised, so it restarts it."""
+        try:
+            channels.service_to_supervisor.send(Message.control(service_config.service_id, MessageKind.CRASHED))
+        except Exception as e:
+            print(f"[ServiceRunner] Could not report the crash: {e}")
+
+    @staticmethod
+    def reset_signal_handling():
+        """Initializes a pool worker forked from the host. The worker inherits
+        the wakeup fd of the host's event loop, through which signals sent to
+        the worker would run the host's signal handlers, such as when a pool
+        terminates its workers."""
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    @staticmethod
+    def start_service_process(service_config, channels):
+        ServiceRunner.configure_gc(service_config)
+        ServiceRunner.start_service(service_config, channels)
+
+    @staticmethod
+    def configure_gc(service_config):
+        """Applies the collector settings of a service to its process."""
+        if service_config.gc_enabled:
+            gc.enable()
+            gc.set_threshold(*(service_config.gc_thresholds or ServiceRunner.DEFAULT_GC_THRESHOLDS))
+        else:
+            gc.disable()
+
+    @staticmethod
+    def configure_scheduling(service_config):
+        """Applies the scheduling policy of a service to the calling thread.
+        Returns a policy that restores the thread's previous settings, so
+        that the pool thread or worker does not keep them for the next
+        service it runs."""
+        policy = service_config.scheduling_policy
+        if policy is None:
+            return None
+        previous_policy = None
+        try:
+            previous_policy = policy.capture()
+            policy.apply()
+        except OSError as e:
+            print(f"[ServiceRunner] Could not apply the scheduling policy: {e}")
+        return previous_policy
+
+    @staticmethod
+    def restore_scheduling(previous_policy):
+        if previous_policy is None:
+            return
+        try:
+            previous_policy.apply()
+        except OSError as e:
+            print(f"[ServiceRunner] Could not restore the scheduling settings: {e}")
+
+    @staticmethod
+    async def start_service_async(service_config, channels, loop):
+        try:
+            cancellation_token_source = CancellationTokenSource(True)
+            cancellation_token = cancellation_token_source.token
+            service_instance = ServiceRunner.create_service(service_config, channels, loop)
+            await service_instance.start_async(cancellation_token)
+        except asyncio.CancelledError:
+            # Ended forcibly, which is not a crash. Python 3.7 would catch it
+            # below.
+            raise
+        except Exception as e:
+            print(f"Error in start_service_async: {e}")
+            try:
+                await channels.service_to_supervisor.send_async(
+                    Message.control(service_config.service_id, MessageKind.CRASHED), loop)
+            except Exception as e:
+                print(f"[ServiceRunner] Could not report the crash: {e}")
+        finally:
+            try:
+                # Sends what the service left in a coalescing window
+                await channels.service_to_supervisor.flush_async(loop)
+            except Exception as e:
+                print(f"[ServiceRunner] Could not flush the channel to the supervisor: {e}")
+            # Releases the pending receives of the finished service
+            channels.supervisor_to_service.close()
+
+    @staticmethod
+    def create_loop(event_loop_factory=None):
+        if event_loop_factory is None:
+            return asyncio.new_event_loop()
+        return event_loop_factory.create_loop()
+
+    @staticmethod
+    def close_loop(loop):
+        """Finishes the tasks the service left behind and closes its loop, so
+        that the loop's file descriptors are released with the service rather
+        than when a reused thread or worker process collects it."""
+        try:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        except Exception as e:
+            print(f"[ServiceRunner] Error while closing the service's loop: {e}")
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    @staticmethod
+    def run_service_async_thread(service_config, channels, service_threads=None, event_loop_factory=None):
+        thread_loop = None
+        previous_policy = None
+        try:
+            previous_policy = ServiceRunner.configure_scheduling(service_config)
+            thread_loop = ServiceRunner.create_loop(event_loop_factory)
+            asyncio.set_event_loop(thread_loop)
+            if service_threads is not None:
+                service_threads[service_config.service_id] = (threading.get_ident(), thread_loop)
+            thread_loop.run_until_complete(ServiceRunner.start_service_async(service_config, channels, thread_loop))
+        except Exception as e:
+            print(f"Error in run_service_async_thread: {e}")
+        finally:
+            if thread_loop is not None:
+                ServiceRunner.close_loop(thread_loop)
+            ServiceRunner.restore_scheduling(previous_policy)
+
+    @staticmethod
+    def run_service_async_process(service_config, channels, event_loop_factory=None):
+        process_loop = None
+        previous_policy = None
+        try:
+            ServiceRunner.configure_gc(service_config)
+            previous_policy = ServiceRunner.configure_scheduling(service_config)
+            process_loop = ServiceRunner.create_loop(event_loop_factory)
+            asyncio.set_event_loop(process_loop)
+            process_loop.run_until_complete(ServiceRunner.start_service_async(service_config, channels, process_loop))
+        except Exception as e:
+            print(f"Error in run_service_async_process: {e}")
+        finally:
+            if process_loop is not None:
+                ServiceRunner.close_loop(process_loop)
+            ServiceRunner.restore_scheduling(previous_policy)
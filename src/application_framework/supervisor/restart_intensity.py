@@ -0,0 +1,28 @@
+from collections import deque
+
+
+class RestartIntensity:
+    """Counts restarts within a sliding period, like the restart intensity of
+    an Erlang supervisor: at most max_restarts restarts are allowed within
+    any period of restart_period seconds."""
+    def __init__(self, max_restarts, restart_period):
+        self.max_restarts = max_restarts
+        self.restart_period = restart_period
+        self.restart_times = deque()
+
+    def record(self, now):
+        """Records a restart at now, in event loop time, and returns False if
+        it is one too many."""
+        if self.max_restarts is None:
+            return True
+        self.restart_times.append(now)
+        while self.restart_times[0] <= now - self.restart_period:
+            self.restart_times.popleft()
+        return len(self.restart_times) <= self.max_restarts
+
+    def reset(self):
+        self.restart_times.clear()
+
+    def __str__(self):
+        restarts = "restart" if self.max_restarts == 1 else "restarts"
+        return f"{self.max_restarts} {restarts} within {self.restart_period} seconds"
@@ -4,8 +4,22 @@ class RestartStrategy:
     EXPONENTIAL_BACKOFF = 'ExponentialBackoff'
     LINEAR_BACKOFF = 'LinearBackoff'
 
-    def __init__(self, strategy=EXPONENTIAL_BACKOFF, fixed_backoff_time=5, max_backoff_time=60, max_jitter=5):
+    def __init__(self, strategy=EXPONENTIAL_BACKOFF, fixed_backoff_time=5, max_backoff_time=60, max_jitter=5,
+                 max_restarts=None, restart_period=60, stable_period=30):
         self.strategy = strategy
         self.fixed_backoff_time = fixed_backoff_time
         self.max_backoff_time = max_backoff_time
         self.max_jitter = max_jitter
+        # A service restarted more often than this gives up and escalates.
+        # None restarts it forever.
+        self.max_restarts = max_restarts
+        self.restart_period = restart_period
+        # The backoff starts over once a service ran this long before it
+        # crashed again
+        self.stable_period = stable_period
+        if max_restarts is not None and max_restarts < 0:
+            raise ValueError("Max restarts must not be negative")
+        if restart_period <= 0:
+            raise ValueError("Restart period must be positive")
+        if stable_period < 0:
+            raise ValueError("Stable period must not be negative")
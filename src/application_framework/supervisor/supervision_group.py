@@ -0,0 +1,62 @@
+from application_framework.supervisor.restart_intensity import RestartIntensity
+from application_framework.supervisor.supervision_strategy import SupervisionStrategy
+
+
+class SupervisionGroup:
+    """Services, and further groups, that are restarted together, like the
+    children of an Erlang supervisor.
+
+    When a member crashes, the strategy decides what restarts with it: only
+    the member, all members, or the member and those listed after it. Each
+    of these restarts counts towards the group's restart intensity. A group
+    restarted too often gives up and escalates to its parent group, which
+    restarts it as a whole. A group without a parent stops the host.
+
+    The host resolves the member names into service ids, one per replica,
+    and groups.
+    """
+    strategies = (SupervisionStrategy.ONE_FOR_ONE, SupervisionStrategy.ONE_FOR_ALL, SupervisionStrategy.REST_FOR_ONE)
+
+    def __init__(self, name, member_names, strategy=SupervisionStrategy.ONE_FOR_ONE, max_restarts=None,
+                 restart_period=60):
+        if strategy not in self.strategies:
+            raise ValueError(f"Unknown supervision strategy: {strategy}")
+        if not member_names:
+            raise ValueError(f"Supervision group '{name}' has no members")
+        self.name = name
+        self.member_names = list(member_names)
+        self.strategy = strategy
+        self.restart_intensity = RestartIntensity(max_restarts, restart_period)
+        self.members = []
+        self.parent = None
+
+    def add_member(self, member):
+        if isinstance(member, SupervisionGroup):
+            member.parent = self
+        self.members.append(member)
+
+    def members_to_restart(self, member):
+        """Returns the members that restart along with the crashed one."""
+        if self.strategy == SupervisionStrategy.ONE_FOR_ALL:
+            return list(self.members)
+        if self.strategy == SupervisionStrategy.REST_FOR_ONE:
+            return self.members[self.members.index(member):]
+        return [member]
+
+    def get_service_ids(self, members=None):
+        """Returns the ids of the services among members, and in groups among
+        them, in the order they are listed."""
+        service_ids = []
+        for member in self.members if members is None else members:
+            if isinstance(member, SupervisionGroup):
+                service_ids.extend(member.get_service_ids())
+            else:
+                service_ids.append(member)
+        return service_ids
+
+    def reset(self, members=None):
+        """Forgets the restarts of groups among members, as they start over."""
+        for member in self.members if members is None else members:
+            if isinstance(member, SupervisionGroup):
+                member.restart_intensity.reset()
+                member.reset()
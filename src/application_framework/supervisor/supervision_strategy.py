@@ -0,0 +1,5 @@
+class SupervisionStrategy:
+    """Which members of a supervision group restart when one of them crashes."""
+    ONE_FOR_ONE = 'OneForOne'
+    ONE_FOR_ALL = 'OneForAll'
+    REST_FOR_ONE = 'RestForOne'
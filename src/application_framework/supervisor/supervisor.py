@@ -2,67 +2,193 @@ import asyncio
 import random
 
 from application_framework.actor.actor import ActorBase
-from application_framework.messaging.message import Message
+from application_framework.messaging.message import MessageKind, SUPERVISOR_STOP_MESSAGE
+from application_framework.supervisor.restart_intensity import RestartIntensity
 from application_framework.supervisor.restart_strategy import RestartStrategy
 
 
 class Supervisor(ActorBase):
-    def __init__(self, loop, service_id, channels, restart_strategy):
+    # Control messages sent as plain content by applications written before
+    # messages had a kind
+    LEGACY_CONTROL_KINDS = {
+        "started": MessageKind.STARTED,
+        "stopped": MessageKind.STOPPED,
+        "crashed": MessageKind.CRASHED,
+    }
+    RECEIVE_ERROR_DELAY = 0.1
+
+    def __init__(self, loop, service_id, channels, restart_strategy, stop_timeout=None, restart_callback=None,
+                 escalation_callback=None):
         super().__init__()
         self.loop = loop
         self.cancellation_token = None
         self.service_id = service_id
         self.channels = channels
         self.restart_strategy = restart_strategy
+        self.stop_timeout = stop_timeout
+        # Awaited to tear down the crashed service and schedule it again
+        self.restart_callback = restart_callback
+        # Awaited when the service crashed too often to be restarted again
+        self.escalation_callback = escalation_callback
+        self.restart_intensity = RestartIntensity(restart_strategy.max_restarts, restart_strategy.restart_period)
+        self.backoff_time = 1
+        self.retry_attempts = 0
+        # Event loop time at which the service last reported that it started
+        self.started_at = None
+        self.restart_count = 0
+        # Seconds from scheduling the restarted service until it started
+        self.last_restart_latency = None
         self.host_listener_task = None
         self.service_listener_task = None
+        self.service_pid = None
         self.starting_event = asyncio.Event()
+        self.started_event = asyncio.Event()
         self.stopping_event = asyncio.Event()
         self.stopped_event = asyncio.Event()
         self.crashed_event = asyncio.Event()
+        self.host_message_handlers = {
+            MessageKind.STOP: self._on_host_stop,
+            MessageKind.REQUEST: self._forward_to_service,
+            MessageKind.RESPONSE: self._forward_to_service,
+            MessageKind.ERROR: self._forward_to_service,
+        }
+        self.service_message_handlers = {
+            MessageKind.DATA: self._on_service_data,
+            MessageKind.STARTED: self._on_service_started,
+            MessageKind.STOPPED: self._on_service_stopped,
+            MessageKind.CRASHED: self._on_service_crashed,
+            MessageKind.REQUEST: self._forward_to_host,
+            MessageKind.RESPONSE: self._forward_to_host,
+            MessageKind.ERROR: self._forward_to_host,
+            MessageKind.FORWARD_EVENTS: self._forward_to_host,
+        }
 
     async def start_async(self, cancellation_token):
         """Starts the supervisor and initializes listener tasks."""
         self.cancellation_token = cancellation_token
         self.host_listener_task = self.loop.create_task(self.run_host_listener_async())
         self.service_listener_task = self.loop.create_task(self.run_service_listener_async())
-        await self.run_async()
+        try:
+            await self.run_async()
+        finally:
+            self.host_listener_task.cancel()
+            self.service_listener_task.cancel()
 
     async def stop_async(self):
         """Signals the supervisor to stop."""
         self.cancellation_token.cancel()
 
+    async def set_channels_async(self, channels):
+        """Switches to the channels of a restarted service. The old channels
+        can be closed once this returns."""
+        self.channels = channels
+        if self.service_listener_task is not None:
+            self.service_listener_task.cancel()
+            await asyncio.wait([self.service_listener_task])
+            self.service_listener_task = self.loop.create_task(self.run_service_listener_async())
+
+    def on_service_failed(self, error):
+        """Called when the service's task failed, such as when its process
+        was killed, and it could not report the crash itself."""
+        if self.cancellation_token is None or not self.cancellation_token.is_cancellation_requested:
+            print(f"[Supervisor] Service failed: {error!r}")
+            self.crashed_event.set()
+
     async def run_host_listener_async(self):
         """Listens for messages from the host and handles them."""
         while not self.cancellation_token.is_cancellation_requested:
-            message = await self.channels.host_to_supervisor.receive_async(self.loop)
-            if message.content == "stop":
-                print("[Supervisor] Received 'stop' message")
-                await self.stop_async()
+            message = await self._receive_async(self.channels.host_to_supervisor, "host")
+            if message is None:
+                continue
+            handler = self.host_message_handlers.get(message.kind)
+            try:
+                if handler is None:
+                    print(f"[Supervisor] Unsupported message received from host, dropping: {message}")
+                else:
+                    await handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Supervisor] Failed to handle message from host: {e!r}")
 
     async def run_service_listener_async(self):
         """Listens for messages from the service and updates the supervisor's state."""
         while not self.cancellation_token.is_cancellation_requested:
-            message = await self.channels.service_to_supervisor.receive_async(self.loop)
-            if message.content == "started":
-                self.starting_event.clear()
-                self.stopped_event.clear()
-                self.crashed_event.clear()
-            elif message.content == "stopped":
-                self.stopped_event.set()
-            elif message.content == "crashed":
-                self.crashed_event.set()
-            else:
-                print(f"[Supervisor] Unsupported message received, dropping: {message}")
+            message = await self._receive_async(self.channels.service_to_supervisor, "service")
+            if message is None:
+                continue
+            handler = self.service_message_handlers.get(message.kind)
+            try:
+                if handler is None:
+                    print(f"[Supervisor] Unsupported message received, dropping: {message}")
+                else:
+                    handler(message)
+            except Exception as e:
+                print(f"[Supervisor] Failed to handle message from service: {e!r}")
+
+    async def _receive_async(self, queue, source):
+        """Returns the next message on queue, or None if there was none or it
+        could not be received. Only cancellation ends the listeners."""
+        try:
+            return await queue.receive_async(self.loop)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Supervisor] Failed to receive message from {source}: {e!r}")
+            # Keeps a channel that keeps failing from spinning the loop
+            await asyncio.sleep(self.RECEIVE_ERROR_DELAY)
+            return None
+
+    async def _on_host_stop(self, message):
+        print("[Supervisor] Received 'stop' message")
+        await self.stop_async()
+
+    async def _forward_to_service(self, message):
+        await self.channels.supervisor_to_service.send_async(message, self.loop)
+
+    def _forward_to_host(self, message):
+        # The host routes calls by target, and shares this loop
+        self.channels.supervisor_to_host.send(message)
+
+    def _on_service_data(self, message):
+        kind = self.LEGACY_CONTROL_KINDS.get(message.content) if isinstance(message.content, str) else None
+        if kind is None:
+            print(f"[Supervisor] Unsupported message received, dropping: {message}")
+        else:
+            self.service_message_handlers[kind](message)
+
+    def _on_service_started(self, message):
+        if message.kind == MessageKind.STARTED and message.content:
+            self.service_pid = int(message.content)
+        self.started_at = self.loop.time()
+        self.started_event.set()
+        self.starting_event.clear()
+        self.stopped_event.clear()
+        self.crashed_event.clear()
+
+    def _on_service_stopped(self, message):
+        self.stopped_event.set()
+
+    def _on_service_crashed(self, message):
+        self.crashed_event.set()
 
     async def run_async(self):
-        """Main loop for the supervisor to manage the service."""
+        """Main loop for the supervisor to manage the service. It sleeps until
+        the service crashes or the supervisor is stopped."""
         while not self.cancellation_token.is_cancellation_requested:
             try:
-                print("[Supervisor] Hello from supervisor")
-                if self.crashed_event.is_set():
-                    await self._restart_service()
-                await asyncio.sleep(1.0)
+                await self._wait_for_first(
+                    self.crashed_event.wait(),
+                    self.cancellation_token.wait_cancellation_async())
+                if self.crashed_event.is_set() and not self.cancellation_token.is_cancellation_requested:
+                    now = self.loop.time()
+                    if self.started_at is not None and now - self.started_at >= self.restart_strategy.stable_period:
+                        # Ran long enough that this crash does not continue a crash loop
+                        self._reset_backoff()
+                    if self.restart_intensity.record(now):
+                        await self._restart_service()
+                    else:
+                        await self._escalate()
             except Exception as e:
                 print(f"[Supervisor] Crashed: {e}")
                 break
@@ -72,21 +198,57 @@ class Supervisor(ActorBase):
     async def _restart_service(self):
         """Handles the restarting of the service when it crashes."""
         try:
+            crashed_at = self.loop.time()
+            channels = self.channels
             backoff_time = self._calculate_backoff()
             jitter = self._calculate_jitter()
             total_backoff = backoff_time + jitter
             print(f"[Supervisor] Restarting service after {total_backoff} seconds (backoff: {backoff_time}, jitter: {jitter})")
-            await asyncio.sleep(total_backoff)
-            await self.channels.supervisor_to_service.send_async(
-                Message(sender="supervisor", content="start"),
-                self.loop,
-            )
-            self.crashed_event.clear()
+            await self._wait_for_first(
+                asyncio.sleep(total_backoff),
+                self.cancellation_token.wait_cancellation_async())
+            if self.cancellation_token.is_cancellation_requested:
+                return
+            if self.channels is not channels:
+                # Restarted meanwhile, along with its supervision group
+                self.crashed_event.clear()
+                return
+            self.started_event.clear()
             self.starting_event.set()
-            self._reset_backoff()
+            restarted_at = self.loop.time()
+            await self.restart_callback()
+            # Crashes seen while tearing down belong to the old service
+            self.crashed_event.clear()
+            await self._wait_for_first(
+                self.started_event.wait(),
+                self.crashed_event.wait(),
+                self.cancellation_token.wait_cancellation_async())
+            if self.started_event.is_set():
+                self.restart_count += 1
+                self.last_restart_latency = self.loop.time() - restarted_at
+                print(f"[Supervisor] Service restarted in {self.last_restart_latency:.3f}s, "
+                      f"{self.loop.time() - crashed_at:.3f}s after it crashed")
         except Exception as e:
             print(f"[Supervisor] Failed to restart service: {e}")
 
+    async def _escalate(self):
+        """Hands the service to the escalation callback, which either restarts
+        it with its supervision group or stops the host."""
+        try:
+            print(f"[Supervisor] Service crashed again after {self.restart_intensity}, escalating")
+            self.crashed_event.clear()
+            self.started_event.clear()
+            await self.escalation_callback()
+            await self._wait_for_first(
+                self.started_event.wait(),
+                self.crashed_event.wait(),
+                self.cancellation_token.wait_cancellation_async())
+            if not self.started_event.is_set():
+                # Still down, so stopping it will not wait for it
+                self.crashed_event.set()
+        except Exception as e:
+            print(f"[Supervisor] Failed to escalate: {e}")
+
     def _calculate_backoff(self):
         """Calculates the backoff time based on the restart strategy."""
         if self.restart_strategy.strategy == RestartStrategy.IMMEDIATE:
@@ -122,13 +284,27 @@ class Supervisor(ActorBase):
         """Handles stopping the service gracefully."""
         try:
             print("[Supervisor] Sending 'stop' to service")
-            await self.channels.supervisor_to_service.send_async(
-                Message(sender="supervisor", content="stop"),
-                self.loop,
-            )
-            while not self.stopped_event.is_set():
-                print("[Supervisor] Waiting for service to stop...")
-                await asyncio.sleep(1.0)
-            print("[Supervisor] Service has stopped!")
+            await self.channels.supervisor_to_service.send_async(SUPERVISOR_STOP_MESSAGE, self.loop)
+            # A crashed service will not report that it stopped
+            await self._wait_for_first(
+                self.stopped_event.wait(),
+                self.crashed_event.wait(),
+                timeout=self.stop_timeout)
+            if self.stopped_event.is_set():
+                print("[Supervisor] Service has stopped!")
+            elif self.crashed_event.is_set():
+                print("[Supervisor] Service has crashed, not waiting for it to stop")
+            else:
+                print(f"[Supervisor] Service did not stop within {self.stop_timeout} seconds")
         except Exception as e:
             print(f"[Supervisor] Error stopping service: {e}")
+
+    async def _wait_for_first(self, *coroutines, timeout=None):
+        """Waits until the first of the coroutines finishes, or timeout seconds
+        have passed, and cancels the rest."""
+        tasks = [self.loop.create_task(coroutine) for coroutine in coroutines]
+        try:
+            await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
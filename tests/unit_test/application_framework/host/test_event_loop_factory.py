@@ -0,0 +1,76 @@
+import asyncio
+import pickle
+import threading
+import time
+import unittest
+
+from application_framework.host.event_loop_factory import EventLoopFactory
+from application_framework.service.service_runner import ServiceRunner
+from unit_test.unit_test_case import UnitTestCase
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class CustomEventLoop(asyncio.SelectorEventLoop):
+    pass
+
+
+def current_thread_after_a_while():
+    time.sleep(0.05)
+    return threading.get_ident()
+
+
+class TestEventLoopFactory(UnitTestCase):
+
+    def create_loop(self, factory):
+        loop = factory.create_loop()
+        self.addCleanup(loop.close)
+        return loop
+
+    def test_creates_asyncio_loops_by_default(self):
+        loop = self.create_loop(EventLoopFactory())
+        self.assertIsInstance(loop, asyncio.AbstractEventLoop)
+        self.assertFalse(loop.get_debug())
+
+    def test_creates_loops_with_the_given_callable(self):
+        self.assertIsInstance(self.create_loop(EventLoopFactory(CustomEventLoop)), CustomEventLoop)
+
+    def test_enables_slow_callback_logging(self):
+        loop = self.create_loop(EventLoopFactory(slow_callback_duration=0.25))
+        self.assertTrue(loop.get_debug())
+        self.assertEqual(0.25, loop.slow_callback_duration)
+
+    def test_limits_the_default_executor(self):
+        loop = self.create_loop(EventLoopFactory(default_executor_workers=2))
+
+        async def run_blocking_calls():
+            return await asyncio.gather(*[loop.run_in_executor(None, current_thread_after_a_while)
+                                          for _ in range(6)])
+
+        self.assertEqual(2, len(set(loop.run_until_complete(run_blocking_calls()))))
+        # Closing the loop shuts its default executor down
+        loop.close()
+
+    def test_is_pickled_with_its_callable(self):
+        factory = pickle.loads(pickle.dumps(EventLoopFactory(CustomEventLoop, 0.25, 2)))
+        self.assertIs(CustomEventLoop, factory.loop_factory)
+        self.assertEqual((0.25, 2), (factory.slow_callback_duration, factory.default_executor_workers))
+
+    def test_service_loops_come_from_the_factory(self):
+        loop = ServiceRunner.create_loop(EventLoopFactory(CustomEventLoop))
+        self.addCleanup(loop.close)
+        self.assertIsInstance(loop, CustomEventLoop)
+
+    @unittest.skipIf(uvloop is not None, "uvloop is installed")
+    def test_auto_falls_back_to_asyncio_without_uvloop(self):
+        self.assertIs(asyncio.new_event_loop, EventLoopFactory(EventLoopFactory.AUTO).get_loop_factory())
+        with self.assertRaises(RuntimeError):
+            EventLoopFactory(EventLoopFactory.UVLOOP).create_loop()
+
+    @unittest.skipIf(uvloop is None, "uvloop is not installed")
+    def test_creates_uvloop_loops(self):
+        for loop_factory in [EventLoopFactory.UVLOOP, EventLoopFactory.AUTO]:
+            self.assertIsInstance(self.create_loop(EventLoopFactory(loop_factory)), uvloop.Loop)
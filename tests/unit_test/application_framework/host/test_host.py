@@ -0,0 +1,312 @@
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import unittest
+
+from application_framework.host.builder import HostBuilder
+from application_framework.host.host import Host
+from application_framework.host.interpreter_runner import InterpreterRunner
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.channel_executor import ChannelExecutor
+from application_framework.messaging.channels import Channels
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from application_framework.service.application.builder import ApplicationBuilder
+from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service import Service
+from application_framework.service.service_config import ServiceConfig
+from application_framework.supervisor.restart_strategy import RestartStrategy
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+from unit_test.unit_test_case import UnitTestCase
+
+# Services are handed to their threads and processes along with their
+# serialized dependency container
+import unit_test.container_state  # noqa: F401
+
+
+class IdleService(Service):
+
+    def run(self):
+        while not self.cancellation_token.is_cancellation_requested:
+            time.sleep(0.01)
+        self.channels.service_to_supervisor.send(self.stopped_message)
+
+    async def run_async(self):
+        while not self.cancellation_token.is_cancellation_requested:
+            await asyncio.sleep(0.01)
+        await self.channels.service_to_supervisor.send_async(self.stopped_message, self.loop)
+
+
+class StuckService(Service):
+    """Ignores being told to stop."""
+
+    def run(self):
+        while True:
+            time.sleep(1)
+
+
+class CrashingOnceService(IdleService):
+    """Raises the first time it runs."""
+    runs = 0
+
+    def run(self):
+        CrashingOnceService.runs += 1
+        if CrashingOnceService.runs == 1:
+            raise RuntimeError("crashed")
+        super().run()
+
+
+class HangingOnceService(IdleService):
+    """Reports a crash and hangs the first time it runs."""
+    # Created by the test before the host forks its workers
+    hung_marker_path = None
+
+    def run(self):
+        if not os.path.exists(self.hung_marker_path):
+            open(self.hung_marker_path, "w").close()
+            self.channels.service_to_supervisor.send(self.crashed_message)
+            while True:
+                time.sleep(1)
+        super().run()
+
+
+class GcReportingService(IdleService):
+    """Writes the collector state of its worker to a file."""
+    report_path = None
+
+    def run(self):
+        with open(self.report_path, "w") as f:
+            f.write(f"{gc.get_freeze_count() > 0} {gc.isenabled()}")
+        super().run()
+
+
+class ReplicaService(Service):
+    """Records the work items each replica takes."""
+    taken = []
+
+    def run(self):
+        while not self.cancellation_token.is_cancellation_requested:
+            message = self.receive_work(timeout=0.01)
+            if message:
+                self.taken.append((self.replica_index, message.content))
+                # Leaves the next items to the other replicas
+                time.sleep(0.01)
+        self.channels.service_to_supervisor.send(self.stopped_message)
+
+
+class TestHost(UnitTestCase):
+
+    def start_and_stop(self, execution_mode):
+        application = (ApplicationBuilder()
+                       .set_name(execution_mode.value)
+                       .set_application_class(IdleService)
+                       .set_execution_mode(execution_mode)
+                       .build())
+        host = HostBuilder().add_application(application).build()
+        host.loop.create_task(self.stop_once_started(host))
+        host.start()
+        timing = host.lifecycle_manager.timings[application.service_id]
+        self.assertIn("started", timing)
+        self.assertIn("stopped", timing)
+        self.assertNotIn("forced", timing)
+
+    async def stop_once_started(self, host):
+        while not self.all_started(host.lifecycle_manager.started_events):
+            await asyncio.sleep(0.01)
+        await host.stop_async()
+
+    @staticmethod
+    def all_started(started_events):
+        return started_events and all(event.is_set() for event in started_events.values())
+
+    def test_main_event_loop_async(self):
+        self.start_and_stop(ExecutionMode.MAIN_EVENT_LOOP_ASYNC)
+
+    def test_separate_thread(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_THREAD)
+
+    def test_separate_thread_async(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_THREAD_ASYNC)
+
+    def test_separate_process(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_PROCESS)
+
+    def test_separate_process_async(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_PROCESS_ASYNC)
+
+    def test_preforked_process(self):
+        self.start_and_stop(ExecutionMode.PREFORKED_PROCESS)
+
+    def test_preforked_process_async(self):
+        self.start_and_stop(ExecutionMode.PREFORKED_PROCESS_ASYNC)
+
+    @unittest.skipUnless(InterpreterRunner.is_supported(), "subinterpreters require Python 3.13 or later")
+    def test_separate_interpreter(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_INTERPRETER)
+
+    @unittest.skipUnless(InterpreterRunner.is_supported(), "subinterpreters require Python 3.13 or later")
+    def test_separate_interpreter_async(self):
+        self.start_and_stop(ExecutionMode.SEPARATE_INTERPRETER_ASYNC)
+
+    def test_replicas_share_the_work_submitted_to_their_service(self):
+        ReplicaService.taken = []
+        application = (ApplicationBuilder()
+                       .set_name("worker")
+                       .set_application_class(ReplicaService)
+                       .set_execution_mode(ExecutionMode.SEPARATE_THREAD)
+                       .set_replicas(2)
+                       .build())
+        host = HostBuilder().add_application(application).build()
+
+        async def submit_and_stop():
+            while not self.all_started(host.lifecycle_manager.started_events):
+                await asyncio.sleep(0.01)
+            for payload in range(20):
+                await host.submit_work_async("worker", payload)
+            while len(ReplicaService.taken) < 20:
+                await asyncio.sleep(0.01)
+            await host.stop_async()
+
+        host.loop.create_task(submit_and_stop())
+        host.start()
+        self.assertEqual(["worker-0", "worker-1"], sorted(config.name for config in host.service_configs))
+        self.assertEqual(list(range(20)), sorted(payload for _, payload in ReplicaService.taken))
+        self.assertEqual({0, 1}, {index for index, _ in ReplicaService.taken})
+
+    def test_force_stops_a_process_service_that_does_not_stop(self):
+        application = (ApplicationBuilder()
+                       .set_name("stuck")
+                       .set_application_class(StuckService)
+                       .set_execution_mode(ExecutionMode.SEPARATE_PROCESS)
+                       .set_stop_timeout(0.3)
+                       .build())
+        host = HostBuilder().add_application(application).build()
+        host.loop.create_task(self.stop_once_started(host))
+        host.start()
+        self.assertTrue(host.lifecycle_manager.timings[application.service_id].get("forced"))
+
+    def test_restarts_a_crashed_service(self):
+        CrashingOnceService.runs = 0
+        application = (ApplicationBuilder()
+                       .set_name("crashing")
+                       .set_application_class(CrashingOnceService)
+                       .set_execution_mode(ExecutionMode.SEPARATE_THREAD)
+                       .set_restart_strategy(RestartStrategy.IMMEDIATE)
+                       .build())
+        host = HostBuilder().add_application(application).build()
+
+        async def stop_once_restarted():
+            supervisors = host.supervisors
+            while application.service_id not in supervisors or supervisors[application.service_id].restart_count < 1:
+                await asyncio.sleep(0.01)
+            await host.stop_async()
+
+        host.loop.create_task(stop_once_restarted())
+        host.start()
+        self.assertEqual(2, CrashingOnceService.runs)
+        self.assertNotIn("forced", host.lifecycle_manager.timings[application.service_id])
+
+    def test_restarts_a_hung_process_service_alone(self):
+        HangingOnceService.hung_marker_path = os.path.join(tempfile.mkdtemp(), "hung")
+        idle, hanging = [(ApplicationBuilder()
+                          .set_name(application_class.__name__)
+                          .set_application_class(application_class)
+                          .set_execution_mode(ExecutionMode.SEPARATE_PROCESS)
+                          .set_restart_strategy(RestartStrategy.IMMEDIATE)
+                          .set_stop_timeout(0.3)
+                          .build()) for application_class in [IdleService, HangingOnceService]]
+        host = HostBuilder().add_application(idle).add_application(hanging).build()
+        outcome = {}
+
+        async def stop_once_restarted():
+            supervisors = host.supervisors
+            while hanging.service_id not in supervisors or supervisors[hanging.service_id].restart_count < 1:
+                await asyncio.sleep(0.01)
+            # Killing the hung worker must neither stop the host nor break
+            # the pool of the other service
+            await asyncio.sleep(0.5)
+            outcome["is_host_stopping"] = host.host_cancellation_token_source.token.is_cancellation_requested
+            outcome["idle_restarts"] = supervisors[idle.service_id].restart_count
+            await host.stop_async()
+
+        host.loop.create_task(stop_once_restarted())
+        host.start()
+        self.assertEqual({"is_host_stopping": False, "idle_restarts": 0}, outcome)
+        self.assertNotIn("forced", host.lifecycle_manager.timings[hanging.service_id])
+
+    def test_process_services_start_with_a_frozen_collector(self):
+        GcReportingService.report_path = os.path.join(tempfile.mkdtemp(), "gc")
+        application = (ApplicationBuilder()
+                       .set_name("gc")
+                       .set_application_class(GcReportingService)
+                       .set_execution_mode(ExecutionMode.SEPARATE_PROCESS)
+                       .set_gc(enabled=False)
+                       .build())
+        host = HostBuilder().add_application(application).set_freeze_gc().build()
+        self.addCleanup(gc.unfreeze)
+        host.loop.create_task(self.stop_once_started(host))
+        host.start()
+        with open(GcReportingService.report_path) as f:
+            self.assertEqual("True False", f.read())
+
+
+
+class TestHostRouting(AsyncUnitTestCase):
+
+    def test_keeps_routing_after_a_message_fails(self):
+        host = Host(self.loop)
+        handled = []
+
+        async def handle(message):
+            if message.content == "unroutable":
+                raise RuntimeError("cannot route")
+            handled.append(message.content)
+
+        host.supervisor_message_handlers[MessageKind.REQUEST] = handle
+        channels = Channels(None, AsyncioQueue(), None, None)
+        # A failed receive on a Manager queue returns None
+        channels.supervisor_to_host.queue.put_nowait(None)
+        for content in ["unroutable", "routed"]:
+            channels.supervisor_to_host.send(Message(sender="service", content=content, kind=MessageKind.REQUEST))
+        task = self.loop.create_task(host.run_supervisor_listener_async(channels))
+
+        async def wait_until_routed():
+            while not handled:
+                await asyncio.sleep(0.01)
+
+        self.run_async(wait_until_routed())
+        task.cancel()
+        self.run_async(asyncio.wait([task]))
+        self.assertEqual(["routed"], handled)
+
+
+class TestHostConfiguration(AsyncUnitTestCase):
+
+    @unittest.skipIf(InterpreterRunner.is_supported(), "subinterpreters are supported")
+    def test_rejects_interpreter_services_before_python_3_13(self):
+        config = ServiceConfig("service", Service, ExecutionMode.SEPARATE_INTERPRETER, RestartStrategy(), None, None,
+                               "service", {})
+        with self.assertRaisesRegex(RuntimeError, "3.13"):
+            Host(self.loop).add_service_config(config)
+
+    def test_raises_if_a_service_thread_could_not_be_ended(self):
+        host = Host(self.loop)
+        config = ServiceConfig("service", Service, ExecutionMode.SEPARATE_THREAD, RestartStrategy(), None, None,
+                               "stuck", {})
+        host.add_service_config(config)
+        host.raise_if_threads_unended()
+        host.service_tasks[config.service_id] = self.loop.create_future()
+        with self.assertRaisesRegex(RuntimeError, "stuck"):
+            host.raise_if_threads_unended()
+
+    def test_counts_a_channel_executor_thread_per_lane_of_a_manager_queue(self):
+        host = Host(self.loop)
+        for name, priority_lanes in [("plain", False), ("laned", True)]:
+            # Dropping the oldest messages keeps the services on Manager queues
+            host.add_service_config(ServiceConfig(name, Service, ExecutionMode.SEPARATE_PROCESS, RestartStrategy(),
+                                                  None, None, name, {},
+                                                  overflow_policy=OverflowPolicy(OverflowPolicy.DROP_OLDEST),
+                                                  priority_lanes=priority_lanes))
+        self.assertEqual(ChannelExecutor.DEFAULT_MAX_WORKERS + 3, host.get_channel_executor_workers())
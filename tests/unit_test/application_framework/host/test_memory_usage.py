@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from unittest import mock
+
+from application_framework.host.memory_usage import MemoryUsage
+from unit_test.unit_test_case import UnitTestCase
+
+SMAPS_ROLLUP = """\
+00400000-7fff5b1fe000 ---p 00000000 00:00 0                              [rollup]
+Rss:               10240 kB
+Pss:                6144 kB
+Shared_Clean:       4096 kB
+Shared_Dirty:       1024 kB
+Private_Clean:      2048 kB
+Private_Dirty:      3072 kB
+Swap:                  0 kB
+"""
+
+
+class TestMemoryUsage(UnitTestCase):
+
+    def test_reads_the_sizes_of_smaps_rollup(self):
+        with mock.patch("builtins.open", mock.mock_open(read_data=SMAPS_ROLLUP)) as open_mock:
+            usage = MemoryUsage.read(1234)
+        open_mock.assert_called_once_with("/proc/1234/smaps_rollup")
+        self.assertEqual(MemoryUsage(rss=10 << 20, pss=6 << 20, shared=5 << 20, private=5 << 20), usage)
+        self.assertEqual("rss 10.0 MiB, pss 6.0 MiB, shared 5.0 MiB, private 5.0 MiB", str(usage))
+
+    def test_returns_none_without_smaps_rollup(self):
+        with mock.patch("builtins.open", side_effect=FileNotFoundError):
+            self.assertIsNone(MemoryUsage.read(1234))
+
+    @unittest.skipUnless(os.path.exists("/proc/self/smaps_rollup"), "smaps_rollup requires Linux 4.14 or later")
+    def test_reports_the_pages_a_forked_process_shares(self):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(write_fd)
+            os.read(read_fd, 1)
+            os._exit(0)
+        os.close(read_fd)
+        try:
+            usage = MemoryUsage.read(pid)
+        finally:
+            os.close(write_fd)
+            os.waitpid(pid, 0)
+        self.assertGreater(usage.shared, 0)
+        self.assertLess(usage.pss, usage.rss)
+        self.assertEqual(usage.rss, usage.shared + usage.private)
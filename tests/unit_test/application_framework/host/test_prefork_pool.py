@@ -0,0 +1,85 @@
+import gc
+import os
+import signal
+
+from concurrent.futures.process import BrokenProcessPool
+
+from application_framework.host.prefork_pool import PreforkPool
+from application_framework.service.application.builder import ApplicationBuilder
+from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service import Service
+from application_framework.service.service_runner import ServiceRunner
+from unit_test.unit_test_case import UnitTestCase
+
+# Each worker deserializes the dependency container of its service
+import unit_test.container_state  # noqa: F401
+
+
+class PreforkedService(Service):
+    pass
+
+
+def describe_worker():
+    return {
+        "pid": os.getpid(),
+        "warm_service_ids": ServiceRunner.warm_service_ids,
+        "is_gc_frozen": gc.get_freeze_count() > 0,
+        "sigterm_handler": signal.getsignal(signal.SIGTERM),
+    }
+
+
+class TestPreforkPool(UnitTestCase):
+
+    def setUp(self):
+        self.configs = [(ApplicationBuilder()
+                         .set_name(name)
+                         .set_application_class(PreforkedService)
+                         .set_execution_mode(ExecutionMode.PREFORKED_PROCESS)
+                         .build()) for name in ["first", "second"]]
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            for executor in self.pool.executors.values():
+                executor.shutdown(wait=True)
+
+    def start_pool(self, freeze_gc=False):
+        self.pool = PreforkPool(self.configs, freeze_gc)
+        self.pool.start()
+        return self.pool
+
+    def describe(self, config):
+        return self.pool.executors[config.service_id].submit(describe_worker).result(timeout=30)
+
+    def test_preloads_the_framework_and_the_service_modules(self):
+        self.assertEqual(sorted({"application_framework.host.host", __name__}),
+                         PreforkPool.get_preload_modules(self.configs))
+
+    def test_warms_a_worker_of_its_own_for_each_service(self):
+        self.start_pool()
+        first, second = [self.describe(config) for config in self.configs]
+        self.assertNotEqual(first["pid"], second["pid"])
+        self.assertEqual({self.configs[0].service_id}, first["warm_service_ids"])
+        self.assertEqual({self.configs[1].service_id}, second["warm_service_ids"])
+        self.assertFalse(first["is_gc_frozen"])
+        self.assertEqual(signal.SIG_DFL, first["sigterm_handler"])
+
+    def test_freezes_the_collector_of_its_workers(self):
+        self.start_pool(freeze_gc=True)
+        self.assertTrue(self.describe(self.configs[0])["is_gc_frozen"])
+
+    def test_restarts_a_killed_worker_alone(self):
+        self.start_pool()
+        killed, other = self.configs
+        killed_pid = self.describe(killed)["pid"]
+        other_pid = self.describe(other)["pid"]
+        os.kill(killed_pid, signal.SIGKILL)
+        with self.assertRaises(BrokenProcessPool):
+            # The pool may only notice the dead worker with the next call
+            for _ in range(100):
+                self.describe(killed)
+        self.pool.restart(killed.service_id)
+        restarted = self.describe(killed)
+        self.assertNotEqual(killed_pid, restarted["pid"])
+        self.assertEqual({killed.service_id}, restarted["warm_service_ids"])
+        self.assertEqual(other_pid, self.describe(other)["pid"])
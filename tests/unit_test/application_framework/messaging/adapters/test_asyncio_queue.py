@@ -0,0 +1,37 @@
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message import Message
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestAsyncioQueue(AsyncUnitTestCase):
+
+    def test_hands_messages_over_as_objects(self):
+        queue = AsyncioQueue()
+        message = Message(sender="sender", content={"key": "value"})
+        self.run_async(queue.send_async(message, self.loop))
+        self.assertIs(message, self.run_async(queue.receive_async(self.loop)))
+
+    def test_encodes_messages_with_a_codec(self):
+        queue = AsyncioQueue(PickleCodec())
+        message = Message(sender="sender", content={"key": "value"})
+        queue.send(message)
+        received = queue.receive()
+        self.assertIsNot(message, received)
+        self.assertEqual(message, received)
+
+    def test_receive_many_async_returns_what_is_available(self):
+        queue = AsyncioQueue()
+        queue.send_many([Message(sender="sender", content=content) for content in "abc"])
+        messages = self.run_async(queue.receive_many_async(self.loop, 2))
+        self.assertEqual(["a", "b"], [message.content for message in messages])
+        self.assertEqual(["c"], [message.content for message in queue.receive_many(2)])
+
+    def test_receive_many_async_returns_nothing_on_timeout(self):
+        self.assertEqual([], self.run_async(AsyncioQueue().receive_many_async(self.loop, 1, timeout=0.01)))
+
+    def test_sync_receives_never_wait(self):
+        queue = AsyncioQueue()
+        self.assertIsNone(queue.receive())
+        self.assertEqual([], queue.receive_many(1, timeout=5))
+        self.assertEqual([], queue.receive_many(1, timeout=None))
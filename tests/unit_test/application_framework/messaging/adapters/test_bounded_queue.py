@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+
+from queue import Full
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.adapters.bounded_queue import BoundedQueue
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class DepthCountingQueue(ThreadQueue):
+
+    def __init__(self):
+        super().__init__()
+        self.depth_queries = 0
+
+    def qsize(self):
+        self.depth_queries += 1
+        return super().qsize()
+
+
+class TestBoundedQueue(AsyncUnitTestCase):
+
+    def messages(self, *contents):
+        return [Message(sender="sender", content=content) for content in contents]
+
+    def contents(self, messages):
+        return [message.content for message in messages]
+
+    def test_drop_newest_drops_what_does_not_fit(self):
+        queue = ThreadQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.DROP_NEWEST, capacity=3))
+        bounded.send_many(self.messages("a", "b"))
+        bounded.send_many(self.messages("c", "d", "e"))
+        self.assertEqual(2, bounded.dropped_count)
+        self.assertEqual(["a", "b", "c"], self.contents(queue.receive_many(10)))
+
+    def test_drop_oldest_keeps_the_newest_messages(self):
+        queue = ThreadQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.DROP_OLDEST, capacity=3))
+        bounded.send_many(self.messages("a", "b"))
+        bounded.send_many(self.messages("c", "d"))
+        self.assertEqual(1, bounded.dropped_count)
+        self.assertEqual(["b", "c", "d"], self.contents(queue.receive_many(10)))
+
+    def test_fail_fast_raises_when_full(self):
+        bounded = BoundedQueue(ThreadQueue(), OverflowPolicy(OverflowPolicy.FAIL_FAST, capacity=2))
+        bounded.send_many(self.messages("a", "b"))
+        with self.assertRaises(Full):
+            bounded.send(Message(sender="sender", content="c"))
+        self.assertEqual(2, bounded.qsize())
+
+    def test_control_messages_bypass_the_policy(self):
+        queue = ThreadQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.DROP_NEWEST, capacity=1))
+        bounded.send(Message(sender="sender", content="a"))
+        bounded.send_many(self.messages("b") + [Message.control("sender", MessageKind.STOPPED)])
+        self.assertEqual(1, bounded.dropped_count)
+        kinds = [message.kind for message in queue.receive_many(10)]
+        self.assertEqual([MessageKind.DATA, MessageKind.STOPPED], kinds)
+
+    def test_a_forwarding_request_passes_a_full_queue(self):
+        queue = ThreadQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.DROP_NEWEST, capacity=1))
+        bounded.send(Message(sender="sender", content="a"))
+        bounded.send(Message.control("sender", MessageKind.FORWARD_EVENTS))
+        self.assertEqual(0, bounded.dropped_count)
+        kinds = [message.kind for message in queue.receive_many(10)]
+        self.assertEqual([MessageKind.DATA, MessageKind.FORWARD_EVENTS], kinds)
+
+    def test_block_raises_on_a_full_in_loop_queue(self):
+        bounded = BoundedQueue(AsyncioQueue(), OverflowPolicy(OverflowPolicy.BLOCK, capacity=2))
+        bounded.send_many(self.messages("a", "b"))
+        with self.assertRaises(Full):
+            bounded.send(Message(sender="sender", content="c"))
+
+    def test_block_waits_until_drained_to_the_low_watermark(self):
+        queue = ThreadQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.BLOCK, capacity=4, low_watermark=1))
+
+        async def scenario():
+            await bounded.send_many_async(self.messages("a", "b", "c", "d"), self.loop)
+            send = self.loop.create_task(bounded.send_async(Message(sender="sender", content="e"), self.loop))
+            await asyncio.sleep(0.02)
+            self.assertEqual(["a", "b"], self.contents(queue.receive_many(2)))
+            await asyncio.sleep(0.02)
+            self.assertFalse(send.done())
+            self.assertEqual(["c"], self.contents(queue.receive_many(1)))
+            await send
+
+        self.run_async(scenario())
+        self.assertEqual(["d", "e"], self.contents(queue.receive_many(10)))
+
+    def test_blocked_sender_backs_off(self):
+        queue = DepthCountingQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.BLOCK, capacity=1, low_watermark=0))
+        bounded.send(Message(sender="sender", content="a"))
+        sender = threading.Thread(target=bounded.send, args=(Message(sender="sender", content="b"),))
+        queue.depth_queries = 0
+        sender.start()
+        time.sleep(0.2)
+        self.assertEqual(["a"], self.contents(queue.receive_many(1)))
+        sender.join(1)
+        self.assertEqual(["b"], self.contents(queue.receive_many(1)))
+        # Polling every millisecond would have asked 200 times
+        self.assertLess(queue.depth_queries, 60)
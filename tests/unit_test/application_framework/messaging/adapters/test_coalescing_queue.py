@@ -0,0 +1,60 @@
+import asyncio
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.adapters.coalescing_queue import CoalescingQueue
+from application_framework.messaging.message import Message, MessageKind
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class BatchRecordingQueue(AsyncioQueue):
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def send_many(self, messages):
+        self.batches.append([message.content for message in messages])
+        super().send_many(messages)
+
+
+class TestCoalescingQueue(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = BatchRecordingQueue()
+        self.coalescing = CoalescingQueue(self.queue, window=0.01)
+
+    def send_async(self, *contents):
+        for content in contents:
+            self.run_async(self.coalescing.send_async(Message(sender="sender", content=content), self.loop))
+
+    def test_coalesces_async_sends_within_the_window(self):
+        self.send_async("a", "b", "c")
+        self.assertEqual([], self.queue.batches)
+        self.assertEqual(3, self.coalescing.qsize())
+        self.run_async(asyncio.sleep(0.05))
+        self.assertEqual([["a", "b", "c"]], self.queue.batches)
+
+    def test_control_messages_flush_at_once(self):
+        self.send_async("a")
+        self.run_async(self.coalescing.send_async(Message.control("sender", MessageKind.STOPPED), self.loop))
+        self.assertEqual(1, len(self.queue.batches))
+        self.assertEqual([MessageKind.DATA, MessageKind.STOPPED],
+                         [message.kind for message in self.queue.receive_many(10)])
+
+    def test_max_batch_size_flushes_at_once(self):
+        self.coalescing.max_batch_size = 2
+        self.send_async("a", "b", "c")
+        self.assertEqual([["a", "b"]], self.queue.batches)
+
+    def test_sync_sends_do_not_overtake_async_sends(self):
+        self.send_async("a", "b")
+        self.coalescing.send(Message(sender="sender", content="c"))
+        self.assertEqual([["a", "b"], ["c"]], self.queue.batches)
+
+    def test_close_flushes_the_window(self):
+        self.send_async("a")
+        self.coalescing.close()
+        self.assertEqual([["a"]], self.queue.batches)
+        self.run_async(asyncio.sleep(0.05))
+        self.assertEqual([["a"]], self.queue.batches)
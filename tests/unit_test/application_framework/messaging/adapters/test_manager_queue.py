@@ -0,0 +1,72 @@
+import threading
+
+from application_framework.messaging.adapters.bounded_queue import BoundedQueue
+from application_framework.messaging.adapters.manager_queue import ManagerQueue
+from application_framework.messaging.message import Message
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestManagerQueue(AsyncUnitTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.manager = ManagerQueue.start_manager()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.manager.shutdown()
+
+    def setUp(self):
+        super().setUp()
+        self.queue = ManagerQueue.create(self.manager)
+
+    def messages(self, *contents):
+        return [Message(sender="sender", content=content) for content in contents]
+
+    def contents(self, messages):
+        return [message.content for message in messages]
+
+    def test_qsize_counts_the_messages_of_batches(self):
+        self.queue.send_many(self.messages("a", "b", "c"))
+        self.queue.send(Message(sender="sender", content="d"))
+        self.assertEqual(4, self.queue.qsize())
+        self.assertEqual(["a", "b"], self.contents(self.queue.receive_many(2, 1)))
+        # The rest of the first batch was taken off the queue with it
+        self.assertEqual(1, self.queue.qsize())
+        self.assertEqual(["c"], self.contents(self.queue.receive_many(2, 1)))
+        self.assertEqual(["d"], self.contents(self.queue.receive_many(2, 1)))
+        self.assertEqual(0, self.queue.qsize())
+
+    def test_receive_without_a_timeout_waits(self):
+        timer = threading.Timer(0.05, self.queue.send, args=(Message(sender="sender", content="late"),))
+        timer.start()
+        self.assertEqual(["late"], self.contents(self.queue.receive_many(1, None)))
+        timer.join()
+
+    def test_discard_splits_batches_and_keeps_the_order(self):
+        self.queue.send_many(self.messages("a", "b", "c"))
+        self.queue.send_many(self.messages("d", "e"))
+        self.assertEqual(2, self.queue.discard(2))
+        self.assertEqual(3, self.queue.qsize())
+        self.assertEqual(["c", "d", "e"], self.contents(self.queue.receive_many(10, 1)))
+
+    def test_discard_stops_when_the_queue_is_empty(self):
+        self.queue.send_many(self.messages("a"))
+        self.assertEqual(1, self.queue.discard(5))
+        self.assertEqual(0, self.queue.qsize())
+        self.assertEqual([], self.queue.receive_many(1, 0))
+
+    def test_drop_oldest_keeps_the_newest_messages(self):
+        bounded = BoundedQueue(self.queue, OverflowPolicy(OverflowPolicy.DROP_OLDEST, capacity=3))
+        bounded.send_many(self.messages("a", "b"))
+        bounded.send_many(self.messages("c", "d"))
+        bounded.send(Message(sender="sender", content="e"))
+        self.assertEqual(3, self.queue.qsize())
+        self.assertEqual(2, bounded.dropped_count)
+        self.assertEqual(["c", "d", "e"], self.contents(self.queue.receive_many(10, 1)))
+
+    def test_async_receive_many_returns_nothing_on_timeout(self):
+        self.run_async(self.queue.send_many_async(self.messages("a", "b"), self.loop))
+        self.assertEqual(["a", "b"], self.contents(self.run_async(self.queue.receive_many_async(self.loop, 5, 1))))
+        self.assertEqual([], self.run_async(self.queue.receive_many_async(self.loop, 1, 0.01)))
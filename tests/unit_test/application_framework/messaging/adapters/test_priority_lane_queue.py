@@ -0,0 +1,84 @@
+import threading
+import time
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.adapters.priority_lane_queue import PriorityLaneQueue
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from application_framework.messaging.message import Message, MessageKind
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestPriorityLaneQueue(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = PriorityLaneQueue(AsyncioQueue(), AsyncioQueue(), max_control_burst=2)
+
+    def tearDown(self):
+        self.queue.close()
+        self.run_async(self._settle())
+        super().tearDown()
+
+    def send_data_then_control(self, control_count):
+        self.queue.send(Message(sender="sender", content="data"))
+        for _ in range(control_count):
+            self.queue.send(Message.control("sender", MessageKind.STARTED))
+
+    def test_receive_takes_control_messages_first(self):
+        self.send_data_then_control(1)
+        self.assertEqual(MessageKind.STARTED, self.queue.receive().kind)
+        self.assertEqual(MessageKind.DATA, self.queue.receive().kind)
+        self.assertIsNone(self.queue.receive())
+
+    def test_receive_lets_data_through_after_a_control_burst(self):
+        self.send_data_then_control(3)
+        kinds = [self.queue.receive().kind for _ in range(4)]
+        self.assertEqual([MessageKind.STARTED, MessageKind.STARTED, MessageKind.DATA, MessageKind.STARTED], kinds)
+
+    def test_receive_async_takes_control_messages_first(self):
+        self.send_data_then_control(3)
+        kinds = [self.run_async(self.queue.receive_async(self.loop)).kind for _ in range(4)]
+        self.assertEqual(MessageKind.STARTED, kinds[0])
+        self.assertEqual(1, kinds.count(MessageKind.DATA))
+        self.assertEqual(0, self.queue.qsize())
+
+    def test_receive_many_takes_control_messages_first(self):
+        self.queue.send_many([Message(sender="sender", content="a"), Message(sender="sender", content="b"),
+                              Message.control("sender", MessageKind.STOPPED)])
+        self.assertEqual(3, self.queue.qsize())
+        messages = self.queue.receive_many(10)
+        self.assertEqual([MessageKind.STOPPED, MessageKind.DATA, MessageKind.DATA], [m.kind for m in messages])
+        self.assertEqual(["a", "b"], [m.content for m in messages[1:]])
+
+    def test_sync_receive_many_is_woken_by_a_control_message(self):
+        queue = PriorityLaneQueue(ThreadQueue(), ThreadQueue())
+        timer = threading.Timer(0.05, queue.send, args=(Message.control("host", MessageKind.STOP),))
+        timer.start()
+        started = time.monotonic()
+        messages = queue.receive_many(10, timeout=5)
+        timer.join()
+        self.assertEqual([MessageKind.STOP], [message.kind for message in messages])
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_sync_receive_many_without_a_timeout_waits_for_data(self):
+        queue = PriorityLaneQueue(ThreadQueue(), ThreadQueue())
+        timer = threading.Timer(0.05, queue.send, args=(Message(sender="sender", content="late"),))
+        timer.start()
+        self.assertEqual(["late"], [message.content for message in queue.receive_many(10, timeout=None)])
+        timer.join()
+
+    def test_close_cancels_pending_lane_receives(self):
+        self.run_async(self.queue.receive_many_async(self.loop, 1, timeout=0.01))
+        self.assertIsNotNone(self.queue.control_task)
+        self.queue.close()
+        self.run_async(self._settle())
+        self.assertTrue(self.queue.control_task.cancelled())
+
+    async def _settle(self):
+        for task in [self.queue.control_task, self.queue.data_task]:
+            if task is None:
+                continue
+            try:
+                await task
+            except BaseException:
+                pass
@@ -0,0 +1,130 @@
+import asyncio
+import multiprocessing
+import sys
+import threading
+import unittest
+
+from application_framework.messaging.adapters.shared_memory_queue import SharedMemoryQueue
+from application_framework.messaging.message import Message
+from unit_test.unit_test_case import UnitTestCase
+
+
+def send_contents(queue, sender, contents):
+    for content in contents:
+        queue.send(Message(sender=sender, content=content))
+
+
+@unittest.skipUnless(SharedMemoryQueue.is_supported(), "SharedMemoryQueue requires Python 3.8 or later")
+class TestSharedMemoryQueue(UnitTestCase):
+
+    def setUp(self):
+        self.queue = None
+
+    def tearDown(self):
+        if self.queue is not None:
+            self.queue.close()
+
+    def create_queue(self, capacity=1024 * 1024):
+        self.queue = SharedMemoryQueue(capacity)
+        return self.queue
+
+    def receive_contents(self, count, timeout=5):
+        contents = []
+        while len(contents) < count:
+            messages = self.queue.receive_many(count - len(contents), timeout)
+            if not messages:
+                self.fail(f"Received {len(contents)} of {count} messages")
+            contents.extend(message.content for message in messages)
+        return contents
+
+    def test_receives_batches_in_order(self):
+        queue = self.create_queue()
+        queue.send_many([Message(sender="sender", content=content) for content in ["a", "b", "c"]])
+        queue.send(Message(sender="sender", content="d"))
+        self.assertEqual(4, queue.qsize())
+        self.assertEqual(["a", "b", "c", "d"], self.receive_contents(4))
+        self.assertEqual(0, queue.qsize())
+        self.assertEqual([], queue.receive_many(1, 0))
+
+    def test_records_wrap_around_the_end_of_the_ring(self):
+        queue = self.create_queue(capacity=512)
+        # Records of a size that does not divide the ring end up split
+        # across its end
+        contents = [f"{index:03}" * 20 for index in range(50)]
+        for content in contents:
+            queue.send(Message(sender="sender", content=content))
+            self.assertEqual([content], self.receive_contents(1))
+
+    def test_waits_while_the_ring_is_full(self):
+        queue = self.create_queue(capacity=512)
+        contents = [str(index) * 40 for index in range(100)]
+        sender = threading.Thread(target=send_contents, args=(queue, "sender", contents))
+        sender.start()
+        self.assertEqual(contents, self.receive_contents(len(contents)))
+        sender.join()
+
+    def test_rejects_a_message_larger_than_the_ring(self):
+        queue = self.create_queue(capacity=256)
+        with self.assertRaises(ValueError):
+            queue.send(Message(sender="sender", content="x" * 512))
+
+    def test_carries_attachments_as_separate_frames(self):
+        queue = self.create_queue()
+        attachments = (bytearray(b"first" * 100), memoryview(b"second" * 100))
+        queue.send(Message(sender="sender", content="body", attachments=attachments))
+        message = queue.receive_many(1, 5)[0]
+        self.assertEqual("body", message.content)
+        self.assertEqual([bytes(attachment) for attachment in attachments],
+                         [bytes(attachment) for attachment in message.attachments])
+
+    def test_serializes_concurrent_producer_threads(self):
+        queue = self.create_queue(capacity=4096)
+        names, count = ["first", "second", "third"], 5000
+        senders = [threading.Thread(target=send_contents, args=(queue, name, range(count))) for name in names]
+        switch_interval = sys.getswitchinterval()
+        # Switches threads often enough to interleave their writes
+        sys.setswitchinterval(1e-6)
+        try:
+            for sender in senders:
+                sender.start()
+            messages = []
+            while len(messages) < len(names) * count:
+                received = queue.receive_many(len(names) * count, 5)
+                if not received:
+                    self.fail(f"Received {len(messages)} of {len(names) * count} messages")
+                messages.extend(received)
+            for sender in senders:
+                sender.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for name in names:
+            self.assertEqual(list(range(count)), [m.content for m in messages if m.sender == name])
+
+    def test_receives_from_another_process(self):
+        queue = self.create_queue(capacity=4096)
+        SharedMemoryQueue.start_resource_tracker()
+        contents = list(range(1000))
+        process = multiprocessing.get_context("fork").Process(target=send_contents,
+                                                              args=(queue, "process", contents))
+        process.start()
+        self.assertEqual(contents, self.receive_contents(len(contents)))
+        process.join(5)
+        self.assertEqual(0, process.exitcode)
+
+    def test_receive_without_a_timeout_waits_for_the_wakeup(self):
+        queue = self.create_queue()
+        timer = threading.Timer(0.05, queue.send, args=(Message(sender="sender", content="late"),))
+        timer.start()
+        self.assertEqual(["late"], [message.content for message in queue.receive_many(1, None)])
+        timer.join()
+
+    def test_async_receive_waits_for_the_wakeup(self):
+        queue = self.create_queue()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.call_later(0.05, queue.send, Message(sender="sender", content="late"))
+            message = loop.run_until_complete(asyncio.wait_for(queue.receive_async(loop), 5))
+            self.assertEqual("late", message.content)
+            self.assertEqual([], loop.run_until_complete(queue.receive_many_async(loop, 1, 0.01)))
+        finally:
+            loop.close()
@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+import threading
+
+from application_framework.messaging.adapters.socket_pair_queue import SocketPairQueue
+from application_framework.messaging.message import Message
+from unit_test.unit_test_case import UnitTestCase
+
+
+def echo_contents(to_service, to_supervisor, count):
+    for message in receive_messages(to_service, count):
+        to_supervisor.send(Message(sender="service", content=message.content))
+
+
+def receive_messages(queue, count, timeout=5):
+    messages = []
+    while len(messages) < count:
+        received = queue.receive_many(count - len(messages), timeout)
+        if not received:
+            break
+        messages.extend(received)
+    return messages
+
+
+class TestSocketPairQueue(UnitTestCase):
+
+    def setUp(self):
+        self.to_service, self.to_supervisor = SocketPairQueue.create_pair()
+
+    def tearDown(self):
+        self.to_service.close()
+        self.to_supervisor.close()
+
+    def test_carries_messages_both_ways(self):
+        self.to_service.send_many([Message(sender="supervisor", content=content) for content in ["a", "b"]])
+        self.to_supervisor.send(Message(sender="service", content="c"))
+        self.assertEqual(["a", "b"], [m.content for m in receive_messages(self.to_service, 2)])
+        self.assertEqual(["c"], [m.content for m in receive_messages(self.to_supervisor, 1)])
+        self.assertEqual([], self.to_service.receive_many(1, 0))
+        self.assertIsNone(self.to_supervisor.receive())
+
+    def test_reassembles_records_larger_than_a_receive(self):
+        content = "x" * (SocketPairQueue.RECEIVE_SIZE * 3)
+        attachments = (bytearray(b"first" * 1000), memoryview(b"second" * 1000))
+        self.to_service.send_many([Message(sender="supervisor", content=content, attachments=attachments),
+                                   Message(sender="supervisor", content="after")])
+        first, second = receive_messages(self.to_service, 2)
+        self.assertEqual(content, first.content)
+        self.assertEqual([bytes(attachment) for attachment in attachments],
+                         [bytes(attachment) for attachment in first.attachments])
+        self.assertEqual("after", second.content)
+
+    def test_receive_without_a_timeout_waits_for_the_peer(self):
+        timer = threading.Timer(0.05, self.to_service.send, args=(Message(sender="supervisor", content="late"),))
+        timer.start()
+        self.assertEqual(["late"], [m.content for m in self.to_service.receive_many(1, None)])
+        timer.join()
+
+    def test_leaves_the_supervisor_socket_out_when_pickled(self):
+        to_service = self.to_service.__getstate__()
+        to_supervisor = self.to_supervisor.__getstate__()
+        self.assertIsNone(to_service["send_socket"])
+        self.assertIs(self.to_service.receive_socket, to_service["receive_socket"])
+        self.assertIs(self.to_supervisor.send_socket, to_supervisor["send_socket"])
+        self.assertIsNone(to_supervisor["receive_socket"])
+        self.assertIsNone(to_service["host_socket"])
+
+    def test_serves_a_process_that_received_it_pickled(self):
+        count = 500
+        process = multiprocessing.get_context("spawn").Process(
+            target=echo_contents, args=(self.to_service, self.to_supervisor, count))
+        process.start()
+        self.to_service.send_many([Message(sender="supervisor", content=index) for index in range(count)])
+        self.assertEqual(list(range(count)), [m.content for m in receive_messages(self.to_supervisor, count)])
+        process.join(10)
+        self.assertEqual(0, process.exitcode)
+
+    def test_attaches_the_service_side_by_file_descriptor(self):
+        to_service, to_supervisor = SocketPairQueue.attach_service_side(self.to_service.receive_socket.fileno())
+        try:
+            self.to_service.send(Message(sender="supervisor", content="request"))
+            self.assertEqual("request", receive_messages(to_service, 1)[0].content)
+            to_supervisor.send(Message(sender="service", content="response"))
+            self.assertEqual("response", receive_messages(self.to_supervisor, 1)[0].content)
+        finally:
+            to_service.close()
+
+    def test_async_send_and_receive(self):
+        loop = asyncio.new_event_loop()
+        try:
+            async def exchange():
+                loop.call_later(0.05, self.to_supervisor.send, Message(sender="service", content="late"))
+                received = await self.to_supervisor.receive_async(loop)
+                await self.to_service.send_many_async(
+                    [Message(sender="supervisor", content=index) for index in range(100)], loop)
+                return received, await self.to_service.receive_many_async(loop, 100, 5)
+
+            received, messages = loop.run_until_complete(asyncio.wait_for(exchange(), 5))
+            self.assertEqual("late", received.content)
+            self.assertEqual(list(range(100)), [m.content for m in messages])
+            self.assertEqual([], loop.run_until_complete(self.to_service.receive_many_async(loop, 1, 0.01)))
+        finally:
+            loop.close()
+
+    def test_stops_receiving_once_the_peer_closed(self):
+        self.to_supervisor.send(Message(sender="service", content="last"))
+        self.to_service.receive_socket.close()
+        self.assertEqual(["last"], [m.content for m in receive_messages(self.to_supervisor, 1)])
+        self.assertEqual([], self.to_supervisor.receive_many(1, 0.05))
+        self.assertTrue(self.to_supervisor.is_peer_closed)
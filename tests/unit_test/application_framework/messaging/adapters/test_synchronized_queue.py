@@ -0,0 +1,54 @@
+import sys
+import threading
+import time
+
+from application_framework.messaging.adapters.bounded_queue import BoundedQueue
+from application_framework.messaging.adapters.synchronized_queue import SynchronizedQueue
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from application_framework.messaging.message import Message
+from application_framework.messaging.overflow_policy import OverflowPolicy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class RemoteDepthQueue(ThreadQueue):
+    """Takes a while to report its depth, like a queue in another process."""
+
+    def qsize(self):
+        time.sleep(0.0001)
+        return super().qsize()
+
+
+class TestSynchronizedQueue(UnitTestCase):
+
+    def send_concurrently(self, queue, names, count):
+        def send_all(name):
+            for index in range(count):
+                queue.send(Message(sender=name, content=index))
+
+        senders = [threading.Thread(target=send_all, args=(name,)) for name in names]
+        switch_interval = sys.getswitchinterval()
+        # Switches threads often enough to interleave their sends
+        sys.setswitchinterval(1e-6)
+        try:
+            for sender in senders:
+                sender.start()
+            for sender in senders:
+                sender.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def test_keeps_a_bounded_queue_within_its_capacity(self):
+        queue = RemoteDepthQueue()
+        bounded = BoundedQueue(queue, OverflowPolicy(OverflowPolicy.DROP_NEWEST, capacity=100))
+        names, count = ["first", "second", "third", "fourth"], 500
+        self.send_concurrently(SynchronizedQueue(bounded), names, count)
+        self.assertEqual(100, queue.qsize())
+        self.assertEqual(len(names) * count - 100, bounded.dropped_count)
+
+    def test_keeps_the_order_of_each_sender(self):
+        queue = ThreadQueue()
+        names, count = ["first", "second"], 2000
+        self.send_concurrently(SynchronizedQueue(queue), names, count)
+        messages = queue.receive_many(len(names) * count)
+        for name in names:
+            self.assertEqual(list(range(count)), [m.content for m in messages if m.sender == name])
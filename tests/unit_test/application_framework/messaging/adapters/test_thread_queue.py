@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message import Message
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+def send_later(queue, message, delay=0.05):
+    timer = threading.Timer(delay, queue.send, args=(message,))
+    timer.start()
+    return timer
+
+
+class TestThreadQueue(AsyncUnitTestCase):
+
+    def test_hands_messages_over_as_objects(self):
+        queue = ThreadQueue()
+        message = Message(sender="sender", content={"key": "value"})
+        queue.send(message)
+        self.assertIs(message, queue.receive())
+
+    def test_encodes_messages_with_a_codec(self):
+        queue = ThreadQueue(PickleCodec())
+        message = Message(sender="sender", content={"key": "value"})
+        queue.send(message)
+        received = queue.receive()
+        self.assertIsNot(message, received)
+        self.assertEqual(message, received)
+
+    def test_sync_receive_waits_for_another_thread(self):
+        queue = ThreadQueue()
+        timer = send_later(queue, Message(sender="thread", content="late"))
+        self.assertEqual(["late"], [message.content for message in queue.receive_many(5, timeout=5)])
+        timer.join()
+        self.assertEqual([], queue.receive_many(1, timeout=0.01))
+
+    def test_sync_receive_without_a_timeout_waits(self):
+        queue = ThreadQueue()
+        timer = send_later(queue, Message(sender="thread", content="late"))
+        self.assertEqual(["late"], [message.content for message in queue.receive_many(5, timeout=None)])
+        timer.join()
+
+    def test_async_receive_is_woken_by_another_thread(self):
+        queue = ThreadQueue()
+        timer = send_later(queue, Message(sender="thread", content="late"))
+        self.assertEqual("late", self.run_async(queue.receive_async(self.loop)).content)
+        timer.join()
+        self.assertEqual([], queue.waiters)
+
+    def test_async_receive_returns_nothing_on_timeout(self):
+        queue = ThreadQueue()
+        self.assertEqual([], self.run_async(queue.receive_many_async(self.loop, 1, timeout=0.01)))
+        self.assertEqual([], queue.waiters)
+
+    def test_wakes_receivers_on_several_loops(self):
+        queue = ThreadQueue()
+        received = []
+
+        def receive_on_own_loop():
+            loop = asyncio.new_event_loop()
+            try:
+                received.extend(loop.run_until_complete(queue.receive_many_async(loop, 1, timeout=5)))
+            finally:
+                loop.close()
+
+        receivers = [threading.Thread(target=receive_on_own_loop) for _ in range(3)]
+        for receiver in receivers:
+            receiver.start()
+        for content in range(3):
+            queue.send(Message(sender="sender", content=content))
+        for receiver in receivers:
+            receiver.join(5)
+        self.assertEqual([0, 1, 2], sorted(message.content for message in received))
+
+    def test_discards_the_oldest_messages(self):
+        queue = ThreadQueue()
+        queue.send_many([Message(sender="sender", content=content) for content in "abc"])
+        self.assertEqual(2, queue.discard(2))
+        self.assertEqual(1, queue.qsize())
+        self.assertEqual("c", queue.receive().content)
+        self.assertEqual(0, queue.discard(1))
@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import uuid
+
+from application_framework.messaging.message import Message
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+try:
+    from application_framework.messaging.adapters.zero_mq_queue import ZeroMQQueue
+except ImportError:
+    ZeroMQQueue = None
+
+
+def send_contents(queue, contents):
+    queue.send_many([Message(sender="process", content=content) for content in contents])
+
+
+@unittest.skipIf(ZeroMQQueue is None, "pyzmq is not installed")
+class TestZeroMQQueue(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.queue = ZeroMQQueue(f"inproc://{uuid.uuid4().hex}")
+
+    def tearDown(self):
+        self.queue.close()
+        super().tearDown()
+
+    def receive_contents(self, count, timeout=5):
+        contents = []
+        while len(contents) < count:
+            messages = self.queue.receive_many(count - len(contents), timeout)
+            if not messages:
+                self.fail(f"Received {len(contents)} of {count} messages")
+            contents.extend(message.content for message in messages)
+        return contents
+
+    def test_receives_batches_in_order(self):
+        # The receiving side binds, before the sending side connects
+        self.assertEqual([], self.queue.receive_many(1, 0))
+        self.queue.send_many([Message(sender="sender", content=content) for content in ["a", "b", "c"]])
+        self.queue.send(Message(sender="sender", content="d"))
+        self.assertEqual(["a", "b", "c", "d"], self.receive_contents(4))
+
+    def test_receive_without_a_timeout_waits(self):
+        self.assertEqual([], self.queue.receive_many(1, 0))
+        thread = threading.Timer(0.05, send_contents, args=(self.queue, ["late"]))
+        thread.start()
+        self.assertEqual(["late"], [message.content for message in self.queue.receive_many(1, None)])
+        thread.join()
+
+    def test_async_receive_gets_what_was_sent(self):
+        async def scenario():
+            receive = self.loop.create_task(self.queue.receive_async(self.loop))
+            await self.queue.send_async(Message(sender="sender", content="payload"), self.loop)
+            return await receive
+
+        self.assertEqual("payload", self.run_async(scenario()).content)
+        self.assertEqual([], self.run_async(self.queue.receive_many_async(self.loop, 1, 0.01)))
+
+    def test_carries_attachments_as_separate_frames(self):
+        self.queue.receive_many(1, 0)
+        attachment = bytearray(b"attachment" * 100)
+        self.queue.send(Message(sender="sender", content="body", attachments=(attachment,)))
+        message = self.queue.receive_many(1, 1)[0]
+        self.assertEqual(("body", [bytes(attachment)]),
+                         (message.content, [bytes(frame) for frame in message.attachments]))
+
+    def test_close_closes_the_sockets_of_all_threads(self):
+        self.queue.receive_many(1, 0)
+        sender = threading.Thread(target=self.queue.send, args=(Message(sender="thread", content="payload"),))
+        sender.start()
+        sender.join()
+        self.assertEqual("payload", self.queue.receive_many(1, 1)[0].content)
+        sockets = list(self.queue.sockets)
+        self.assertEqual(2, len(sockets))
+        self.queue.close()
+        self.assertTrue(all(socket.closed for socket in sockets))
+
+    def test_receives_from_another_process(self):
+        ipc_directory = tempfile.mkdtemp(prefix="zero_mq_queue_")
+        self.addCleanup(shutil.rmtree, ipc_directory, ignore_errors=True)
+        self.queue = ZeroMQQueue(f"ipc://{os.path.join(ipc_directory, 'queue')}")
+        self.queue.receive_many(1, 0)
+        contents = list(range(100))
+        process = multiprocessing.get_context("spawn").Process(target=send_contents, args=(self.queue, contents))
+        process.start()
+        self.assertEqual(contents, self.receive_contents(len(contents)))
+        process.join(5)
+        self.assertEqual(0, process.exitcode)
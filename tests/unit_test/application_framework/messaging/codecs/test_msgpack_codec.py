@@ -0,0 +1,33 @@
+import unittest
+import uuid
+
+from application_framework.messaging.codecs import msgpack_codec
+from application_framework.messaging.codecs.msgpack_codec import MsgPackCodec
+from application_framework.messaging.message import Message, MessageKind
+from unit_test.unit_test_case import UnitTestCase
+
+
+@unittest.skipIf(msgpack_codec.msgpack is None, "msgpack is not installed")
+class TestMsgPackCodec(UnitTestCase):
+
+    def setUp(self):
+        self.codec = MsgPackCodec()
+
+    def round_trip(self, message):
+        return self.codec.decode(self.codec.encode(message))
+
+    def test_round_trips_content(self):
+        for content in [None, "text", b"\x00\x01", {"answer": 42, "items": [1, 2]}]:
+            message = Message(sender="service", content=content, kind=MessageKind.RESPONSE, correlation_id=1)
+            self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_uuid_addresses_and_attachments(self):
+        message = Message(sender=uuid.uuid4(), content="payload", attachments=(b"abc",), kind=MessageKind.REQUEST,
+                          correlation_id=3, subject="method", target=uuid.uuid4())
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_frames(self):
+        message = Message(sender="service", content="payload", attachments=(b"abc",))
+        decoded = self.codec.decode_frames(self.codec.encode_frames(message))
+        self.assertEqual("payload", decoded.content)
+        self.assertEqual([b"abc"], [bytes(attachment) for attachment in decoded.attachments])
@@ -0,0 +1,20 @@
+from application_framework.messaging.codecs.pickle_codec import PickleCodec
+from application_framework.messaging.message import Message, MessageKind
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestPickleCodec(UnitTestCase):
+
+    def test_round_trips_content(self):
+        codec = PickleCodec()
+        for content in [None, {"answer": 42}, "text"]:
+            message = Message(sender="service", content=content, kind=MessageKind.RESPONSE, correlation_id=1)
+            self.assertEqual(message, codec.decode(codec.encode(message)))
+
+    def test_round_trips_attachments_as_frames(self):
+        for protocol in [4, PickleCodec().protocol]:
+            codec = PickleCodec(protocol)
+            message = Message(sender="service", content="payload", attachments=(b"abc", bytearray(b"de")))
+            decoded = codec.decode_frames(codec.encode_frames(message))
+            self.assertEqual("payload", decoded.content)
+            self.assertEqual([b"abc", b"de"], [bytes(attachment) for attachment in decoded.attachments])
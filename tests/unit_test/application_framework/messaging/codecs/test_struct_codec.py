@@ -0,0 +1,50 @@
+import uuid
+
+from application_framework.messaging.codecs.struct_codec import StructCodec
+from application_framework.messaging.message import Message, MessageKind
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestStructCodec(UnitTestCase):
+
+    def setUp(self):
+        self.codec = StructCodec()
+
+    def round_trip(self, message):
+        return self.codec.decode(self.codec.encode(message))
+
+    def test_round_trips_str_content(self):
+        message = Message(sender="service", content="héllo")
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_none_content(self):
+        message = Message(sender="service", content=None, kind=MessageKind.RESPONSE, correlation_id=7)
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_dict_content(self):
+        message = Message(sender="service", content={"answer": 42, "items": [1, 2]}, kind=MessageKind.RESPONSE,
+                          correlation_id=0)
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_bytes_content(self):
+        message = Message(sender="service", content=b"\x00\x01")
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_control_messages(self):
+        message = Message.control("service", MessageKind.STOPPED)
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_addresses_subject_and_attachments(self):
+        message = Message(sender=uuid.uuid4(), content="payload", attachments=(b"abc", b""),
+                          kind=MessageKind.REQUEST, correlation_id=3, subject="method", target="target")
+        self.assertEqual(message, self.round_trip(message))
+
+    def test_round_trips_frames(self):
+        message = Message(sender="service", content="payload", attachments=(b"abc",))
+        decoded = self.codec.decode_frames(self.codec.encode_frames(message))
+        self.assertEqual(message.content, decoded.content)
+        self.assertEqual([b"abc"], [bytes(attachment) for attachment in decoded.attachments])
+
+    def test_round_trips_uuid_senders(self):
+        message = Message(sender=uuid.uuid4(), content="payload")
+        self.assertEqual(message, self.round_trip(message))
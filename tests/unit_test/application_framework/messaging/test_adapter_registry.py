@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from application_framework.messaging.adapter_registry import AdapterRegistry
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestAdapterRegistry(UnitTestCase):
+
+    def setUp(self):
+        self.adapter_paths = dict(AdapterRegistry.adapter_paths)
+
+    def tearDown(self):
+        AdapterRegistry.adapter_paths.clear()
+        AdapterRegistry.adapter_paths.update(self.adapter_paths)
+
+    def run_python(self, source):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        return subprocess.run([sys.executable, "-c", textwrap.dedent(source)], env=env,
+                              capture_output=True, text=True, timeout=30)
+
+    def test_returns_the_registered_adapter(self):
+        self.assertIs(ThreadQueue, AdapterRegistry.get(AdapterRegistry.THREAD))
+
+    def test_registers_further_adapters(self):
+        AdapterRegistry.register("Custom", "application_framework.messaging.adapters.thread_queue", "ThreadQueue")
+        self.assertIs(ThreadQueue, AdapterRegistry.get("Custom"))
+
+    def test_rejects_an_unknown_adapter(self):
+        with self.assertRaises(KeyError):
+            AdapterRegistry.get("Unknown")
+
+    def test_imports_adapters_only_when_first_used(self):
+        # Run in a fresh interpreter, as this one has imported them all
+        result = self.run_python("""
+            import sys
+            import application_framework.host.host
+            from application_framework.messaging.adapter_registry import AdapterRegistry
+
+            lazy = ["zmq", "application_framework.messaging.adapters.zero_mq_queue",
+                    "application_framework.messaging.adapters.manager_queue",
+                    "application_framework.messaging.adapters.shared_memory_queue",
+                    "application_framework.messaging.adapters.thread_queue"]
+            print(sorted(name for name in lazy if name in sys.modules))
+            AdapterRegistry.get(AdapterRegistry.THREAD)
+            print(sorted(name for name in lazy if name in sys.modules))
+        """)
+        self.assertEqual(0, result.returncode, result.stderr)
+        self.assertEqual(["[]", "['application_framework.messaging.adapters.thread_queue']"],
+                         result.stdout.splitlines())
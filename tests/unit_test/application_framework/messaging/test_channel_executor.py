@@ -0,0 +1,61 @@
+import threading
+
+from application_framework.messaging.channel_executor import ChannelExecutor
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestChannelExecutor(UnitTestCase):
+
+    def setUp(self):
+        # Gives each test an executor without the calls of earlier tests
+        ChannelExecutor.get_instance().shutdown(wait=False)
+
+    def tearDown(self):
+        ChannelExecutor.set_default_max_workers(None)
+        ChannelExecutor.get_instance().shutdown(wait=False)
+
+    def test_get_instance_replaces_a_shut_down_executor(self):
+        executor = ChannelExecutor.get_instance()
+        self.assertIs(executor, ChannelExecutor.get_instance())
+        executor.shutdown(wait=False)
+        with self.assertRaises(RuntimeError):
+            executor.submit(int)
+        replacement = ChannelExecutor.get_instance()
+        self.assertIsNot(executor, replacement)
+        self.assertEqual(3, replacement.submit(int, "3").result(timeout=5))
+
+    def test_starts_a_thread_per_blocked_call(self):
+        executor = ChannelExecutor()
+        release = threading.Event()
+        futures = [executor.submit(release.wait, 5) for _ in range(3)]
+        try:
+            self.assertEqual(3, executor.usage().threads)
+        finally:
+            release.set()
+        self.assertTrue(all(future.result(timeout=5) for future in futures))
+        executor.shutdown()
+
+    def test_default_max_workers_limits_the_threads(self):
+        ChannelExecutor.set_default_max_workers(2)
+        executor = ChannelExecutor.get_instance()
+        self.assertEqual(2, executor.max_workers)
+        release = threading.Event()
+        futures = [executor.submit(release.wait, 5) for _ in range(3)]
+        try:
+            self.assertEqual(2, executor.usage().threads)
+            self.assertEqual(3, executor.usage().calls)
+        finally:
+            release.set()
+        self.assertTrue(all(future.result(timeout=5) for future in futures))
+
+    def test_limits_the_threads_by_default(self):
+        executor = ChannelExecutor()
+        self.assertEqual(ChannelExecutor.DEFAULT_MAX_WORKERS, executor.max_workers)
+        release = threading.Event()
+        futures = [executor.submit(release.wait, 5) for _ in range(ChannelExecutor.DEFAULT_MAX_WORKERS + 2)]
+        try:
+            self.assertEqual(ChannelExecutor.DEFAULT_MAX_WORKERS, executor.usage().threads)
+        finally:
+            release.set()
+        self.assertTrue(all(future.result(timeout=5) for future in futures))
+        executor.shutdown()
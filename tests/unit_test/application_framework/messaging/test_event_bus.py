@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from application_framework.messaging.event_bus import EventBus
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+try:
+    import zmq
+except ImportError:
+    zmq = None
+
+
+def publish_until_stopped(serialized_bus, topics, stopped):
+    bus = pickle.loads(serialized_bus)
+    # Delivery is best effort until the connection is up
+    while not stopped.is_set():
+        for topic in topics:
+            bus.publish(topic, os.getpid())
+        time.sleep(0.01)
+    bus.close()
+
+
+class TestEventBus(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bus = EventBus()
+        self.ipc_directory = None
+
+    def tearDown(self):
+        self.bus.close()
+        if self.ipc_directory:
+            shutil.rmtree(self.ipc_directory, ignore_errors=True)
+        super().tearDown()
+
+    def enable_forwarding(self):
+        self.ipc_directory = tempfile.mkdtemp(prefix="event_bus_")
+        self.bus.enable_forwarding(self.ipc_directory)
+
+    def test_dispatches_to_local_subscribers_without_encoding(self):
+        received = []
+        payload = object()
+        self.bus.subscribe("topic", received.append)
+        self.bus.publish("topic", payload, sender="sender")
+        self.bus.publish("other", "ignored")
+        self.assertEqual(1, len(received))
+        self.assertIs(payload, received[0].content)
+        self.assertEqual(("sender", "topic"), (received[0].sender, received[0].subject))
+
+    def test_unsubscribed_handlers_get_no_events(self):
+        received = []
+        self.bus.subscribe("topic", received.append)
+        self.bus.unsubscribe("topic", received.append)
+        self.bus.publish("topic")
+        self.assertEqual([], received)
+
+    def test_calls_async_subscribers_on_their_loop(self):
+        received = []
+
+        async def handler(message):
+            received.append(message.content)
+
+        self.bus.subscribe("topic", handler, self.loop)
+        threading.Thread(target=self.bus.publish, args=("topic", "payload")).start()
+
+        async def wait_for_event():
+            while not received:
+                await asyncio.sleep(0.01)
+
+        self.run_async(wait_for_event())
+        self.assertEqual(["payload"], received)
+
+    @unittest.skipIf(zmq is None, "pyzmq is not installed")
+    def test_start_proxy_raises_when_it_cannot_bind(self):
+        self.ipc_directory = tempfile.mkdtemp(prefix="event_bus_" + "x" * 120)
+        self.bus.enable_forwarding(self.ipc_directory)
+        errors = []
+
+        def start_proxy():
+            try:
+                self.bus.start_proxy()
+            except zmq.ZMQError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=start_proxy, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(1, len(errors))
+        self.assertIsNone(self.bus.proxy_thread)
+
+    @unittest.skipIf(zmq is None, "pyzmq is not installed")
+    def test_forwards_events_from_another_process(self):
+        self.enable_forwarding()
+        received = {"first": threading.Event(), "second": threading.Event()}
+        self.bus.subscribe("first", lambda message: received["first"].set())
+        context = multiprocessing.get_context("fork")
+        stopped = context.Event()
+        process = context.Process(target=publish_until_stopped,
+                                  args=(pickle.dumps(self.bus), ["first", "second"], stopped))
+        process.start()
+        try:
+            self.assertTrue(received["first"].wait(5))
+            # Subscribing wakes the receiver rather than waiting for a poll
+            self.bus.subscribe("second", lambda message: received["second"].set())
+            self.assertTrue(received["second"].wait(5))
+        finally:
+            stopped.set()
+            process.join(5)
+        self.assertEqual(0, process.exitcode)
+
+    @unittest.skipIf(zmq is None, "pyzmq is not installed")
+    def test_close_wakes_the_receiver(self):
+        self.enable_forwarding()
+        self.bus.subscribe("topic", lambda message: None)
+        started_at = time.monotonic()
+        self.bus.close()
+        self.assertFalse(self.bus.receiver_thread.is_alive())
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    @unittest.skipIf(zmq is None, "pyzmq is not installed")
+    def test_starts_the_proxy_on_first_use(self):
+        self.enable_forwarding()
+        self.assertIsNone(self.bus.proxy_thread)
+        self.bus.subscribe("topic", lambda message: None)
+        self.assertTrue(self.bus.proxy_thread.is_alive())
@@ -0,0 +1,20 @@
+from application_framework.messaging.message import Message, MessageKind, SUPERVISOR_STOP_MESSAGE
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestMessage(UnitTestCase):
+
+    def test_carries_data_by_default(self):
+        message = Message(sender="sender", content="payload")
+        self.assertEqual(MessageKind.DATA, message.kind)
+        self.assertEqual((), message.attachments)
+
+    def test_is_immutable(self):
+        message = Message(sender="sender", content="payload")
+        with self.assertRaises(AttributeError):
+            message.content = "changed"
+        self.assertEqual(("payload", "changed"), (message.content, message._replace(content="changed").content))
+
+    def test_creates_control_messages(self):
+        self.assertEqual(Message(sender="supervisor", kind=MessageKind.STOP), SUPERVISOR_STOP_MESSAGE)
+        self.assertFalse(hasattr(SUPERVISOR_STOP_MESSAGE, "__dict__"))
@@ -0,0 +1,80 @@
+import asyncio
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.message import MessageKind
+from application_framework.messaging.rpc import RpcClient, RpcError
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestRpcClient(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = RpcClient(max_in_flight=2)
+        self.queue = AsyncioQueue()
+
+    def call(self, method, payload=None, timeout=None):
+        return self.loop.create_task(
+            self.client.call_async(self.queue, self.loop, "caller", "callee", method, payload, timeout))
+
+    async def serve(self, count, handler):
+        for _ in range(count):
+            request = await self.queue.receive_async(self.loop)
+            self.client.resolve(handler(request))
+
+    def test_call_returns_the_result_of_its_response(self):
+        async def scenario():
+            call = self.call("double", 21)
+            await self.serve(1, lambda request: RpcClient.create_response(request, "callee", request.content * 2))
+            return await call
+
+        self.assertEqual(42, self.run_async(scenario()))
+        self.assertEqual({}, self.client.pending)
+
+    def test_requests_carry_the_call(self):
+        async def scenario():
+            call = self.call("method", "payload")
+            request = await self.queue.receive_async(self.loop)
+            self.client.resolve(RpcClient.create_response(request, "callee", None))
+            await call
+            return request
+
+        request = self.run_async(scenario())
+        self.assertEqual(MessageKind.REQUEST, request.kind)
+        self.assertEqual(("caller", "callee", "method", "payload"),
+                         (request.sender, request.target, request.subject, request.content))
+
+    def test_responses_are_matched_by_correlation_id(self):
+        async def scenario():
+            first, second = self.call("echo", 1), self.call("echo", 2)
+            requests = [await self.queue.receive_async(self.loop) for _ in range(2)]
+            for request in reversed(requests):
+                self.client.resolve(RpcClient.create_response(request, "callee", request.content))
+            return await first, await second
+
+        self.assertEqual((1, 2), self.run_async(scenario()))
+
+    def test_error_responses_raise_rpc_error(self):
+        async def scenario():
+            call = self.call("fail")
+            await self.serve(1, lambda request: RpcClient.create_error(request, "callee", "it failed"))
+            await call
+
+        with self.assertRaises(RpcError):
+            self.run_async(scenario())
+        self.assertEqual({}, self.client.pending)
+
+    def test_calls_without_a_response_time_out(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_async(self.client.call_async(self.queue, self.loop, "caller", "callee", "method", timeout=0.01))
+        self.assertEqual({}, self.client.pending)
+
+    def test_calls_beyond_max_in_flight_wait_for_a_slot(self):
+        async def scenario():
+            calls = [self.call("echo", index) for index in range(3)]
+            await asyncio.sleep(0.01)
+            self.assertEqual(2, self.queue.qsize())
+            await self.serve(3, lambda request: RpcClient.create_response(request, "callee", request.content))
+            return await asyncio.gather(*calls)
+
+        self.assertEqual([0, 1, 2], self.run_async(scenario()))
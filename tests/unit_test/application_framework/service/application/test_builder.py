@@ -0,0 +1,23 @@
+import os
+
+from application_framework.service.application.builder import ApplicationBuilder
+from application_framework.service.service import Service
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestApplicationBuilder(UnitTestCase):
+
+    def test_sets_the_number_of_replicas(self):
+        self.assertEqual(4, ApplicationBuilder().set_replicas(4).replicas)
+
+    def test_runs_a_replica_per_cpu_automatically(self):
+        self.assertEqual(os.cpu_count() or 1, ApplicationBuilder().set_replicas("auto").replicas)
+
+    def test_rejects_invalid_replicas(self):
+        for replicas in [0, -1, 1.5, "many", None]:
+            with self.subTest(replicas=replicas), self.assertRaises(ValueError):
+                ApplicationBuilder().set_replicas(replicas)
+
+    def test_resolves_a_new_application_instance_each_time(self):
+        builder = ApplicationBuilder().set_name("transient").set_application_class(Service)
+        self.assertIsNot(builder.container.resolve(Service), builder.container.resolve(Service))
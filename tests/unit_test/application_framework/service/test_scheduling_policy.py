@@ -0,0 +1,69 @@
+import os
+import threading
+import unittest
+
+from unittest import mock
+
+from application_framework.service.scheduling_policy import SchedulingPolicy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestSchedulingPolicy(UnitTestCase):
+
+    def run_in_thread(self, function):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(function()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_rejects_invalid_settings(self):
+        for kwargs in [{"cpu_affinity": []}, {"nice": 20}, {"nice": -21}, {"io_class": "Unknown"}, {"io_level": 8}]:
+            with self.assertRaises(ValueError):
+                SchedulingPolicy(**kwargs)
+
+    def test_overlaps_only_on_shared_cpus(self):
+        self.assertTrue(SchedulingPolicy({0, 1}).overlaps(SchedulingPolicy({1, 2})))
+        self.assertFalse(SchedulingPolicy({0}).overlaps(SchedulingPolicy({1})))
+        self.assertFalse(SchedulingPolicy({0}).overlaps(SchedulingPolicy(nice=5)))
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "CPU affinity is not supported on this system")
+    def test_capture_restores_the_cpu_affinity_of_the_thread(self):
+        cpus = os.sched_getaffinity(0)
+        policy = SchedulingPolicy({min(cpus)})
+
+        def apply_and_restore():
+            previous_policy = policy.capture()
+            policy.apply()
+            applied = os.sched_getaffinity(0)
+            previous_policy.apply()
+            return applied, os.sched_getaffinity(0)
+
+        self.assertEqual(({min(cpus)}, cpus), self.run_in_thread(apply_and_restore))
+        # Only the thread was pinned
+        self.assertEqual(cpus, os.sched_getaffinity(0))
+
+    def test_raising_the_nice_level_back_to_the_current_one_needs_no_privileges(self):
+        current_nice = os.getpriority(os.PRIO_PROCESS, 0)
+        self.assertTrue(SchedulingPolicy(nice=current_nice).can_restore_nice())
+        self.assertTrue(SchedulingPolicy().can_restore_nice())
+
+    def test_lowering_the_nice_level_back_needs_a_privilege(self):
+        current_nice = os.getpriority(os.PRIO_PROCESS, 0)
+        if current_nice == 19:
+            self.skipTest("The nice level cannot be raised any further")
+        policy = SchedulingPolicy(nice=19)
+        rlimit = ("resource.getrlimit", mock.Mock(return_value=(0, 0)))
+        with mock.patch(*rlimit), mock.patch.object(SchedulingPolicy, "has_capability", return_value=False):
+            self.assertFalse(policy.can_restore_nice())
+        with mock.patch(*rlimit), mock.patch.object(SchedulingPolicy, "has_capability", return_value=True):
+            self.assertTrue(policy.can_restore_nice())
+        with mock.patch("resource.getrlimit", return_value=(20 - current_nice, 20 - current_nice)), \
+                mock.patch.object(SchedulingPolicy, "has_capability", return_value=False):
+            self.assertTrue(policy.can_restore_nice())
+
+    def test_capture_records_only_the_settings_the_policy_changes(self):
+        captured = SchedulingPolicy(nice=19).capture()
+        self.assertEqual(os.getpriority(os.PRIO_PROCESS, 0), captured.nice)
+        self.assertIsNone(captured.cpu_affinity)
+        self.assertIsNone(captured.io_class)
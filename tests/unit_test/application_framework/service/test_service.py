@@ -0,0 +1,81 @@
+import threading
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.adapters.thread_queue import ThreadQueue
+from application_framework.messaging.channels import Channels
+from application_framework.messaging.message import Message, MessageKind, SUPERVISOR_STOP_MESSAGE
+from application_framework.service.cancellation_token_source import CancellationTokenSource
+from application_framework.service.service import Service
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestService(AsyncUnitTestCase):
+
+    def create_service(self, queue, is_async):
+        service = Service()
+        service.set_service_id("service")
+        service.set_channels(Channels(None, None, queue, queue))
+        service.cancellation_token = CancellationTokenSource(is_async).token
+        return service
+
+    def bad_messages(self):
+        # A failed receive on a Manager queue returns None
+        return [None, Message(sender="supervisor", kind=MessageKind.EVENT)]
+
+    def test_async_listener_drops_messages_it_cannot_handle(self):
+        queue = AsyncioQueue()
+        service = self.create_service(queue, is_async=True)
+        service.set_loop(self.loop)
+        for message in self.bad_messages() + [SUPERVISOR_STOP_MESSAGE]:
+            queue.queue.put_nowait(message)
+        self.run_async(service.run_supervisor_listener_async())
+        self.assertTrue(service.cancellation_token.is_cancellation_requested)
+
+    def test_listener_drops_messages_it_cannot_handle(self):
+        queue = ThreadQueue()
+        service = self.create_service(queue, is_async=False)
+        queue.items.extend(self.bad_messages() + [SUPERVISOR_STOP_MESSAGE])
+        service.run_supervisor_listener()
+        self.assertTrue(service.cancellation_token.is_cancellation_requested)
+
+    def create_replica(self, work_queues, index):
+        service = Service()
+        service.set_service_id(f"worker-{index}")
+        service.set_replica("worker", index)
+        service.set_channels(Channels(None, None, None, None, work_queues=work_queues))
+        service.set_loop(self.loop)
+        return service
+
+    def test_replicas_compete_for_submitted_work(self):
+        work_queues = {"worker": ThreadQueue()}
+        first, second = [self.create_replica(work_queues, index) for index in range(2)]
+        for payload in range(4):
+            first.submit_work("worker", payload)
+        taken = [first.receive_work(timeout=1), second.receive_work(timeout=1),
+                 second.receive_work(timeout=1), first.receive_work(timeout=1)]
+        self.assertEqual([0, 1, 2, 3], [message.content for message in taken])
+        self.assertEqual({"worker-0"}, {message.sender for message in taken})
+        self.assertIsNone(second.receive_work(timeout=0.01))
+
+    def test_receive_work_waits_for_work_by_default(self):
+        work_queues = {"worker": ThreadQueue()}
+        replica = self.create_replica(work_queues, 0)
+        timer = threading.Timer(0.05, replica.submit_work, args=("worker", "late"))
+        timer.start()
+        self.assertEqual("late", replica.receive_work().content)
+        timer.join()
+
+    def test_replicas_compete_for_submitted_work_asynchronously(self):
+        work_queues = {"worker": ThreadQueue()}
+        first, second = [self.create_replica(work_queues, index) for index in range(2)]
+        self.run_async(second.submit_work_async("worker", "payload"))
+        self.assertEqual("payload", self.run_async(first.receive_work_async(timeout=1)).content)
+        self.assertIsNone(self.run_async(second.receive_work_async(timeout=0.01)))
+
+    def test_rejects_work_for_an_unknown_service(self):
+        service = self.create_replica({"worker": ThreadQueue()}, 0)
+        with self.assertRaises(ValueError):
+            service.submit_work("unknown", "payload")
+        service.set_replica(None, None)
+        with self.assertRaises(ValueError):
+            service.receive_work(timeout=0)
@@ -0,0 +1,27 @@
+from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service import Service
+from application_framework.service.service_config import ServiceConfig
+from application_framework.supervisor.restart_strategy import RestartStrategy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestServiceConfig(UnitTestCase):
+
+    @staticmethod
+    def build(name, replicas):
+        return ServiceConfig("service", Service, ExecutionMode.SEPARATE_PROCESS, RestartStrategy(), None, None,
+                             name, {}, replicas=replicas)
+
+    def test_creates_a_config_per_replica(self):
+        config = self.build("worker", 3)
+        replicas = config.create_replicas()
+        self.assertEqual(["worker-0", "worker-1", "worker-2"], [replica.name for replica in replicas])
+        self.assertEqual([0, 1, 2], [replica.replica_index for replica in replicas])
+        self.assertEqual({"worker"}, {replica.replica_group for replica in replicas})
+        self.assertEqual(3, len({replica.service_id for replica in replicas} - {config.service_id}))
+        self.assertEqual([None] * 3, [replica.replicas for replica in replicas])
+        self.assertEqual(3, config.replicas)
+        self.assertIsNone(config.replica_group)
+
+    def test_groups_unnamed_replicas_by_service_id(self):
+        self.assertEqual(["service-0", "service-1"], [replica.name for replica in self.build(None, 2).create_replicas()])
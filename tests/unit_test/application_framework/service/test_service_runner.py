@@ -0,0 +1,50 @@
+import asyncio
+import gc
+
+from application_framework.service.execution_mode import ExecutionMode
+from application_framework.service.service import Service
+from application_framework.service.service_config import ServiceConfig
+from application_framework.service.service_runner import ServiceRunner
+from application_framework.supervisor.restart_strategy import RestartStrategy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestServiceRunner(UnitTestCase):
+
+    def setUp(self):
+        self.gc_enabled = gc.isenabled()
+        self.gc_thresholds = gc.get_threshold()
+
+    def tearDown(self):
+        gc.set_threshold(*self.gc_thresholds)
+        if self.gc_enabled:
+            gc.enable()
+        else:
+            gc.disable()
+
+    @staticmethod
+    def build(enabled=True, thresholds=None):
+        return ServiceConfig("service", Service, ExecutionMode.SEPARATE_PROCESS, RestartStrategy(), None, None,
+                             "service", {}, gc_enabled=enabled, gc_thresholds=thresholds)
+
+    def test_applies_the_collector_settings_of_a_service(self):
+        ServiceRunner.configure_gc(self.build(thresholds=(50000, 20, 20)))
+        self.assertTrue(gc.isenabled())
+        self.assertEqual((50000, 20, 20), gc.get_threshold())
+
+    def test_disables_the_collector(self):
+        ServiceRunner.configure_gc(self.build(enabled=False))
+        self.assertFalse(gc.isenabled())
+
+    def test_restores_the_default_thresholds_for_the_next_service(self):
+        ServiceRunner.configure_gc(self.build(enabled=False, thresholds=(50000, 20, 20)))
+        ServiceRunner.configure_gc(self.build())
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(ServiceRunner.DEFAULT_GC_THRESHOLDS, gc.get_threshold())
+
+    def test_close_loop_cancels_the_tasks_left_behind(self):
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(asyncio.sleep(60))
+        ServiceRunner.close_loop(loop)
+        self.assertTrue(task.cancelled())
+        self.assertTrue(loop.is_closed())
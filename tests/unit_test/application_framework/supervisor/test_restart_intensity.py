@@ -0,0 +1,45 @@
+from application_framework.supervisor.restart_intensity import RestartIntensity
+from application_framework.supervisor.restart_strategy import RestartStrategy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestRestartIntensity(UnitTestCase):
+
+    def test_allows_max_restarts_within_the_period(self):
+        intensity = RestartIntensity(2, 10)
+        self.assertTrue(intensity.record(0))
+        self.assertTrue(intensity.record(1))
+        self.assertFalse(intensity.record(2))
+
+    def test_forgets_restarts_older_than_the_period(self):
+        intensity = RestartIntensity(2, 10)
+        for now in [0, 1, 2]:
+            intensity.record(now)
+        self.assertTrue(intensity.record(12))
+        self.assertTrue(intensity.record(12.5))
+        self.assertFalse(intensity.record(13))
+
+    def test_none_allows_any_number_of_restarts(self):
+        intensity = RestartIntensity(None, 10)
+        self.assertTrue(all(intensity.record(now / 10) for now in range(100)))
+
+    def test_reset_forgets_all_restarts(self):
+        intensity = RestartIntensity(1, 10)
+        intensity.record(0)
+        intensity.reset()
+        self.assertTrue(intensity.record(1))
+
+    def test_str_describes_the_limit(self):
+        self.assertEqual("1 restart within 60 seconds", str(RestartIntensity(1, 60)))
+        self.assertEqual("5 restarts within 30 seconds", str(RestartIntensity(5, 30)))
+
+    def test_restart_strategy_restarts_forever_by_default(self):
+        self.assertIsNone(RestartStrategy().max_restarts)
+
+    def test_restart_strategy_rejects_invalid_limits(self):
+        with self.assertRaises(ValueError):
+            RestartStrategy(max_restarts=-1)
+        with self.assertRaises(ValueError):
+            RestartStrategy(restart_period=0)
+        with self.assertRaises(ValueError):
+            RestartStrategy(stable_period=-1)
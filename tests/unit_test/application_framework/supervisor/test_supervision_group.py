@@ -0,0 +1,53 @@
+from application_framework.supervisor.supervision_group import SupervisionGroup
+from application_framework.supervisor.supervision_strategy import SupervisionStrategy
+from unit_test.unit_test_case import UnitTestCase
+
+
+class TestSupervisionGroup(UnitTestCase):
+
+    def create_group(self, strategy, members=("a", "b", "c")):
+        group = SupervisionGroup("group", members, strategy)
+        for member in members:
+            group.add_member(member)
+        return group
+
+    def test_one_for_one_restarts_the_crashed_member(self):
+        group = self.create_group(SupervisionStrategy.ONE_FOR_ONE)
+        self.assertEqual(["b"], group.members_to_restart("b"))
+
+    def test_one_for_all_restarts_all_members(self):
+        group = self.create_group(SupervisionStrategy.ONE_FOR_ALL)
+        self.assertEqual(["a", "b", "c"], group.members_to_restart("b"))
+
+    def test_rest_for_one_restarts_the_members_listed_after(self):
+        group = self.create_group(SupervisionStrategy.REST_FOR_ONE)
+        self.assertEqual(["b", "c"], group.members_to_restart("b"))
+
+    def test_get_service_ids_includes_nested_groups_in_order(self):
+        inner = self.create_group(SupervisionStrategy.ONE_FOR_ALL, ("b", "c"))
+        outer = SupervisionGroup("outer", ["a", "inner", "d"])
+        for member in ["a", inner, "d"]:
+            outer.add_member(member)
+        self.assertIs(outer, inner.parent)
+        self.assertEqual(["a", "b", "c", "d"], outer.get_service_ids())
+        self.assertEqual(["b", "c"], outer.get_service_ids([inner]))
+
+    def test_reset_forgets_the_restarts_of_nested_groups(self):
+        inner = SupervisionGroup("inner", ["b"], max_restarts=1)
+        inner.add_member("b")
+        outer = SupervisionGroup("outer", ["a", "inner"])
+        outer.add_member("a")
+        outer.add_member(inner)
+        inner.restart_intensity.record(0)
+        outer.reset()
+        self.assertTrue(inner.restart_intensity.record(1))
+
+    def test_restarts_forever_by_default(self):
+        group = SupervisionGroup("group", ["a"])
+        self.assertTrue(all(group.restart_intensity.record(0) for _ in range(100)))
+
+    def test_rejects_unknown_strategies_and_empty_groups(self):
+        with self.assertRaises(ValueError):
+            SupervisionGroup("group", ["a"], "Unknown")
+        with self.assertRaises(ValueError):
+            SupervisionGroup("group", [])
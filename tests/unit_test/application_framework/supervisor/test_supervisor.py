@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+from application_framework.messaging.adapters.asyncio_queue import AsyncioQueue
+from application_framework.messaging.channels import Channels
+from application_framework.messaging.message import Message, MessageKind
+from application_framework.service.cancellation_token_source import CancellationTokenSource
+from application_framework.supervisor.restart_strategy import RestartStrategy
+from application_framework.supervisor.supervisor import Supervisor
+from unit_test.async_unit_test_case import AsyncUnitTestCase
+
+
+class TestSupervisor(AsyncUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.channels = Channels(AsyncioQueue(), AsyncioQueue(), AsyncioQueue(), AsyncioQueue())
+        self.restarts = 0
+        self.escalations = 0
+
+    def start(self, restart_strategy):
+        self.supervisor = Supervisor(self.loop, "service", self.channels, restart_strategy, stop_timeout=0.01,
+                                     restart_callback=self.restart, escalation_callback=self.escalate)
+        self.cancellation_token_source = CancellationTokenSource(True)
+        self.task = self.loop.create_task(self.supervisor.start_async(self.cancellation_token_source.token))
+        self.report(MessageKind.STARTED)
+
+    def stop(self):
+        self.cancellation_token_source.cancel()
+        self.run_async(self.task)
+
+    def report(self, kind):
+        self.channels.service_to_supervisor.send(Message.control("service", kind))
+
+    async def restart(self):
+        self.restarts += 1
+        self.report(MessageKind.STARTED)
+
+    async def escalate(self):
+        self.escalations += 1
+        self.report(MessageKind.STARTED)
+
+    def wait_until(self, predicate):
+        async def poll():
+            while not predicate():
+                await asyncio.sleep(0.005)
+
+        self.run_async(poll())
+
+    def test_restarts_a_crashed_service(self):
+        self.start(RestartStrategy(RestartStrategy.IMMEDIATE))
+        for restart_count in [1, 2, 3]:
+            self.report(MessageKind.CRASHED)
+            self.wait_until(lambda: self.supervisor.restart_count == restart_count)
+        self.stop()
+        self.assertEqual(3, self.restarts)
+        self.assertEqual(0, self.escalations)
+
+    def test_escalates_after_max_restarts(self):
+        self.start(RestartStrategy(RestartStrategy.IMMEDIATE, max_restarts=1))
+        self.report(MessageKind.CRASHED)
+        self.wait_until(lambda: self.supervisor.restart_count == 1)
+        self.report(MessageKind.CRASHED)
+        self.wait_until(lambda: self.escalations == 1)
+        self.stop()
+        self.assertEqual(1, self.restarts)
+
+    def test_keeps_the_backoff_for_crashes_shortly_after_starting(self):
+        self.start(RestartStrategy(RestartStrategy.LINEAR_BACKOFF, stable_period=30))
+        self.wait_until(lambda: self.supervisor.started_at is not None)
+        self.supervisor.backoff_time = 5
+        self.report(MessageKind.CRASHED)
+        # Waiting out the backoff before the restart
+        self.wait_until(lambda: self.supervisor.backoff_time != 5)
+        self.assertEqual(6, self.supervisor.backoff_time)
+        self.stop()
+        self.assertEqual(0, self.restarts)
+
+    def test_resets_the_backoff_after_a_stable_run(self):
+        self.start(RestartStrategy(RestartStrategy.LINEAR_BACKOFF, stable_period=0))
+        self.wait_until(lambda: self.supervisor.started_at is not None)
+        self.supervisor.backoff_time = 5
+        self.report(MessageKind.CRASHED)
+        self.wait_until(lambda: self.supervisor.backoff_time != 5)
+        self.assertEqual(2, self.supervisor.backoff_time)
+        self.stop()
+
+    def test_restarts_a_service_whose_task_failed(self):
+        self.start(RestartStrategy(RestartStrategy.IMMEDIATE))
+        self.wait_until(lambda: self.supervisor.started_event.is_set())
+        self.supervisor.on_service_failed(RuntimeError("process killed"))
+        self.wait_until(lambda: self.supervisor.restart_count == 1)
+        self.stop()
+
+    def test_stopping_ends_the_restart_backoff(self):
+        self.start(RestartStrategy(RestartStrategy.FIXED_BACKOFF, fixed_backoff_time=30))
+        self.report(MessageKind.CRASHED)
+        self.run_async(asyncio.sleep(0.05))
+        started_at = time.monotonic()
+        self.stop()
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(0, self.restarts)
+
+    def test_forwards_requests_to_the_host(self):
+        self.start(RestartStrategy())
+        request = Message(sender="service", content="payload", kind=MessageKind.REQUEST, correlation_id=1,
+                          subject="method", target="other")
+        self.channels.service_to_supervisor.send(request)
+        self.assertEqual(request, self.run_async(self.channels.supervisor_to_host.receive_async(self.loop)))
+        self.stop()
+
+    def test_keeps_listening_after_a_failed_receive(self):
+        service_to_supervisor = self.channels.service_to_supervisor
+        failures = iter([RuntimeError("broken channel")])
+        receive_async = service_to_supervisor.receive_async
+
+        async def failing_receive_async(loop):
+            for error in failures:
+                raise error
+            return await receive_async(loop)
+
+        service_to_supervisor.receive_async = failing_receive_async
+        self.start(RestartStrategy())
+        self.wait_until(lambda: self.supervisor.started_event.is_set())
+        self.stop()
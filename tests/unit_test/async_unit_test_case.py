@@ -0,0 +1,18 @@
+import asyncio
+
+from unit_test.unit_test_case import UnitTestCase
+
+
+class AsyncUnitTestCase(UnitTestCase):
+    """Gives each test an event loop of its own to run coroutines on."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def run_async(self, coroutine, timeout=5):
+        return self.loop.run_until_complete(asyncio.wait_for(coroutine, timeout))
@@ -0,0 +1,21 @@
+"""Gives DependencyContainer the state serialization that the framework
+expects, where the installed py-dependency-injection lacks it.
+
+Test modules that build applications import this module, so the worker
+processes that import those modules to unpickle their services patch the
+container too.
+"""
+from dependency_injection.container import DependencyContainer
+
+
+def serialize_state(container):
+    return dict(container._registrations)
+
+
+def deserialize_state(container, state):
+    container._registrations.update(state)
+
+
+if not hasattr(DependencyContainer, "serialize_state"):
+    DependencyContainer.serialize_state = serialize_state
+    DependencyContainer.deserialize_state = deserialize_state